@@ -1,14 +1,20 @@
-from fastapi import FastAPI, HTTPException, Request, Response, Cookie
+from fastapi import FastAPI, HTTPException, Request, Response, Cookie, Header
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 import os
+import asyncio
+import hmac
 import uuid
 from datetime import datetime
 # Fix for OpenMP runtime conflict on macOS
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
 from backend.nlp.indicbart import IndicBartTranslator
+from backend.nlp.canned_responses import CannedResponses
+from backend.nlp.batching import TranslationBatcher
+from backend.nlp.executor import TranslationExecutor, TranslationQueueFull
 from backend.rag.retriever import VectorStoreRetriever
+from backend.config.settings import settings
 from backend.rag.generator import generate_answer, generate_general_reply
 from backend.rag.scheme_matcher import SchemeMatcher
 from backend import database as db  # Import database module
@@ -30,6 +36,17 @@ app = FastAPI(
 
 # Initialize translator (single instance for efficiency)
 translator = IndicBartTranslator()
+# Model calls run on a bounded pool off the event loop; concurrent /chat
+# translations share batched calls on it
+translation_executor = TranslationExecutor()
+batcher = TranslationBatcher(translator, executor=translation_executor)
+
+# Greeting/thanks replies in every supported language (built once, then read from disk)
+canned = CannedResponses(translator)
+try:
+    canned.load_or_build()
+except Exception as e:
+    logger.warning(f"Could not prepare canned responses, translating them per request: {e}")
 
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
@@ -53,6 +70,13 @@ app.add_middleware(
 # Initialize retriever
 retriever = VectorStoreRetriever()
 
+# Pre-embed the fixed profile-search queries so eligibility questions hit the cache
+try:
+    warmed = retriever.warm_query_cache()
+    logger.info(f"Query embedding cache warmed ({warmed} new embeddings)")
+except Exception as e:
+    logger.warning(f"Could not warm query embedding cache: {e}")
+
 # Register OCR routes
 app.include_router(ocr_router)
 
@@ -394,6 +418,28 @@ async def health_check():
     }
 
 
+@app.get("/health/retriever")
+async def retriever_health():
+    """Vector index size and query-embedding cache hit/miss counters"""
+    return {"status": "healthy", **retriever.stats()}
+
+
+@app.post("/admin/reload")
+async def reload_index(x_admin_token: Optional[str] = Header(None), force: bool = False):
+    """Swap in the latest published store snapshot without restarting"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    try:
+        # Loading happens off the event loop; queries keep using the old store meanwhile
+        reloaded = await asyncio.to_thread(retriever.reload, force)
+    except Exception as e:
+        logger.error(f"Index reload failed: {e}")
+        raise HTTPException(status_code=500, detail="Index reload failed")
+    return {"reloaded": reloaded, "snapshot": retriever.snapshot, "documents": len(retriever.vectorstore)}
+
+
 @app.get("/languages", response_model=List[LanguageInfo])
 async def get_supported_languages():
     """Get list of all supported languages"""
@@ -439,8 +485,8 @@ async def translate_text(req: TranslateRequest):
                 detail=f"Unsupported target language: {req.target_lang}"
             )
         
-        # Perform translation
-        translation = translator.translate(
+        # Perform translation (batched with concurrent requests for the same pair)
+        translation = await batcher.translate(
             req.text,
             source_lang=source_lang,
             target_lang=req.target_lang
@@ -452,6 +498,8 @@ async def translate_text(req: TranslateRequest):
             target_lang=req.target_lang
         )
         
+    except TranslationQueueFull:
+        raise HTTPException(status_code=503, detail="Translation service busy, please retry")
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -469,7 +517,8 @@ async def batch_translate(req: BatchTranslateRequest):
     - **target_lang**: Target language code
     """
     try:
-        translations = translator.batch_translate(
+        translations = await translation_executor.run(
+            translator.batch_translate,
             req.texts,
             source_lang=req.source_lang,
             target_lang=req.target_lang
@@ -482,6 +531,8 @@ async def batch_translate(req: BatchTranslateRequest):
             "target_lang": req.target_lang
         }
         
+    except TranslationQueueFull:
+        raise HTTPException(status_code=503, detail="Translation service busy, please retry")
     except Exception as e:
         logger.error(f"Batch translation error: {e}")
         raise HTTPException(status_code=500, detail="Batch translation failed")
@@ -495,12 +546,6 @@ GREETING_PATTERNS = [
     "ಹಲೋ", "வணக்கம்", "నమస్తే", "হ্যালো", "ਸਤ ਸ੍ਰੀ ਅਕਾਲ"
 ]
 
-GREETING_RESPONSES = [
-    "Hello! I'm your Government Scheme Assistant. How can I help you today?\n\nYou can ask me:\n- What schemes am I eligible for?\n- Tell me about education scholarships\n- Schemes for farmers in my state",
-    "Namaste! Welcome to the Government Scheme Assistant.\n\nI can help you find government schemes based on your profile. What would you like to know?",
-    "Hi there! I'm here to help you discover government schemes you may be eligible for.\n\nTry asking: \"What schemes am I eligible for?\" or tell me about a specific category like health, education, or agriculture."
-]
-
 def detect_intent(message: str) -> str:
     """
     Detect the intent of the user message.
@@ -659,29 +704,27 @@ async def chat(req: ChatRequest):
         
         # Step 2: Translate to English if needed (for RAG retrieval)
         if source_lang != "en_XX":
-            english_message = translator.to_english(req.message, source_lang=source_lang)
+            english_message = await batcher.to_english(req.message, source_lang=source_lang)
             logger.info(f"Translated query: {english_message}")
         else:
             english_message = req.message
         
         # Step 2.5: Intent Detection - Handle greetings/thanks without RAG
-        import random
         intent = detect_intent(english_message)
         
         if intent == "greeting":
-            reply = random.choice(GREETING_RESPONSES)
             # Add user name if available
+            name = None
             if user_profile and user_profile.get("fullName"):
                 name = user_profile["fullName"].split()[0]
-                reply = reply.replace("Hello!", f"Hello, {name}!")
-                reply = reply.replace("Namaste!", f"Namaste, {name}!")
-                reply = reply.replace("Hi there!", f"Hi {name}!")
             
             logger.info("Detected greeting intent - responding without RAG")
             
-            # Translate greeting response if needed
-            if target_lang != "en_XX":
-                reply = translator.from_english(reply, target_lang)
+            # Precompiled in the target language; the name is filled in after translation
+            if canned.has_language(target_lang):
+                reply = canned.greeting(target_lang, name=name)
+            else:
+                reply = await translation_executor.run(canned.greeting, target_lang, name=name)
             
             return ChatResponse(
                 reply=reply,
@@ -692,9 +735,10 @@ async def chat(req: ChatRequest):
             )
         
         if intent == "thanks":
-            reply = "You're welcome! Feel free to ask if you have more questions about government schemes."
-            if target_lang != "en_XX":
-                reply = translator.from_english(reply, target_lang)
+            if canned.has_language(target_lang):
+                reply = canned.thanks(target_lang)
+            else:
+                reply = await translation_executor.run(canned.thanks, target_lang)
             return ChatResponse(
                 reply=reply,
                 detected_language=detected_lang,
@@ -713,7 +757,7 @@ async def chat(req: ChatRequest):
             
             # Translate response if needed
             if target_lang != "en_XX":
-                reply = translator.from_english(reply, target_lang)
+                reply = await batcher.translate_document(reply, source_lang="en_XX", target_lang=target_lang)
                 logger.info(f"Translated response to {target_lang}")
                 
             return ChatResponse(
@@ -729,22 +773,11 @@ async def chat(req: ChatRequest):
             scheme_name = extract_scheme_name(english_message)
             logger.info(f"Detected scheme detail intent for: {scheme_name}")
             
-            # Search specifically for this scheme by name
-            docs = retriever.search(scheme_name, k=10)
-            
-            # Filter to only docs that match this scheme name
-            filtered_docs = []
-            for doc in docs:
-                doc_title = doc.metadata.get("title", "").lower()
-                if scheme_name.lower() in doc_title or doc_title in scheme_name.lower():
-                    filtered_docs.append(doc)
-            
-            # If we found matching docs, use them; otherwise use all retrieved docs
-            if filtered_docs:
-                docs = filtered_docs
-                logger.info(f"Found {len(docs)} chunks specifically for scheme: {scheme_name}")
-            else:
-                logger.info(f"No exact match, using top {len(docs)} relevant docs")
+            # Resolve the name against the title index first: every chunk of
+            # the scheme in one lookup, with no embedding call. Weak title
+            # matches fall back to hybrid search on the name.
+            docs = retriever.lookup_scheme(scheme_name, k=10)
+            logger.info(f"Found {len(docs)} chunks for scheme: {scheme_name}")
         
         # Step 3: Retrieve relevant documents
         elif user_profile:
@@ -806,7 +839,8 @@ async def chat(req: ChatRequest):
         
         # Step 5: Translate response if needed
         if target_lang != "en_XX":
-            reply = translator.from_english(reply, target_lang)
+            # Long multi-scheme answers: translated sentence by sentence, markdown kept
+            reply = await batcher.translate_document(reply, source_lang="en_XX", target_lang=target_lang)
             logger.info(f"Translated response to {target_lang}")
         
         # Extract source titles
@@ -828,6 +862,8 @@ async def chat(req: ChatRequest):
             translated_message=english_message if source_lang != "en_XX" else None
         )
         
+    except TranslationQueueFull:
+        raise HTTPException(status_code=503, detail="Translation service busy, please retry")
     except Exception as e:
         logger.error(f"Chat error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Chat processing failed: {str(e)}")
@@ -871,13 +907,20 @@ async def multilingual_chat(
 async def translator_health():
     """Check if translator is working"""
     try:
-        # Test translation
-        test = translator.translate("नमस्ते", source_lang="hi_IN", target_lang="en_XX")
+        # Test translation; bypasses the cache so a broken model shows up
+        test = await translation_executor.run(
+            translator.translate, "नमस्ते", source_lang="hi_IN", target_lang="en_XX", use_cache=False
+        )
+        if not test:
+            raise RuntimeError("Model returned an empty translation")
         return {
             "status": "healthy",
             "test_translation": test,
             "device": translator.device,
-            "model": translator.model_name
+            "model": translator.model_name,
+            "cache": translator.cache.stats(),
+            "batching": batcher.stats(),
+            "executor": translation_executor.stats()
         }
     except Exception as e:
         return {
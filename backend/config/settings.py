@@ -13,9 +13,20 @@ load_dotenv(BASE_DIR / ".env")
 class Settings(BaseSettings):
     # OpenAI
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    # Optional API base URL, e.g. a local fake embeddings server for testing
+    OPENAI_BASE_URL: str = os.getenv("OPENAI_BASE_URL", "")
 
     # Embeddings
     EMBEDDING_MODEL: str = "text-embedding-3-small"
+    # Output width requested from text-embedding-3 models (e.g. 256, 512);
+    # 0 = the model's native width. Changing it requires a full re-ingestion.
+    EMBEDDING_DIMENSIONS: int = 0
+    EMBEDDING_CACHE_DIR: str = str(
+        BASE_DIR / "backend" / "data" / "embedding_cache"
+    )
+    # Bulk embedding: batches in flight and tokens per request
+    EMBEDDING_CONCURRENCY: int = 4
+    EMBEDDING_BATCH_TOKENS: int = 50000
 
     # Chunking
     CHUNK_SIZE: int = 1000
@@ -27,6 +38,37 @@ class Settings(BaseSettings):
         BASE_DIR / "backend" / "data" / "chroma_db"
     )
 
+    # FAISS index type: "flat_ip" (exact cosine), "ivf_pq", "hnsw" or
+    # "flat_l2" (legacy). Trained automatically when documents are added.
+    VECTOR_INDEX_TYPE: str = "flat_ip"
+    IVF_NLIST: int = 0  # 0 = auto (~4 * sqrt(n))
+    IVF_NPROBE: int = 16
+    PQ_M: int = 64  # sub-quantizers, must divide the embedding dimension
+    HNSW_M: int = 32
+    HNSW_EF_CONSTRUCTION: int = 200
+    HNSW_EF_SEARCH: int = 64
+    # Rebuild the HNSW graph on save once replaced/deleted vectors exceed this fraction of it
+    HNSW_COMPACT_STALE_FRACTION: float = 0.2
+    # Vector encoding for flat/hnsw indexes: "float32", "float16", "sq8" or "pq"
+    VECTOR_STORAGE: str = "float32"
+    VECTOR_RERANK: int = 4  # compressed indexes re-rank k * N candidates exactly (0 = off)
+    # Shard the store by metadata fields, e.g. "category" or "category,level"
+    # ("" = one index). Searches fan out to shards on VECTOR_SHARD_WORKERS threads.
+    VECTOR_SHARD_BY: str = ""
+    VECTOR_SHARD_WORKERS: int = 4
+    # Serving processes open the index memory-mapped and read-only, so all
+    # uvicorn workers on a host share one page-cache copy (ingestion is unaffected)
+    VECTOR_INDEX_MMAP: bool = False
+    # Ingestion publishes versioned store snapshots; the retriever polls for a
+    # new one every SNAPSHOT_POLL_SECONDS (0 = only via POST /admin/reload)
+    SNAPSHOT_KEEP: int = 3
+    SNAPSHOT_POLL_SECONDS: float = 0
+    ADMIN_TOKEN: str = ""  # X-Admin-Token for /admin endpoints ("" = disabled)
+
+    # Near-duplicate chunks (MinHash Jaccard >= threshold) share one vector (0 = off)
+    DEDUP_THRESHOLD: float = 0.9
+    DEDUP_NUM_PERM: int = 128
+
     # LLM Extraction (NEW)
     LLM_EXTRACTION_MODEL: str = "gpt-4o-mini"
     LLM_EXTRACTION_TEMPERATURE: float = 0.0
@@ -40,6 +82,50 @@ class Settings(BaseSettings):
     
     # RAG Configuration
     TOP_K_RESULTS: int = 5
+    RRF_K: int = 60  # reciprocal-rank fusion constant for multi-query search
+    # Hybrid BM25 + vector search (VectorStoreRetriever.search_hybrid)
+    HYBRID_FUSION: str = "linear"  # "linear" (weighted scores) or "rrf" (rank fusion)
+    HYBRID_ALPHA: float = 0.5  # weight of the vector score in linear fusion
+    HYBRID_CANDIDATES: int = 50  # candidates taken from each ranker before fusion
+    # Title index matches (0-1) below this go through hybrid search instead (lookup_scheme)
+    TITLE_MATCH_MIN_SCORE: float = 0.85
+    # Scheme-grouped search (VectorStoreRetriever.search_schemes): chunks taken
+    # per query before grouping, and the MMR trade-off (1.0 = pure relevance)
+    SCHEME_SEARCH_CANDIDATES: int = 40
+    SCHEME_MMR_LAMBDA: float = 1.0
+
+    # Query embedding cache (in-process LRU + optional shared SQLite tier;
+    # set QUERY_CACHE_DB to "" to disable the disk tier)
+    QUERY_CACHE_SIZE: int = 2048
+    QUERY_CACHE_TTL_SECONDS: int = 86400
+    QUERY_CACHE_DB: str = str(
+        BASE_DIR / "backend" / "data" / "query_cache.db"
+    )
+    
+    # Translation cache (in-process LRU + optional shared SQLite tier;
+    # set TRANSLATION_CACHE_DB to "" to disable the disk tier)
+    TRANSLATION_CACHE_SIZE: int = 4096
+    TRANSLATION_CACHE_DB: str = str(
+        BASE_DIR / "backend" / "data" / "translation_cache.db"
+    )
+    
+    # Micro-batching of concurrent /chat translations (TranslationBatcher): a
+    # batch per language pair is sent when full or when its oldest text has
+    # waited TRANSLATION_MAX_WAIT_MS
+    TRANSLATION_MAX_BATCH_SIZE: int = 16
+    TRANSLATION_MAX_WAIT_MS: float = 5.0
+    # Translation runs on its own thread pool (TranslationExecutor); texts
+    # (batcher) or calls (executor) beyond TRANSLATION_QUEUE_LIMIT waiting are
+    # rejected with 503 (0 = no limit); TRANSLATION_TORCH_THREADS caps torch
+    # threads (0 = torch default)
+    TRANSLATION_WORKERS: int = 1
+    TRANSLATION_QUEUE_LIMIT: int = 256
+    TRANSLATION_TORCH_THREADS: int = 0
+    
+    # Greeting/thanks replies precompiled for every supported language
+    CANNED_RESPONSES_PATH: str = str(
+        BASE_DIR / "backend" / "data" / "canned_responses.json"
+    )
     
     # Application Configuration
     APP_HOST: str = "0.0.0.0"
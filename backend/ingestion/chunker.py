@@ -1,8 +1,20 @@
+import hashlib
+import re
 from typing import List, Dict
 from langchain_core.documents import Document
 from backend.config.settings import CHUNK_SIZE, CHUNK_OVERLAP
 
 
+def make_scheme_id(title: str) -> str:
+    """
+    Stable, human-readable scheme ID derived from the scheme title. The slug
+    alone collides for titles differing only in case, punctuation or
+    spacing, so a short hash of the exact title is appended.
+    """
+    slug = re.sub(r"[^a-z0-9]+", "-", title.lower()).strip("-")
+    return f"{slug}-{hashlib.sha1(title.encode('utf-8')).hexdigest()[:8]}"
+
+
 def chunk_scheme(scheme: Dict) -> List[Document]:
     """
     Convert a scheme into Document chunks for vector storage.
@@ -14,7 +26,9 @@ def chunk_scheme(scheme: Dict) -> List[Document]:
     eligibility_criteria = scheme.get("eligibility_criteria", {})
     
     # Base metadata for all chunks
+    scheme_id = make_scheme_id(scheme["title"])
     base_metadata = {
+        "scheme_id": scheme_id,
         "title": scheme["title"],
         "category": scheme["category"],
         "department": scheme.get("department", ""),
@@ -88,22 +102,27 @@ DOCUMENTS REQUIRED:
         metadata=application_metadata
     ))
     
-    # If any chunk is too large, split it further
+    # If any chunk is too large, split it further.
+    # Every chunk gets a stable ID: <scheme_id>:<chunk_type>:<part>
     final_documents = []
     for doc in documents:
+        id_prefix = f"{scheme_id}:{doc.metadata['chunk_type']}"
         if len(doc.page_content) > CHUNK_SIZE * 2:
             # Split large chunks
             text = doc.page_content
             start = 0
+            part = 0
             while start < len(text):
                 end = start + CHUNK_SIZE
                 chunk_text = text[start:end]
                 final_documents.append(Document(
                     page_content=chunk_text,
-                    metadata=doc.metadata
+                    metadata={**doc.metadata, "chunk_id": f"{id_prefix}:{part}"}
                 ))
                 start = end - CHUNK_OVERLAP
+                part += 1
         else:
+            doc.metadata["chunk_id"] = f"{id_prefix}:0"
             final_documents.append(doc)
     
     return final_documents
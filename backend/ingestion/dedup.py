@@ -0,0 +1,155 @@
+"""
+Near-Duplicate Chunk Detection - MinHash signatures with LSH banding.
+
+Many scraped schemes share boilerplate eligibility, document and application
+text, so chunk_scheme produces near-identical chunks that differ only in the
+SCHEME/CATEGORY/LEVEL header. Such chunks are grouped here; ingestion embeds
+one canonical chunk per group and stores the others without a vector:
+
+    duplicate chunk    metadata["duplicate_of"] = canonical chunk_id
+    canonical chunk    metadata["shared_schemes"] = scheme_ids of its duplicates
+
+VectorStore.search_batch returns a canonical chunk's duplicates right after
+it with the same score, so every scheme sharing the text is still found, and
+filters (e.g. on scheme_id) match the duplicates themselves.
+
+Similarity is the Jaccard overlap of word shingles of the chunk body. It is
+estimated from MinHash signatures, and only pairs that collide in at least
+one LSH band are compared, so the cost grows with the number of chunks, not
+with the number of pairs.
+"""
+import re
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.rag.vector_store import DUPLICATE_OF_KEY
+
+
+# Header lines that name the scheme rather than describe it
+HEADER_RE = re.compile(r"^(SCHEME|CATEGORY|LEVEL):.*$", re.MULTILINE)
+WORD_RE = re.compile(r"\w+")
+
+# Mersenne prime for the (a * x + b) mod p hash family; shingle hashes are
+# 32-bit and a, b < 2**32, so a * x + b never overflows uint64
+_PRIME = np.uint64((1 << 61) - 1)
+
+
+def body_text(text: str) -> str:
+    """Chunk text without the per-scheme header lines."""
+    return HEADER_RE.sub("", text)
+
+
+def shingle_hashes(text: str, size: int = 5) -> np.ndarray:
+    """Distinct 32-bit hashes of the word shingles of a chunk body."""
+    words = WORD_RE.findall(body_text(text).lower())
+    if len(words) < size:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return np.unique(np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64))
+
+
+def lsh_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    (bands, rows) with bands * rows <= num_perm whose collision threshold
+    (1 / bands) ** (1 / rows) is closest to, but not above, threshold.
+    Pairs below it are unlikely to become candidates; pairs above almost
+    always do.
+    """
+    best, best_threshold = (num_perm, 1), 0.0
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        band_threshold = (1.0 / bands) ** (1.0 / rows)
+        if best_threshold < band_threshold <= threshold:
+            best, best_threshold = (bands, rows), band_threshold
+    return best
+
+
+class MinHasher:
+    """MinHash signatures of shingle sets with a fixed, seeded permutation family."""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        permuted = (np.outer(hashes, self._a) + self._b) % _PRIME
+        return permuted.min(axis=0)
+
+    def signatures(self, texts: Sequence[str], shingle_size: int = 5) -> np.ndarray:
+        return np.stack([self.signature(shingle_hashes(t, shingle_size)) for t in texts])
+
+
+def find_duplicates(texts: Sequence[str], threshold: float = 0.9, num_perm: int = 128,
+                    shingle_size: int = 5) -> List[Optional[int]]:
+    """
+    For each text, the index of the canonical text it duplicates, or None.
+
+    A text is a duplicate when its estimated Jaccard similarity to an
+    earlier canonical text is at least threshold; duplicates always point
+    at a canonical text directly (no chains), and the earliest text of a
+    group is its canonical.
+    """
+    if not texts:
+        return []
+    signatures = MinHasher(num_perm).signatures(texts, shingle_size)
+    bands, rows = lsh_bands(num_perm, threshold)
+
+    duplicate_of: List[Optional[int]] = [None] * len(texts)
+    buckets: Dict[Tuple[int, bytes], List[int]] = {}
+    for i, signature in enumerate(signatures):
+        candidates = set()
+        keys = [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(bands)]
+        for key in keys:
+            candidates.update(buckets.get(key, ()))
+        best, best_similarity = None, threshold
+        for j in sorted(candidates):
+            similarity = float(np.mean(signatures[j] == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = j, similarity
+        if best is not None:
+            duplicate_of[i] = best
+            continue
+        # Only canonical texts are indexed, so later duplicates attach to them
+        for key in keys:
+            buckets.setdefault(key, []).append(i)
+    return duplicate_of
+
+
+def mark_duplicates(documents: List, threshold: float = 0.9, num_perm: int = 128) -> int:
+    """
+    Tag near-duplicate chunk Documents in place (see module docstring) and
+    return how many there are. Canonical chunks are the first of their
+    group in chunk_id order, so the choice is stable across runs.
+    """
+    ordered = sorted(documents, key=lambda doc: doc.metadata["chunk_id"])
+    for doc in ordered:
+        doc.metadata.pop(DUPLICATE_OF_KEY, None)
+        doc.metadata.pop("shared_schemes", None)
+
+    duplicate_of = find_duplicates([d.page_content for d in ordered], threshold, num_perm)
+    shared: Dict[int, set] = {}
+    for doc, canonical in zip(ordered, duplicate_of):
+        if canonical is None:
+            continue
+        doc.metadata[DUPLICATE_OF_KEY] = ordered[canonical].metadata["chunk_id"]
+        shared.setdefault(canonical, set()).add(doc.metadata["scheme_id"])
+    for canonical, scheme_ids in shared.items():
+        scheme_ids.discard(ordered[canonical].metadata["scheme_id"])
+        if scheme_ids:
+            ordered[canonical].metadata["shared_schemes"] = sorted(scheme_ids)
+    return sum(1 for c in duplicate_of if c is not None)
+
+
+def duplicate_state(documents: List) -> Dict[str, object]:
+    """chunk_id -> duplicate_of / shared_schemes of the tagged chunks, as kept in the ingestion manifest."""
+    state = {}
+    for doc in documents:
+        value = doc.metadata.get(DUPLICATE_OF_KEY) or doc.metadata.get("shared_schemes")
+        if value:
+            state[doc.metadata["chunk_id"]] = value
+    return state
@@ -1,20 +1,32 @@
 """
 Ingestion Runner - Loads government schemes from JSON files and ingests them into the vector store.
 """
+import hashlib
 import json
 import os
 import sys
 
+from langchain_core.documents import Document
+
 # Add backend to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from backend.ingestion.loaders.json_scheme_loader import JSONSchemeLoader
 from backend.ingestion.normalizer import normalize_scheme
-from backend.ingestion.chunker import chunk_scheme
-from backend.rag.embeddings import EmbeddingGenerator
-from backend.rag.vector_store import VectorStore
+from backend.ingestion.chunker import chunk_scheme, make_scheme_id
+from backend.ingestion.dedup import mark_duplicates, duplicate_state
+from backend.rag.embeddings import AsyncEmbeddingPipeline
+from backend.rag.embedding_cache import EmbeddingCache
+from backend.rag.vector_store import VectorStore, EmbeddingMismatchError, DUPLICATE_OF_KEY
+from backend.rag.sharded_store import open_vector_store
+from backend.rag.eligibility_index import EligibilityIndex
+from backend.rag.snapshots import publish_snapshot
 from backend.rag.scheme_links_loader import load_scheme_links, get_scheme_links
-from backend.config.settings import RAW_DATA_DIR
+from backend.config.settings import settings, RAW_DATA_DIR
+
+
+# Chunk IDs of PDF chunks (see pdf_ingestion_runner.generate_chunk_id)
+PDF_CHUNK_PREFIX = "pdf:"
 
 
 def merge_scheme_links(schemes: list) -> list:
@@ -44,15 +56,72 @@ def merge_scheme_links(schemes: list) -> list:
     return schemes
 
 
-def run_ingestion(limit=None):
+def scheme_content_hash(scheme: dict) -> str:
+    """SHA-256 of everything that ends up in a scheme's chunks."""
+    payload = json.dumps(scheme, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def manifest_path(store: VectorStore) -> str:
+    """Per-collection record of {scheme_id: {hash, chunk_ids}} from the last run."""
+    return os.path.join(store.persist_dir, f"{store.collection_name}_manifest.json")
+
+
+def load_manifest(store: VectorStore) -> dict:
+    path = manifest_path(store)
+    if len(store) == 0 or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"[WARN] Could not read ingestion manifest, doing a full rebuild: {e}")
+        return {}
+
+
+def save_manifest(store: VectorStore, manifest: dict):
+    path = manifest_path(store)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+
+
+def pdf_chunks(store) -> tuple:
+    """
+    (chunk_ids, docs, vectors) of the PDF chunks in the store (chunk IDs
+    starting with PDF_CHUNK_PREFIX), so a full scheme rebuild can put them
+    back without re-reading or re-embedding the PDFs.
     """
-    Run the full ingestion pipeline:
+    chunk_ids, docs = [], []
+    for _, text, metadata in store.items():
+        chunk_id = metadata.get("chunk_id")
+        if isinstance(chunk_id, str) and chunk_id.startswith(PDF_CHUNK_PREFIX):
+            chunk_ids.append(chunk_id)
+            docs.append(Document(page_content=text, metadata=metadata))
+    if not chunk_ids:
+        return [], [], []
+    vectors, found = store.get_vectors(chunk_ids)
+    keep = [i for i in range(len(chunk_ids)) if found[i]]
+    return [chunk_ids[i] for i in keep], [docs[i] for i in keep], [vectors[i].tolist() for i in keep]
+
+
+def run_ingestion(limit=None, full_rebuild=False):
+    """
+    Run the ingestion pipeline:
     1. Load schemes from JSON files in backend/data/schemes_json/
     2. Merge scheme links from scheme_links.json
     3. Normalize to consistent format
-    4. Chunk into documents (eligibility-focused)
-    5. Generate embeddings
-    6. Store in vector database
+    4. Compare scheme content hashes with the last run's manifest
+    5. Chunk, tag near-duplicate chunks, and embed only new/changed chunks
+       that are not duplicates
+    6. Upsert changed chunks and delete removed ones in the vector store
+       (a full rebuild keeps the PDF chunks sharing the store)
+    7. Rebuild the structured eligibility index
+    8. Publish the store as a new snapshot for running retrievers
+
+    Args:
+        limit: Only ingest the first N schemes
+        full_rebuild: Ignore the manifest and rebuild the whole index
     """
     print("=" * 60)
     print("Government Scheme Ingestion Pipeline")
@@ -84,40 +153,179 @@ def run_ingestion(limit=None):
     
     # Normalize schemes
     print("\n[INFO] Normalizing schemes...")
-    normalized = [normalize_scheme(s) for s in schemes]
+    normalized = []
+    seen_ids = set()
+    for s in schemes:
+        scheme = normalize_scheme(s)
+        # A scheme listed twice under the same title would overwrite its own chunks
+        scheme_id = make_scheme_id(scheme["title"])
+        if scheme_id in seen_ids:
+            print(f"[WARN] Skipping repeated scheme '{scheme['title']}'")
+            continue
+        seen_ids.add(scheme_id)
+        normalized.append(scheme)
     
-    # Chunk into documents
+    # Work out which schemes changed since the last run
+    embeddings_changed = False
+    try:
+        store = open_vector_store()
+    except EmbeddingMismatchError as e:
+        print(f"[WARN] {e}")
+        print("[INFO] Embedding settings changed - performing a full rebuild")
+        store = open_vector_store(check_embeddings=False)
+        full_rebuild = embeddings_changed = True
+    previous = {} if full_rebuild else load_manifest(store)
+    # PDF chunks share the store: kept with their vectors across a rebuild,
+    # or re-ingested before publishing when the old vectors are unusable
+    pdf_ids, pdf_docs, pdf_vectors = [], [], []
+    reingest_pdfs = False
+    if not previous:
+        print("[INFO] No previous manifest - performing a full rebuild")
+        if embeddings_changed:
+            reingest_pdfs = any(
+                isinstance(m.get("chunk_id"), str) and m["chunk_id"].startswith(PDF_CHUNK_PREFIX)
+                for _, _, m in store.items()
+            )
+        else:
+            pdf_ids, pdf_docs, pdf_vectors = pdf_chunks(store)
+            if pdf_ids:
+                print(f"[INFO] Keeping {len(pdf_ids)} PDF chunks")
+        store.clear()
+    
+    manifest = {}
+    changed = []
+    for scheme in normalized:
+        scheme_id = make_scheme_id(scheme["title"])
+        content_hash = scheme_content_hash(scheme)
+        manifest[scheme_id] = {"hash": content_hash, "chunk_ids": []}
+        old = previous.get(scheme_id)
+        if old and old["hash"] == content_hash:
+            manifest[scheme_id]["chunk_ids"] = old["chunk_ids"]
+        else:
+            changed.append((scheme_id, scheme))
+    removed = [scheme_id for scheme_id in previous if scheme_id not in manifest]
+    print(f"   {len(changed)} new/changed, {len(removed)} removed, "
+          f"{len(normalized) - len(changed)} unchanged schemes")
+    
+    # Chunk into documents. Near-duplicate detection needs every scheme's
+    # chunks (cheap), since a changed scheme can change which chunk of an
+    # unchanged scheme holds the shared vector
+    dedup = settings.DEDUP_THRESHOLD > 0
+    changed_ids = {scheme_id for scheme_id, _ in changed}
     print("[INFO] Chunking schemes into documents...")
-    documents = []
+    chunks_by_scheme = {}
     for scheme in normalized:
-        documents.extend(chunk_scheme(scheme))
-    print(f"   Created {len(documents)} document chunks")
+        scheme_id = make_scheme_id(scheme["title"])
+        if dedup or scheme_id in changed_ids:
+            chunks_by_scheme[scheme_id] = chunk_scheme(scheme)
+    
+    duplicates = 0
+    if dedup:
+        all_chunks = [d for chunks in chunks_by_scheme.values() for d in chunks]
+        # Duplicates are served through their canonical's vector, so a group
+        # never spans shards
+        shard_fields = getattr(store, "shard_by", [])
+        groups = {}
+        for d in all_chunks:
+            groups.setdefault(tuple(d.metadata.get(f) for f in shard_fields), []).append(d)
+        duplicates = sum(
+            mark_duplicates(group, threshold=settings.DEDUP_THRESHOLD, num_perm=settings.DEDUP_NUM_PERM)
+            for group in groups.values()
+        )
+        print(f"   Near-duplicate chunks: {duplicates} of {len(all_chunks)} "
+              f"({duplicates / max(len(all_chunks), 1):.1%}) stored without a vector")
+    
+    # Write chunks of changed schemes, and of schemes whose duplicate tags changed
+    documents = []
+    for scheme_id, chunks in chunks_by_scheme.items():
+        state = duplicate_state(chunks)
+        manifest[scheme_id]["chunk_ids"] = [d.metadata["chunk_id"] for d in chunks]
+        if state:
+            manifest[scheme_id]["duplicates"] = state
+        if scheme_id in changed_ids or previous.get(scheme_id, {}).get("duplicates", {}) != state:
+            documents.extend(chunks)
+    vector_documents = [d for d in documents if DUPLICATE_OF_KEY not in d.metadata]
+    duplicate_documents = [d for d in documents if DUPLICATE_OF_KEY in d.metadata]
+    print(f"   {len(documents)} document chunks to write, {len(duplicate_documents)} of them without a vector")
     
-    # Generate embeddings
-    print("\n[INFO] Generating embeddings (this may take a while)...")
-    embedder = EmbeddingGenerator()
+    # Chunks that no longer exist: removed schemes, and changed schemes that shrank
+    stale_ids = []
+    for scheme_id in removed:
+        stale_ids.extend(previous[scheme_id]["chunk_ids"])
+    for scheme_id, _ in changed:
+        if scheme_id in previous:
+            current = set(manifest[scheme_id]["chunk_ids"])
+            stale_ids.extend(c for c in previous[scheme_id]["chunk_ids"] if c not in current)
     
-    # Process in batches to avoid memory issues
-    batch_size = 100
+    # Generate embeddings (only chunks missing from the embedding cache hit the API)
     all_embeddings = []
-    for i in range(0, len(documents), batch_size):
-        batch = documents[i:i+batch_size]
-        batch_texts = [d.page_content for d in batch]
-        batch_embeddings = embedder.embed_texts(batch_texts)
-        all_embeddings.extend(batch_embeddings)
-        print(f"   Processed {min(i+batch_size, len(documents))}/{len(documents)} chunks")
+    cache_stats = None
+    if vector_documents:
+        print("\n[INFO] Generating embeddings (this may take a while)...")
+        pipeline = AsyncEmbeddingPipeline()
+        cache = EmbeddingCache(pipeline.cache_key)
+        
+        # Misses are embedded concurrently; the cache is checkpointed every
+        # 2000 texts so an interrupted run keeps its progress
+        all_embeddings = cache.embed(
+            [d.page_content for d in vector_documents], pipeline.embed_sync, batch_size=2000
+        )
+        cache_stats = cache.stats()
+        print(f"   Embedding cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+              f"({cache_stats['hit_rate']:.1%} hit rate)")
     
     # Store in vector database
-    print("\n[INFO] Storing in vector database...")
-    store = VectorStore()
-    store.add_documents(documents, all_embeddings)
+    print("\n[INFO] Updating vector database...")
+    deleted = store.delete(stale_ids, save=False)
+    # One upsert, so a rebuilt IVF/PQ index is trained on schemes and PDFs alike
+    store.upsert(
+        [d.metadata["chunk_id"] for d in vector_documents] + pdf_ids,
+        vector_documents + pdf_docs, list(all_embeddings) + pdf_vectors, save=False
+    )
+    store.put_documents(
+        [d.metadata["chunk_id"] for d in duplicate_documents], duplicate_documents, save=False
+    )
+    if documents or deleted or pdf_ids:
+        store.save()
+    if len(store):
+        save_manifest(store, manifest)
+    
+    # Structured eligibility table for the whole corpus (cheap, always rebuilt)
+    eligibility_index = EligibilityIndex.build(normalized)
+    eligibility_index.save(EligibilityIndex.path_for(store.persist_dir, store.collection_name))
+    print(f"[INFO] Saved eligibility index for {len(eligibility_index)} schemes")
+    
+    if reingest_pdfs:
+        from backend.ingestion.pdf_ingestion_runner import run_pdf_ingestion
+        print("[INFO] Re-ingesting PDFs with the new embedding settings...")
+        run_pdf_ingestion(publish=False)
+        store = open_vector_store()
+    
+    # Publish the finished store; running retrievers pick it up on reload
+    version = publish_snapshot(store.persist_dir, store.collection_name, keep=settings.SNAPSHOT_KEEP)
+    print(f"[INFO] Published store snapshot {version}")
     
     print("\n" + "=" * 60)
     print(f"[SUCCESS] Ingestion complete!")
     print(f"   - Schemes loaded: {len(schemes)}")
-    print(f"   - Document chunks: {len(documents)}")
+    print(f"   - Chunks upserted: {len(documents)}")
+    print(f"   - Chunks deleted: {deleted}")
+    if dedup:
+        print(f"   - Embeddings saved by deduplication: {len(duplicate_documents)} this run, "
+              f"{duplicates} vectors kept out of the index")
+    if cache_stats:
+        print(f"   - Embedding cache hit rate: {cache_stats['hit_rate']:.1%}")
+    print(f"   - Chunks in store: {len(store)}")
     print("=" * 60)
 
 
 if __name__ == "__main__":
-    run_ingestion()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Ingest scheme JSON files into the vector store")
+    parser.add_argument("--limit", type=int, help="Only ingest the first N schemes")
+    parser.add_argument("--full", action="store_true", help="Rebuild the whole index")
+    
+    args = parser.parse_args()
+    
+    run_ingestion(limit=args.limit, full_rebuild=args.full)
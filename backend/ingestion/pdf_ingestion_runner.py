@@ -2,21 +2,29 @@
 PDF Ingestion Runner
 
 Fast PDF ingestion pipeline using character-based chunking.
-Loads PDFs → Chunks text → Embeds into ChromaDB.
+Loads PDFs → Chunks text → Embeds new chunks → Upserts into the FAISS
+vector store that /chat reads (the same store as the scheme JSON ingestion).
+
+Chunks are keyed by stable IDs; a chunk already in the store is found with
+an ID lookup and never re-embedded, and chunks of PDFs that changed or were
+removed are deleted using the per-file manifest of the last run.
 """
 
 import hashlib
+import json
 import logging
+import os
 from typing import List
-from pathlib import Path
 
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_chroma import Chroma
 
 from backend.ingestion.pdf_loader import PDFLoader
-from backend.rag.embeddings import EmbeddingGenerator
-from backend.config.settings import settings, VECTOR_DB_DIR
+from backend.rag.embeddings import AsyncEmbeddingPipeline
+from backend.rag.embedding_cache import EmbeddingCache
+from backend.rag.sharded_store import open_vector_store
+from backend.rag.snapshots import publish_snapshot
+from backend.config.settings import settings
 
 # Configure logging
 logging.basicConfig(
@@ -27,13 +35,38 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def generate_chunk_id(filename: str, page: int, content: str) -> str:
+def generate_chunk_id(filename: str, page: int, chunk_index: int, content: str) -> str:
     """
     Generate a unique, deterministic ID for a chunk.
-    This ensures re-running the pipeline doesn't create duplicates.
+    This ensures re-running the pipeline doesn't create duplicates, and a
+    chunk whose text changed gets a new ID (the old one is deleted).
     """
-    content_hash = hashlib.md5(content[:100].encode()).hexdigest()[:8]
-    return f"pdf_{filename}_{page}_{content_hash}"
+    content_hash = hashlib.md5(content.encode()).hexdigest()[:12]
+    return f"pdf:{filename}:{page}:{chunk_index}:{content_hash}"
+
+
+def pdf_manifest_path(store) -> str:
+    """Per-collection record of {filename: [chunk_ids]} from the last PDF run."""
+    return os.path.join(store.persist_dir, f"{store.collection_name}_pdf_manifest.json")
+
+
+def load_pdf_manifest(store) -> dict:
+    path = pdf_manifest_path(store)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"[WARN] Could not read PDF manifest: {e}")
+        return {}
+
+
+def save_pdf_manifest(store, manifest: dict):
+    path = pdf_manifest_path(store)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
 
 
 def chunk_documents(documents: List[Document]) -> List[Document]:
@@ -68,13 +101,15 @@ def chunk_documents(documents: List[Document]) -> List[Document]:
     return chunked_docs
 
 
-def run_pdf_ingestion(pdf_dir: str = None, force_reingest: bool = False):
+def run_pdf_ingestion(pdf_dir: str = None, force_reingest: bool = False, publish: bool = True):
     """
     Main ingestion pipeline for PDFs.
     
     Args:
         pdf_dir: Optional custom directory for PDFs
         force_reingest: If True, re-ingest all PDFs even if already indexed
+        publish: Publish a store snapshot afterwards (the scheme runner
+            publishes itself when it re-ingests PDFs during a rebuild)
     """
     print("=" * 50)
     print("PDF Ingestion Pipeline")
@@ -94,56 +129,66 @@ def run_pdf_ingestion(pdf_dir: str = None, force_reingest: bool = False):
     chunked_documents = chunk_documents(raw_documents)
     print(f"Created {len(chunked_documents)} chunks from {len(raw_documents)} pages")
     
-    # Step 3: Initialize ChromaDB and check for existing documents
+    # Step 3: Assign stable IDs and find chunks missing from the store
     print("\n🔍 Step 3: Checking for existing documents...")
-    embedder = EmbeddingGenerator()
-    
-    vectorstore = Chroma(
-        persist_directory=VECTOR_DB_DIR,
-        embedding_function=embedder.get_embedding_function(),
-        collection_name="government_schemes"
-    )
-    
-    # Generate IDs and filter out existing ones
-    documents_to_add = []
-    ids_to_add = []
-    
-    # Get existing IDs from the collection
-    try:
-        existing_data = vectorstore._collection.get()
-        existing_ids = set(existing_data.get("ids", []))
-        print(f"Found {len(existing_ids)} existing documents in collection")
-    except Exception:
-        existing_ids = set()
-    
+    store = open_vector_store()
+    previous = load_pdf_manifest(store)
+    manifest = {}
     for doc in chunked_documents:
         chunk_id = generate_chunk_id(
             doc.metadata["filename"],
             doc.metadata["page"],
+            doc.metadata["chunk_index"],
             doc.page_content
         )
-        
-        if chunk_id not in existing_ids or force_reingest:
-            documents_to_add.append(doc)
-            ids_to_add.append(chunk_id)
-    
-    if not documents_to_add:
+        doc.metadata["chunk_id"] = chunk_id
+        manifest.setdefault(doc.metadata["filename"], []).append(chunk_id)
+    
+    # ID lookups against the store (binary search over its sorted labels),
+    # so a re-run costs only the new chunks
+    documents_to_add = [
+        doc for doc in chunked_documents
+        if force_reingest or doc.metadata["chunk_id"] not in store
+    ]
+    
+    # Chunks of PDFs that changed or disappeared since the last run.
+    # Removed files are only known from the manifest; the loader sees current files only.
+    current_ids = {doc.metadata["chunk_id"] for doc in chunked_documents}
+    stale_ids = [
+        chunk_id for chunk_ids in previous.values() for chunk_id in chunk_ids
+        if chunk_id not in current_ids
+    ]
+    
+    print(f"Will add {len(documents_to_add)} new chunks "
+          f"({len(chunked_documents) - len(documents_to_add)} already exist), "
+          f"remove {len(stale_ids)} stale chunks")
+    
+    # Step 4: Embed (embedding cache first) and upsert by ID
+    if documents_to_add:
+        print("\n📦 Step 4: Embedding and storing documents...")
+        pipeline = AsyncEmbeddingPipeline()
+        cache = EmbeddingCache(pipeline.cache_key)
+        embeddings = cache.embed(
+            [doc.page_content for doc in documents_to_add], pipeline.embed_sync, batch_size=2000
+        )
+        store.upsert(
+            [doc.metadata["chunk_id"] for doc in documents_to_add], documents_to_add, embeddings, save=False
+        )
+    deleted = store.delete(stale_ids, save=False)
+    
+    if documents_to_add or deleted:
+        store.save()
+        save_pdf_manifest(store, manifest)
+        if publish:
+            # Running retrievers pick the new chunks up on reload
+            version = publish_snapshot(store.persist_dir, store.collection_name, keep=settings.SNAPSHOT_KEEP)
+            print(f"\n✅ Successfully ingested {len(documents_to_add)} chunks (snapshot {version})")
+        else:
+            print(f"\n✅ Successfully ingested {len(documents_to_add)} chunks")
+    else:
+        save_pdf_manifest(store, manifest)
         print("✓ All documents already indexed. Nothing to add.")
-        return
-    
-    print(f"Will add {len(documents_to_add)} new chunks ({len(chunked_documents) - len(documents_to_add)} already exist)")
-    
-    # Step 4: Add documents to ChromaDB
-    print("\n📦 Step 4: Embedding and storing documents...")
-    
-    # Add documents with explicit IDs
-    vectorstore.add_documents(
-        documents=documents_to_add,
-        ids=ids_to_add
-    )
-    
-    print(f"\n✅ Successfully ingested {len(documents_to_add)} chunks!")
-    print(f"   Collection now has {len(existing_ids) + len(documents_to_add)} total documents")
+    print(f"   Store now has {len(store)} total documents")
     
     # Print summary
     print("\n" + "=" * 50)
@@ -152,13 +197,14 @@ def run_pdf_ingestion(pdf_dir: str = None, force_reingest: bool = False):
     print(f"  Pages extracted: {len(raw_documents)}")
     print(f"  Chunks created: {len(chunked_documents)}")
     print(f"  New chunks added: {len(documents_to_add)}")
+    print(f"  Stale chunks removed: {deleted}")
     print("=" * 50)
 
 
 if __name__ == "__main__":
     import argparse
     
-    parser = argparse.ArgumentParser(description="Ingest PDFs into ChromaDB")
+    parser = argparse.ArgumentParser(description="Ingest PDFs into the vector store")
     parser.add_argument("--dir", type=str, help="Custom PDF directory")
     parser.add_argument("--force", action="store_true", help="Force re-ingestion")
     
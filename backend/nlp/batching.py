@@ -0,0 +1,168 @@
+"""
+Translation Batcher - asyncio micro-batching front-end for IndicBartTranslator.
+
+Concurrent requests each translate one text. The batcher queues them per
+(source, target) language pair, and a single worker task turns each queue
+into one batch_translate call:
+
+    - a batch is sent once it holds TRANSLATION_MAX_BATCH_SIZE texts, or
+      TRANSLATION_MAX_WAIT_MS after its oldest text arrived;
+    - while the model is busy, new texts keep queueing, so batches grow
+      with load instead of requests waiting one behind another;
+    - pairs are served oldest first;
+    - at most TRANSLATION_QUEUE_LIMIT texts wait across all pairs; beyond
+      that translate() raises TranslationQueueFull (the executor behind it
+      only ever sees one batch at a time, so this is where load queues).
+
+The model runs in an executor, never on the event loop.
+"""
+import asyncio
+import time
+from concurrent.futures import Executor
+from functools import partial
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from backend.config.settings import settings
+from backend.nlp.executor import TranslationQueueFull
+from backend.nlp.segmenter import split_markdown, join_markdown
+
+
+class _Pending(NamedTuple):
+    text: str
+    future: asyncio.Future
+    enqueued: float
+
+
+class TranslationBatcher:
+    """Groups concurrent translate() calls into batch_translate calls per language pair."""
+
+    def __init__(self, translator, max_batch_size: Optional[int] = None, max_wait_ms: Optional[float] = None,
+                 executor: Optional[Executor] = None, queue_limit: Optional[int] = None):
+        self.translator = translator
+        self.max_batch_size = max(1, max_batch_size or settings.TRANSLATION_MAX_BATCH_SIZE)
+        self.max_wait = (settings.TRANSLATION_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000.0
+        self.executor = executor
+        self.queue_limit = settings.TRANSLATION_QUEUE_LIMIT if queue_limit is None else queue_limit
+        self._pending: Dict[Tuple[str, str], List[_Pending]] = {}
+        self._queued = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.requests = 0
+        self.batches = 0
+        self.batched_texts = 0
+        self.largest_batch = 0
+        self.rejected = 0
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def translate(self, text: str, source_lang: Optional[str] = None, target_lang: str = "en_XX") -> str:
+        """Translate one text as part of the next batch for its language pair."""
+        if not text or not text.strip():
+            return ""
+        if source_lang is None:
+            source_lang = self.translator.detect_language_code(text)
+        future, = self._enqueue([text], source_lang, target_lang)
+        return await future
+
+    def _enqueue(self, texts: List[str], source_lang: str, target_lang: str) -> List[asyncio.Future]:
+        """Queue texts for their pair, all or none; raises TranslationQueueFull past queue_limit."""
+        # A request larger than the limit is still admitted into an empty queue
+        if self.queue_limit > 0 and self._queued and self._queued + len(texts) > self.queue_limit:
+            self.rejected += 1
+            raise TranslationQueueFull(f"{self._queued} texts already queued for translation")
+        self._ensure_worker()
+        loop = asyncio.get_running_loop()
+        queue = self._pending.setdefault((source_lang, target_lang), [])
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            queue.append(_Pending(text, future, time.monotonic()))
+            futures.append(future)
+        self._queued += len(texts)
+        self.requests += len(texts)
+        self._wakeup.set()
+        return futures
+
+    async def to_english(self, text: str, source_lang: Optional[str] = None) -> str:
+        return await self.translate(text, source_lang=source_lang, target_lang="en_XX")
+
+    async def from_english(self, text: str, target_lang: str) -> str:
+        return await self.translate(text, source_lang="en_XX", target_lang=target_lang)
+
+    async def translate_document(self, text: str, source_lang: Optional[str] = None,
+                                 target_lang: str = "en_XX") -> str:
+        """
+        Translate a long markdown text segment by segment (see
+        IndicBartTranslator.translate_document); the segments join the
+        batches of their language pair like any other text.
+        """
+        if not text or not text.strip():
+            return ""
+        if source_lang is None:
+            source_lang = self.translator.detect_language_code(text)
+        template, segments = split_markdown(text)
+        translations = await asyncio.gather(*self._enqueue(segments, source_lang, target_lang)) if segments else []
+        return join_markdown(template, [t or s for s, t in zip(segments, translations)])
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._pending:
+                # Oldest waiting text first: a pair with texts left over after a
+                # full batch must not keep the head while others wait
+                pair = min(self._pending, key=lambda p: self._pending[p][0].enqueued)
+                queue = self._pending[pair]
+                # Give concurrent requests up to max_wait to join, unless the batch is full
+                deadline = queue[0].enqueued + self.max_wait
+                while len(queue) < self.max_batch_size:
+                    delay = deadline - time.monotonic()
+                    if delay <= 0:
+                        break
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), delay)
+                    except asyncio.TimeoutError:
+                        break
+
+                batch = queue[:self.max_batch_size]
+                del queue[:self.max_batch_size]
+                if not queue:
+                    del self._pending[pair]
+                self._queued -= len(batch)
+                self.batches += 1
+                self.batched_texts += len(batch)
+                self.largest_batch = max(self.largest_batch, len(batch))
+
+                source_lang, target_lang = pair
+                try:
+                    translations = await loop.run_in_executor(self.executor, partial(
+                        self.translator.batch_translate, [p.text for p in batch],
+                        source_lang=source_lang, target_lang=target_lang, batch_size=len(batch)
+                    ))
+                except Exception as e:
+                    for p in batch:
+                        if not p.future.done():
+                            p.future.set_exception(e)
+                    continue
+                for p, translation in zip(batch, translations):
+                    # Requests whose client went away are cancelled; their results are dropped
+                    if not p.future.done():
+                        p.future.set_result(translation)
+
+    def stats(self) -> Dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": self.batched_texts / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "queue_limit": self.queue_limit,
+            "queued": self._queued,
+            "rejected": self.rejected,
+        }
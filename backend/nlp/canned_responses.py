@@ -0,0 +1,197 @@
+"""
+Canned Responses - greeting and thanks replies precompiled for every language.
+
+Greeting and thanks turns in /chat get fixed English replies. Rather than
+translating them on every request, each reply is translated once per entry
+in IndicBartTranslator.SUPPORTED_LANGUAGES and the table is kept on disk
+(CANNED_RESPONSES_PATH). A table built from other English texts or another
+model is rebuilt. A language where the model returned nothing for some
+line is served with those lines in English but not saved, so the next
+load_or_build translates it again.
+
+Greetings are stored as parts: the salutation alone ("Hello"), the
+salutation used before a name, and the body, translated line by line so the
+markdown list survives. The user's first name is inserted after
+translation, so it never passes through the model.
+
+Build offline with:  python -m backend.nlp.canned_responses
+"""
+import hashlib
+import json
+import os
+import random
+from typing import Dict, List, Optional
+
+from backend.config.settings import settings
+
+
+# (salutation, salutation before a name, body)
+GREETINGS = [
+    (
+        "Hello", "Hello",
+        "I'm your Government Scheme Assistant. How can I help you today?\n\n"
+        "You can ask me:\n- What schemes am I eligible for?\n- Tell me about education scholarships\n"
+        "- Schemes for farmers in my state"
+    ),
+    (
+        "Namaste", "Namaste",
+        "Welcome to the Government Scheme Assistant.\n\n"
+        "I can help you find government schemes based on your profile. What would you like to know?"
+    ),
+    (
+        "Hi there", "Hi",
+        "I'm here to help you discover government schemes you may be eligible for.\n\n"
+        "Try asking: \"What schemes am I eligible for?\" or tell me about a specific category like "
+        "health, education, or agriculture."
+    ),
+]
+
+THANKS = "You're welcome! Feel free to ask if you have more questions about government schemes."
+
+ENGLISH = "en_XX"
+
+
+def _english_table() -> Dict:
+    return {
+        "greetings": [
+            {"salutation": s, "named_salutation": n, "body": b} for s, n, b in GREETINGS
+        ],
+        "thanks": THANKS,
+    }
+
+
+def _translate_lines(text: str, translated: Dict[str, str]) -> str:
+    """text with every non-empty line replaced by its translation; list markers are kept."""
+    lines = []
+    for line in text.split("\n"):
+        if line.startswith("- "):
+            lines.append("- " + translated.get(line[2:], line[2:]))
+        else:
+            lines.append(translated.get(line, line) if line.strip() else line)
+    return "\n".join(lines)
+
+
+def _source_lines(table: Dict) -> List[str]:
+    """Distinct strings of the English table that go to the translator."""
+    texts = []
+    for greeting in table["greetings"]:
+        texts += [greeting["salutation"], greeting["named_salutation"]]
+        texts += [line[2:] if line.startswith("- ") else line
+                  for line in greeting["body"].split("\n") if line.strip()]
+    texts += [line for line in table["thanks"].split("\n") if line.strip()]
+    return list(dict.fromkeys(texts))
+
+
+class CannedResponses:
+    """Per-language greeting/thanks replies, loaded from disk or built with the translator."""
+
+    def __init__(self, translator, path: Optional[str] = None):
+        self.translator = translator
+        self.path = path or settings.CANNED_RESPONSES_PATH
+        self.tables: Dict[str, Dict] = {ENGLISH: _english_table()}
+        # Languages whose table still has English lines; never saved
+        self.incomplete: set = set()
+
+    @property
+    def fingerprint(self) -> str:
+        """Changes whenever the English texts or the translation model change."""
+        source = json.dumps(_english_table(), sort_keys=True) + self.translator.model_name
+        return hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+
+    def load_or_build(self) -> "CannedResponses":
+        """Load the table from disk; build and save the languages it is missing (all of them if stale)."""
+        languages = [lang for lang in self.translator.get_supported_languages() if lang != ENGLISH]
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            if stored.get("fingerprint") == self.fingerprint:
+                self.tables.update(stored["languages"])
+        except (OSError, ValueError, KeyError):
+            pass
+        missing = [lang for lang in languages if lang not in self.tables]
+        if missing:
+            return self.build(missing)
+        print(f"[INFO] Loaded canned responses for {len(self.tables)} languages")
+        return self
+
+    def build(self, languages: List[str]) -> "CannedResponses":
+        """Translate the English table into each language and save it."""
+        print(f"[INFO] Building canned responses for {len(languages)} languages...")
+        for lang in languages:
+            self.tables[lang] = self._translate_table(lang)
+        if self.incomplete:
+            print(f"[WARN] Canned responses for {sorted(self.incomplete)} have untranslated lines; "
+                  "not saved, retried on next load")
+        self.save()
+        return self
+
+    def _translate_table(self, lang: str) -> Dict:
+        """The English table in lang, translated in one batch."""
+        english = _english_table()
+        texts = _source_lines(english)
+        translated = dict(zip(texts, self.translator.batch_translate(texts, source_lang=ENGLISH, target_lang=lang)))
+        # Lines the model failed on stay in English
+        translated = {text: out for text, out in translated.items() if out}
+        if len(translated) < len(texts):
+            self.incomplete.add(lang)
+        else:
+            self.incomplete.discard(lang)
+        return {
+            "greetings": [
+                {
+                    "salutation": translated.get(g["salutation"], g["salutation"]),
+                    "named_salutation": translated.get(g["named_salutation"], g["named_salutation"]),
+                    "body": _translate_lines(g["body"], translated),
+                }
+                for g in english["greetings"]
+            ],
+            "thanks": _translate_lines(english["thanks"], translated),
+        }
+
+    def has_language(self, lang: str) -> bool:
+        """True when replies in lang are ready without calling the translator."""
+        return lang in self.tables
+
+    def _table_for(self, lang: str) -> Dict:
+        table = self.tables.get(lang)
+        if table is None:
+            # Language outside the precompiled table: translate once, keep in memory
+            table = self.tables[lang] = self._translate_table(lang)
+        return table
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        payload = {
+            "fingerprint": self.fingerprint,
+            "languages": {
+                lang: table for lang, table in self.tables.items()
+                if lang != ENGLISH and lang not in self.incomplete
+            },
+        }
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2, ensure_ascii=False)
+        os.replace(self.path + ".tmp", self.path)
+        print(f"[INFO] Saved canned responses to {self.path}")
+
+    def greeting(self, lang: str, name: Optional[str] = None, variant: Optional[int] = None) -> str:
+        """A greeting in lang, addressing name when given (random variant by default)."""
+        greetings = self._table_for(lang)["greetings"]
+        greeting = greetings[random.randrange(len(greetings)) if variant is None else variant % len(greetings)]
+        # Translated salutations may come back with their own end punctuation
+        if name:
+            salutation = f"{greeting['named_salutation'].rstrip('!.। ')}, {name}!"
+        else:
+            salutation = f"{greeting['salutation'].rstrip('!.। ')}!"
+        return f"{salutation} {greeting['body']}"
+
+    def thanks(self, lang: str) -> str:
+        return self._table_for(lang)["thanks"]
+
+
+if __name__ == "__main__":
+    from backend.nlp.indicbart import IndicBartTranslator
+
+    canned = CannedResponses(IndicBartTranslator())
+    languages = [lang for lang in canned.translator.get_supported_languages() if lang != ENGLISH]
+    canned.build(languages)
+    print(canned.greeting("hi_IN", name="Asha", variant=0))
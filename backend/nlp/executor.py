@@ -0,0 +1,123 @@
+"""
+Translation Executor - bounded thread pool that runs translation off the event loop.
+
+IndicBartTranslator calls are CPU-heavy and synchronous; run on the uvicorn
+event loop they stall every other request (health checks, static files,
+retrieval-only answers). All model work is submitted here instead:
+
+    - TRANSLATION_WORKERS threads (generation itself is serialised by the
+      translator, torch parallelises inside each call);
+    - at most TRANSLATION_QUEUE_LIMIT calls waiting; beyond that submit()
+      raises TranslationQueueFull, so overload turns into fast 503s rather
+      than an ever-growing backlog (TranslationBatcher, which submits one
+      batch at a time, applies the same limit to its queued texts);
+    - TRANSLATION_TORCH_THREADS caps torch's intra-op threads (0 = torch
+      default), leaving cores for the web workers;
+    - queue depth and wait/run latency percentiles for /health/translator.
+
+Threads rather than processes: torch releases the GIL while generating, and
+a process pool would need a copy of the model per process.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Optional
+
+from backend.config.settings import settings
+
+
+class TranslationQueueFull(RuntimeError):
+    """Raised when TRANSLATION_QUEUE_LIMIT calls are already waiting."""
+
+
+def _percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class TranslationExecutor(Executor):
+    """ThreadPoolExecutor with a bounded queue and latency metrics; usable with loop.run_in_executor."""
+
+    def __init__(self, workers: Optional[int] = None, queue_limit: Optional[int] = None,
+                 torch_threads: Optional[int] = None, window: int = 1024):
+        self.workers = max(1, workers or settings.TRANSLATION_WORKERS)
+        self.queue_limit = settings.TRANSLATION_QUEUE_LIMIT if queue_limit is None else queue_limit
+        self.torch_threads = settings.TRANSLATION_TORCH_THREADS if torch_threads is None else torch_threads
+        if self.torch_threads > 0:
+            import torch
+            torch.set_num_threads(self.torch_threads)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="translate")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._wait_times = deque(maxlen=window)
+        self._run_times = deque(maxlen=window)
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        with self._lock:
+            if self.queue_limit > 0 and self._queued >= self.queue_limit:
+                self.rejected += 1
+                raise TranslationQueueFull(f"{self._queued} translations already queued")
+            self._queued += 1
+            self.submitted += 1
+        enqueued = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._wait_times.append(started - enqueued)
+            ok = False
+            try:
+                result = fn(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._run_times.append(time.perf_counter() - started)
+                    if ok:
+                        self.completed += 1
+                    else:
+                        self.failed += 1
+
+        return self._pool.submit(timed)
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Await fn(*args, **kwargs) on the pool."""
+        return await asyncio.get_running_loop().run_in_executor(self, partial(fn, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True, **kwargs):
+        self._pool.shutdown(wait=wait, **kwargs)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            wait_times, run_times = list(self._wait_times), list(self._run_times)
+            stats = {
+                "workers": self.workers,
+                "torch_threads": self.torch_threads,
+                "queue_limit": self.queue_limit,
+                "queued": self._queued,
+                "running": self._running,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+            }
+        for name, values in (("wait_ms", wait_times), ("run_ms", run_times)):
+            stats[name] = {
+                "p50": _percentile(values, 0.50) * 1000.0,
+                "p95": _percentile(values, 0.95) * 1000.0,
+                "max": max(values, default=0.0) * 1000.0,
+            }
+        return stats
@@ -2,8 +2,13 @@ import torch
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
 from typing import Optional, Dict, List, Union
 import logging
+import threading
 import time
 
+from backend.config.settings import settings
+from backend.nlp.translation_cache import TranslationCache
+from backend.nlp.segmenter import split_markdown, join_markdown
+
 # Configure logger
 logger = logging.getLogger(__name__)
 
@@ -14,6 +19,8 @@ class IndicBartTranslator:
     1. Dynamic INT8 Quantization (CPU) / Float16 (GPU)
     2. True Batch Inference
     3. Reduced Beam Search
+    4. Translation Cache (repeated texts are translated once)
+    5. Length-sorted batches (less padding per generate call)
     """
     
     # Internal mapping from our API codes to NLLB codes
@@ -69,6 +76,13 @@ class IndicBartTranslator:
         Initialize NLLB translator with hardware optimizations
         """
         self.model_name = model_name
+        # The tokenizer's src_lang is shared state, so one generate call at a time
+        self._model_lock = threading.Lock()
+        self.cache = TranslationCache(
+            model_name,
+            maxsize=settings.TRANSLATION_CACHE_SIZE,
+            db_path=settings.TRANSLATION_CACHE_DB,
+        )
         
         print(f"Loading translation model: {model_name}")
         try:
@@ -136,7 +150,8 @@ class IndicBartTranslator:
         num_beams: int = 2, # OPTIMIZATION: Reduced from 4 to 2
         temperature: float = 1.0,
         top_p: float = 1.0,
-        repetition_penalty: float = 1.2
+        repetition_penalty: float = 1.2,
+        use_cache: bool = True
     ) -> str:
         """
         Translate a single text string
@@ -151,7 +166,8 @@ class IndicBartTranslator:
             source_lang=source_lang, 
             target_lang=target_lang,
             batch_size=1,
-            num_beams=num_beams
+            num_beams=num_beams,
+            use_cache=use_cache
         )
         return results[0] if results else ""
 
@@ -161,10 +177,16 @@ class IndicBartTranslator:
         source_lang: Optional[str] = None,
         target_lang: str = "en_XX",
         batch_size: int = 32, # Increased batch size capability
-        num_beams: int = 2
+        num_beams: int = 2,
+        use_cache: bool = True
     ) -> List[str]:
         """
         True Batch Translation (Vectorized)
+        
+        Translations come from the cache when possible; the remaining
+        distinct texts (a text repeated in the batch counts once) go to the
+        model and are cached afterwards. use_cache=False always runs the
+        model (health checks).
         """
         if not texts:
             return []
@@ -178,39 +200,69 @@ class IndicBartTranslator:
             if source_lang is None:
                 source_lang = "en_XX"
         
+        # Only non-empty texts are translated, each distinct text once
+        valid_texts = [t for t in texts if t and t.strip()]
+        unique_texts = list(dict.fromkeys(valid_texts))
+        self.cache.record_batch_duplicates(len(valid_texts) - len(unique_texts))
+        
+        # Beam width changes the output, so it is part of the cache key
+        cache_model = f"{self.model_name}:beams={num_beams}"
+        if use_cache:
+            cached = self.cache.get_many(unique_texts, source_lang, target_lang, model=cache_model)
+        else:
+            cached = [None] * len(unique_texts)
+        translations = {text: hit for text, hit in zip(unique_texts, cached) if hit is not None}
+        
+        misses = [text for text, hit in zip(unique_texts, cached) if hit is None]
+        if misses:
+            generated = self._generate(misses, source_lang, target_lang, batch_size, num_beams)
+            translations.update(zip(misses, generated))
+            # Failed batches come back empty and are retried next time
+            done = [(text, out) for text, out in zip(misses, generated) if out]
+            if done and use_cache:
+                self.cache.put_many(
+                    [text for text, _ in done], [out for _, out in done],
+                    source_lang, target_lang, model=cache_model
+                )
+        
+        return [translations.get(t, "") if t and t.strip() else "" for t in texts]
+
+    def _generate(
+        self,
+        texts: List[str],
+        source_lang: str,
+        target_lang: str,
+        batch_size: int = 32,
+        num_beams: int = 2
+    ) -> List[str]:
+        """Run the model on non-empty texts, batch_size at a time ("" for failed batches)."""
         # Map languages
         src_code = self.NLLB_CODES.get(source_lang, "eng_Latn")
         tgt_code = self.NLLB_CODES.get(target_lang, "eng_Latn")
         
+        # Batch texts of similar length together so little of each batch is padding
+        order = sorted(range(len(texts)), key=lambda j: len(texts[j]))
+        ordered_texts = [texts[j] for j in order]
         all_translations = []
         
         # Process in chunks to avoid OOM
-        for i in range(0, len(texts), batch_size):
-            batch_texts = texts[i:i + batch_size]
-            
-            # Filter empty strings to save compute, but keep track of indices
-            # For simplicity in this implementation, we just pass empty strings through 
-            # (tokenizer handles them, but inefficiently) or logic gets complex.
-            # Efficient Approach: Only send non-empty to model
-            
-            valid_indices = [j for j, t in enumerate(batch_texts) if t and t.strip()]
-            valid_texts = [batch_texts[j] for j in valid_indices]
+        with self._model_lock:
+            for i in range(0, len(ordered_texts), batch_size):
+                batch_texts = ordered_texts[i:i + batch_size]
+                batch_results = [""] * len(batch_texts)
             
-            batch_results = [""] * len(batch_texts)
-            
-            if valid_texts:
                 try:
                     self.tokenizer.src_lang = src_code
                     inputs = self.tokenizer(
-                        valid_texts,
+                        batch_texts,
                         return_tensors="pt",
                         padding=True,
                         truncation=True,
                         max_length=512
                     ).to(self.device)
-                    
+                
                     forced_bos_token_id = self.tokenizer.convert_tokens_to_ids(tgt_code)
-                    
+                
                     with torch.no_grad():
                         outputs = self.model.generate(
                             **inputs,
@@ -219,21 +271,50 @@ class IndicBartTranslator:
                             num_beams=num_beams, # Reduced beam search
                             early_stopping=True
                         )
-                    
+                
                     decoded = self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
-                    
-                    # Fill back into results
-                    for idx, trans in zip(valid_indices, decoded):
-                        # Repair markdown for each
-                        batch_results[idx] = self.repair_markdown(trans.strip())
-                        
+                
+                    # Repair markdown for each
+                    batch_results = [self.repair_markdown(trans.strip()) for trans in decoded]
+                
                 except Exception as e:
                     logger.error(f"Batch translation error: {e}")
                     # Fallback or empty strings on error
             
-            all_translations.extend(batch_results)
-            
-        return all_translations
+                all_translations.extend(batch_results)
+        
+        results = [""] * len(texts)
+        for j, translation in zip(order, all_translations):
+            results[j] = translation
+        return results
+
+    def translate_document(
+        self,
+        text: str,
+        source_lang: Optional[str] = None,
+        target_lang: str = "en_XX",
+        batch_size: int = 16,
+        num_beams: int = 2
+    ) -> str:
+        """
+        Translate a long markdown text (e.g. a generated answer) completely.
+        
+        The text is split into sentences, list items and table cells (see
+        backend.nlp.segmenter), the segments are translated in length-sorted
+        batches and the markdown structure is rebuilt around them, so output
+        is never cut at max_length and cost grows linearly with length.
+        Segments the model fails on are kept in the source language.
+        """
+        if not text or not text.strip():
+            return ""
+        template, segments = split_markdown(text)
+        if source_lang is None:
+            source_lang = self.detect_language_code(text)
+        translations = self.batch_translate(
+            segments, source_lang=source_lang, target_lang=target_lang,
+            batch_size=batch_size, num_beams=num_beams
+        )
+        return join_markdown(template, [t or s for s, t in zip(segments, translations)])
 
     def repair_markdown(self, text: str) -> str:
         """Fix common markdown errors introduced by translation models."""
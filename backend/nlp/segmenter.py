@@ -0,0 +1,116 @@
+"""
+Markdown Segmenter - split long answers into sentence segments for translation.
+
+NLLB translates one sequence per input and generation is capped at 256
+tokens, so a multi-scheme markdown answer translated whole comes back
+truncated, and one long beam search dominates latency. split_markdown turns
+the answer into short segments (sentences of each line, table cells) plus a
+template of the literal markdown around them (heading and list markers,
+blank lines, code blocks, URLs); join_markdown puts translated segments back
+into the template.
+"""
+import re
+from typing import List, Sequence, Tuple, Union
+
+# Segments longer than this are split again at clause boundaries
+MAX_SEGMENT_CHARS = 400
+
+# Heading, quote, list and numbering markers at the start of a line
+LINE_PREFIX_RE = re.compile(r"^\s*(?:#{1,6}\s+|>\s*|[-*+]\s+|\d+[.)]\s+)*")
+# Sentence end (Latin or Devanagari danda) followed by the start of the next
+# sentence; not after abbreviations common in scheme answers ("Rs. 6000", "Dr. Ambedkar")
+ABBREVIATIONS = ("Rs", "No", "Dr", "Mr", "Mrs", "Ms", "Smt", "Shri", "St", "Govt", "approx", "e.g", "i.e", "etc")
+SENTENCE_END_RE = re.compile(
+    "".join(rf"(?<!\b{re.escape(a)}\.)" for a in ABBREVIATIONS)
+    + r"(?<=[.!?।])\s+(?=[\"'(\[*]?[A-Zऀ-෿؀-ۿ])"
+)
+CLAUSE_END_RE = re.compile(r"(?<=[;,])\s+")
+TABLE_SEPARATOR_RE = re.compile(r"^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$")
+LINK_ONLY_RE = re.compile(r"(https?://\S+|\[[^\]]*\]\([^)]*\))")
+LETTER_RE = re.compile(r"[^\W\d_]")
+
+# A line of the template: literal strings and indices into the segment list
+Template = List[List[Union[str, int]]]
+
+
+def split_sentences(text: str) -> List[str]:
+    """Sentences of a line; overlong ones are split further at ';' / ','."""
+    sentences = []
+    for sentence in SENTENCE_END_RE.split(text):
+        if len(sentence) <= MAX_SEGMENT_CHARS:
+            sentences.append(sentence)
+            continue
+        current = ""
+        for clause in CLAUSE_END_RE.split(sentence):
+            if current and len(current) + len(clause) + 1 > MAX_SEGMENT_CHARS:
+                sentences.append(current)
+                current = clause
+            else:
+                current = f"{current} {clause}" if current else clause
+        if current:
+            sentences.append(current)
+    return [s for s in sentences if s.strip()]
+
+
+def _is_translatable(text: str) -> bool:
+    return bool(LETTER_RE.search(text)) and not LINK_ONLY_RE.fullmatch(text.strip())
+
+
+def _add_text(parts: List[Union[str, int]], segments: List[str], text: str):
+    """Append text to a template line: surrounding whitespace stays literal, sentences become segments."""
+    stripped = text.strip()
+    if not _is_translatable(stripped):
+        parts.append(text)
+        return
+    start = text.index(stripped)
+    if start:
+        parts.append(text[:start])
+    for i, sentence in enumerate(split_sentences(stripped)):
+        if i:
+            parts.append(" ")
+        parts.append(len(segments))
+        segments.append(sentence)
+    trailing = text[start + len(stripped):]
+    if trailing:
+        parts.append(trailing)
+
+
+def split_markdown(text: str) -> Tuple[Template, List[str]]:
+    """(template, segments) of a markdown text; see join_markdown."""
+    template: Template = []
+    segments: List[str] = []
+    in_code = False
+    for line in text.split("\n"):
+        if line.strip().startswith("```"):
+            in_code = not in_code
+            template.append([line])
+            continue
+        if in_code or TABLE_SEPARATOR_RE.match(line):
+            template.append([line])
+            continue
+
+        parts: List[Union[str, int]] = []
+        if line.lstrip().startswith("|"):
+            # Table row: cells are translated separately
+            for i, cell in enumerate(line.split("|")):
+                if i:
+                    parts.append("|")
+                _add_text(parts, segments, cell)
+        else:
+            prefix = LINE_PREFIX_RE.match(line).group(0)
+            if prefix:
+                parts.append(prefix)
+            _add_text(parts, segments, line[len(prefix):])
+        template.append(parts)
+    return template, segments
+
+
+def join_markdown(template: Template, translations: Sequence[str]) -> str:
+    """Rebuild the text with segment i replaced by translations[i]."""
+    lines = []
+    for parts in template:
+        # Segments are single-line; newlines added by the model would break the structure
+        lines.append("".join(
+            " ".join(translations[p].split("\n")) if isinstance(p, int) else p for p in parts
+        ))
+    return "\n".join(lines)
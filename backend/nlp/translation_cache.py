@@ -0,0 +1,57 @@
+"""
+Translation Cache - bounded LRU + optional SQLite tier for translations.
+
+Sits in front of IndicBartTranslator generation so repeated strings (canned
+replies, UI text, common questions) are translated once. Entries are keyed
+by (source language, target language, model, text hash); the SQLite tier is
+shared by all workers on the host and survives restarts (see
+backend/tiered_cache.py). Translations do not expire: the same model always
+produces the same output.
+"""
+import hashlib
+from typing import Dict, List, Optional, Sequence
+
+from backend.tiered_cache import TieredCache
+
+
+class TranslationCache(TieredCache):
+    """(source, target, model, text) -> translation; no TTL."""
+
+    table = "translations"
+    value_column = "translation"
+    value_type = "TEXT"
+
+    def __init__(self, model: str, maxsize: int = 4096, db_path: str = None):
+        self.model = model
+        self.batch_duplicates = 0
+        super().__init__(maxsize, ttl=None, db_path=db_path)
+
+    def _key(self, text: str, source_lang: str, target_lang: str, model: Optional[str] = None) -> str:
+        text_hash = hashlib.sha256(text.strip().encode("utf-8")).hexdigest()
+        return f"{source_lang}:{target_lang}:{model or self.model}:{text_hash}"
+
+    def get(self, text: str, source_lang: str, target_lang: str, model: Optional[str] = None) -> Optional[str]:
+        return self.get_many([text], source_lang, target_lang, model)[0]
+
+    def get_many(self, texts: Sequence[str], source_lang: str, target_lang: str,
+                 model: Optional[str] = None) -> List[Optional[str]]:
+        """
+        Cached translations of texts (None where missing). model overrides
+        the cache's model name, e.g. to tell apart generation settings.
+        """
+        return self.get_keys([self._key(text, source_lang, target_lang, model) for text in texts])
+
+    def put_many(self, texts: Sequence[str], translations: Sequence[str], source_lang: str, target_lang: str,
+                 model: Optional[str] = None):
+        self.put_keys([self._key(text, source_lang, target_lang, model) for text in texts], translations)
+
+    def record_batch_duplicates(self, count: int):
+        """Count texts that repeated within one batch and were translated once."""
+        with self._lock:
+            self.batch_duplicates += count
+
+    def stats(self) -> Dict:
+        stats = super().stats()
+        with self._lock:
+            stats["batch_duplicates"] = self.batch_duplicates
+        return stats
@@ -0,0 +1,172 @@
+"""
+BM25 Keyword Index - in-process inverted index over chunk text and titles.
+
+Complements the FAISS index for exact names and keywords ("PM-KISAN",
+"Atal Pension Yojana") that embeddings tend to blur. Postings are stored
+CSR-style in a single .npz next to the FAISS index:
+    terms        sorted vocabulary
+    term_start   int64[len(terms) + 1] slice of each term's postings
+    post_rows    int32 document row of each posting
+    post_tf      float32 term frequency of each posting
+    labels       int64 FAISS label of each document row
+    doc_len      float32 token count of each document row
+"""
+import os
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-.][a-z0-9]+)*")
+
+STOPWORDS = frozenset(
+    "a an and are as at be s by for from has have in is it its of on or that the this to "
+    "was were will with who which what how can i my me about details tell".split()
+)
+
+# Titles are counted this many times on top of the chunk text
+TITLE_BOOST = 2
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase word tokens without stopwords. Hyphenated/dotted compounds
+    ("pm-kisan") yield the joined form and each part.
+    """
+    tokens = []
+    for match in TOKEN_RE.findall(text.lower()):
+        parts = re.split(r"[-.]", match)
+        if len(parts) > 1:
+            tokens.append("".join(parts))
+        tokens.extend(p for p in parts if p not in STOPWORDS)
+    return tokens
+
+
+class BM25Index:
+    """Okapi BM25 over (label, text, metadata) records."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], k1: float = 1.2, b: float = 0.75):
+        self.terms = arrays["terms"]
+        self.term_start = arrays["term_start"]
+        self.post_rows = arrays["post_rows"]
+        self.post_tf = arrays["post_tf"]
+        self.labels = arrays["labels"]
+        self.doc_len = arrays["doc_len"]
+        self.k1 = k1
+        self.b = b
+        self._term_ids = {term: i for i, term in enumerate(self.terms.tolist())}
+        n = len(self.labels)
+        df = np.diff(self.term_start).astype(np.float64)
+        self.idf = np.log(1.0 + (n - df + 0.5) / (df + 0.5))
+        self.avg_len = float(self.doc_len.mean()) if n else 0.0
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @staticmethod
+    def path_for(persist_dir: str, collection_name: str) -> str:
+        """Index file stored next to the collection's FAISS index."""
+        return os.path.join(persist_dir, f"{collection_name}_bm25.npz")
+
+    @classmethod
+    def build(cls, records: Iterable[Tuple[int, str, Dict]]) -> "BM25Index":
+        """Build from (label, text, metadata) records, e.g. DocumentStore.items()."""
+        labels, doc_len = [], []
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        for row, (label, text, metadata) in enumerate(records):
+            tokens = tokenize(text) + tokenize(metadata.get("title", "")) * TITLE_BOOST
+            labels.append(label)
+            doc_len.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, []).append((row, tf))
+
+        terms = sorted(postings)
+        term_start = np.zeros(len(terms) + 1, dtype=np.int64)
+        term_start[1:] = np.cumsum([len(postings[t]) for t in terms])
+        flat = [p for t in terms for p in postings[t]]
+        return cls({
+            "terms": np.array(terms, dtype=str),
+            "term_start": term_start,
+            "post_rows": np.array([row for row, _ in flat], dtype=np.int32),
+            "post_tf": np.array([tf for _, tf in flat], dtype=np.float32),
+            "labels": np.array(labels, dtype=np.int64),
+            "doc_len": np.array(doc_len, dtype=np.float32),
+        })
+
+    def updated(self, labels: Iterable[int], records: Iterable[Tuple[int, str, Dict]]) -> "BM25Index":
+        """
+        This index with the documents of labels removed and records added.
+        Only the records are tokenized; the remaining postings are merged
+        with NumPy, so the cost does not depend on re-reading the corpus.
+        """
+        fresh = BM25Index.build(records)
+        keep = ~np.isin(self.labels, np.fromiter(labels, dtype=np.int64))
+        kept_rows = int(keep.sum())
+        new_row = np.cumsum(keep) - 1
+
+        terms = np.union1d(self.terms, fresh.terms)
+        old_term = np.repeat(np.arange(len(self.terms)), np.diff(self.term_start))
+        new_term = np.repeat(np.arange(len(fresh.terms)), np.diff(fresh.term_start))
+        kept = keep[self.post_rows]
+        term_ids = np.concatenate([
+            np.searchsorted(terms, self.terms)[old_term[kept]],
+            np.searchsorted(terms, fresh.terms)[new_term],
+        ]).astype(np.int64)
+        rows = np.concatenate([new_row[self.post_rows[kept]], fresh.post_rows.astype(np.int64) + kept_rows])
+        tf = np.concatenate([self.post_tf[kept], fresh.post_tf])
+
+        order = np.lexsort((rows, term_ids))
+        counts = np.bincount(term_ids, minlength=len(terms))
+        used = counts > 0
+        term_start = np.zeros(int(used.sum()) + 1, dtype=np.int64)
+        term_start[1:] = np.cumsum(counts[used])
+        return BM25Index({
+            "terms": terms[used],
+            "term_start": term_start,
+            "post_rows": rows[order].astype(np.int32),
+            "post_tf": tf[order].astype(np.float32),
+            "labels": np.concatenate([self.labels[keep], fresh.labels]),
+            "doc_len": np.concatenate([self.doc_len[keep], fresh.doc_len]).astype(np.float32),
+        }, k1=self.k1, b=self.b)
+
+    def save(self, path: str):
+        tmp_path = path + ".tmp.npz"
+        np.savez(
+            tmp_path, terms=self.terms, term_start=self.term_start, post_rows=self.post_rows,
+            post_tf=self.post_tf, labels=self.labels, doc_len=self.doc_len,
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with np.load(path) as data:
+            return cls({name: data[name] for name in data.files})
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document row for the query."""
+        scores = np.zeros(len(self.labels), dtype=np.float32)
+        if not len(self.labels):
+            return scores
+        norm = self.k1 * (1.0 - self.b + self.b * self.doc_len / self.avg_len)
+        for term in set(tokenize(query)):
+            term_id = self._term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = self.term_start[term_id], self.term_start[term_id + 1]
+            rows, tf = self.post_rows[start:end], self.post_tf[start:end]
+            scores[rows] += self.idf[term_id] * tf * (self.k1 + 1.0) / (tf + norm[rows])
+        return scores
+
+    def search(self, query: str, k: int = 10,
+               allowed: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Top-k (label, score) with a positive score, optionally only among allowed labels."""
+        scores = self.scores(query)
+        if allowed is not None:
+            scores[~np.isin(self.labels, allowed)] = 0.0
+        hits = np.flatnonzero(scores > 0)
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [(int(self.labels[row]), float(scores[row])) for row in hits]
@@ -0,0 +1,362 @@
+"""
+Memory-mapped Document Store - chunk text and metadata for the FAISS index.
+
+On-disk layout (one directory per collection):
+    text.bin          UTF-8 text of every chunk, concatenated
+    offsets.npy       int64[n + 1] byte offsets into text.bin
+    ids.npy           int64[n] FAISS label of each row
+    sorted_ids.npy    int64[n] labels in ascending order (binary search)
+    sorted_rows.npy   int64[n] row of each entry in sorted_ids
+    schema.json       column names, kinds and string dictionaries
+    col_<i>.npy       one array per metadata column
+    bitmap_<i>.npy    uint8[values, ceil(n / 8)] packed row bitmap per value
+                      of low-cardinality str/bool columns (metadata filters)
+
+All arrays are opened with mmap, so opening a store is O(1) regardless of
+corpus size, worker processes share pages through the OS cache, and only the
+rows that are actually read get materialised.
+"""
+import json
+import os
+import shutil
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+# Column kinds and their missing-value sentinels
+# str/json: int32 codes into a value dictionary (-1 = missing)
+# int/float: float64 (NaN = missing)
+# bool: int8 (-1 = missing)
+MISSING_CODE = -1
+
+# Columns with more distinct values than this (titles, URLs) get no bitmaps;
+# filters on them compare the code array directly
+MAX_BITMAP_VALUES = 1024
+
+
+def _column_kind(values: List[Any]) -> str:
+    if all(isinstance(v, bool) for v in values):
+        return "bool"
+    if all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+        return "int"
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+        return "float"
+    if all(isinstance(v, str) for v in values):
+        return "str"
+    return "json"
+
+
+class DocumentStore:
+    """
+    Offset-indexed, memory-mapped store of chunk text plus columnar metadata.
+
+    Writes go to an in-memory overlay and are merged into a fresh on-disk
+    version by flush(); reads check the overlay first, then the mapped files.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._overlay: Dict[int, Tuple[str, Dict]] = {}
+        self._removed: set = set()
+        self._open()
+
+    # ------------------------------------------------------------------ #
+    # Reading
+    # ------------------------------------------------------------------ #
+    def _open(self):
+        """Map the on-disk arrays (or start empty)."""
+        self._rows = 0
+        # Live documents, kept up to date by put/remove
+        self._count = 0
+        self._ids = np.empty(0, dtype=np.int64)
+        self._sorted_ids = np.empty(0, dtype=np.int64)
+        self._sorted_rows = np.empty(0, dtype=np.int64)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._text = b""
+        self._columns: List[Dict[str, Any]] = []
+        self._by_name: Dict[str, Dict[str, Any]] = {}
+
+        schema_path = os.path.join(self.path, "schema.json")
+        if not os.path.exists(schema_path):
+            return
+
+        with open(schema_path, "r", encoding="utf-8") as f:
+            schema = json.load(f)
+
+        def load(name):
+            return np.load(os.path.join(self.path, name), mmap_mode="r")
+
+        self._rows = schema["rows"]
+        self._count = self._rows
+        self._ids = load("ids.npy")
+        self._sorted_ids = load("sorted_ids.npy")
+        self._sorted_rows = load("sorted_rows.npy")
+        self._offsets = load("offsets.npy")
+        if self._offsets[-1] > 0:
+            self._text = np.memmap(os.path.join(self.path, "text.bin"), dtype=np.uint8, mode="r")
+        for i, column in enumerate(schema["columns"]):
+            column = {**column, "data": load(f"col_{i}.npy")}
+            if column.get("bitmaps"):
+                column["bitmap"] = load(f"bitmap_{i}.npy")
+            self._columns.append(column)
+        self._by_name = {column["name"]: column for column in self._columns}
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.exists(os.path.join(path, "schema.json"))
+
+    def _row_of(self, label: int) -> int:
+        """Row holding label in the mapped files, or -1."""
+        if self._rows == 0:
+            return -1
+        pos = int(np.searchsorted(self._sorted_ids, label))
+        if pos < self._rows and self._sorted_ids[pos] == label:
+            return int(self._sorted_rows[pos])
+        return -1
+
+    def _read_row(self, row: int) -> Tuple[str, Dict]:
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        text = bytes(self._text[start:end]).decode("utf-8")
+        metadata = {}
+        for column in self._columns:
+            value = column["data"][row]
+            kind = column["kind"]
+            if kind in ("str", "json"):
+                if value == MISSING_CODE:
+                    continue
+                value = column["values"][value]
+                metadata[column["name"]] = json.loads(value) if kind == "json" else value
+            elif kind == "bool":
+                if value != MISSING_CODE:
+                    metadata[column["name"]] = bool(value)
+            elif not np.isnan(value):
+                metadata[column["name"]] = int(value) if kind == "int" else float(value)
+        return text, metadata
+
+    def get(self, label: int) -> Optional[Tuple[str, Dict]]:
+        """(text, metadata) for a label, or None if absent."""
+        if label in self._overlay:
+            return self._overlay[label]
+        if label in self._removed:
+            return None
+        row = self._row_of(label)
+        return self._read_row(row) if row >= 0 else None
+
+    def __contains__(self, label: int) -> bool:
+        if label in self._overlay:
+            return True
+        if label in self._removed:
+            return False
+        return self._row_of(label) >= 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def labels(self) -> np.ndarray:
+        """All live labels."""
+        base = np.asarray(self._ids)
+        if self._removed:
+            base = base[~np.isin(base, list(self._removed))]
+        new = [label for label in self._overlay if self._row_of(label) < 0]
+        return np.concatenate([base, np.array(new, dtype=np.int64)])
+
+    def _column_mask(self, name: str, values: List[Any]) -> np.ndarray:
+        """Boolean row mask of mapped rows whose column `name` is in values (None = field missing)."""
+        column = self._by_name.get(name)
+        if column is None:
+            return np.full(self._rows, None in values, dtype=bool)
+        mask = self._value_mask(column, [v for v in values if v is not None])
+        if None in values:
+            data = column["data"]
+            mask |= np.isnan(data) if column["kind"] in ("int", "float") else (np.asarray(data) == MISSING_CODE)
+        return mask
+
+    def _value_mask(self, column: Dict[str, Any], values: List[Any]) -> np.ndarray:
+        kind = column["kind"]
+        if kind in ("str", "json", "bool"):
+            if kind == "bool":
+                codes = [int(v) for v in values if isinstance(v, bool)]
+            else:
+                lookup = {v: code for code, v in enumerate(column["values"])}
+                encoded = values if kind == "str" else [
+                    json.dumps(v, sort_keys=True, ensure_ascii=False) for v in values]
+                codes = [lookup[v] for v in encoded if isinstance(v, str) and v in lookup]
+            if not codes:
+                return np.zeros(self._rows, dtype=bool)
+            if "bitmap" in column:
+                packed = np.bitwise_or.reduce(column["bitmap"][codes], axis=0)
+                return np.unpackbits(packed, count=self._rows).astype(bool)
+            return np.isin(column["data"], codes)
+
+        numbers = [v for v in values if isinstance(v, (int, float)) and not isinstance(v, bool)]
+        return np.isin(column["data"], numbers)
+
+    def labels_where(self, filters: Dict[str, Any]) -> np.ndarray:
+        """
+        Labels of live documents matching every filter. A filter value may
+        be a list, which matches any of its values; a None value (or list
+        item) matches documents without the field.
+        """
+        conditions = {
+            name: list(value) if isinstance(value, (list, tuple, set)) else [value]
+            for name, value in filters.items()
+        }
+
+        mask = np.ones(self._rows, dtype=bool)
+        for name, values in conditions.items():
+            mask &= self._column_mask(name, values)
+        base = np.asarray(self._ids)[mask]
+        if self._removed or self._overlay:
+            # Overlay rows are matched below from their in-memory metadata
+            stale = self._removed | set(self._overlay)
+            base = base[~np.isin(base, list(stale))]
+
+        new = [
+            label for label, (_, metadata) in self._overlay.items()
+            if all(metadata.get(name) in values for name, values in conditions.items())
+        ]
+        return np.concatenate([base, np.array(new, dtype=np.int64)])
+
+    def column_values(self, name: str) -> Dict[int, Any]:
+        """label -> value of metadata field `name`, for live documents that have it."""
+        values: Dict[int, Any] = {}
+        column = self._by_name.get(name)
+        if column is not None:
+            data = np.asarray(column["data"])
+            kind = column["kind"]
+            if kind in ("int", "float"):
+                rows = np.flatnonzero(~np.isnan(data))
+            else:
+                rows = np.flatnonzero(data != MISSING_CODE)
+            for row in rows.tolist():
+                label = int(self._ids[row])
+                if label in self._overlay or label in self._removed:
+                    continue
+                value = data[row]
+                if kind in ("str", "json"):
+                    value = column["values"][value]
+                    value = json.loads(value) if kind == "json" else value
+                elif kind == "bool":
+                    value = bool(value)
+                else:
+                    value = int(value) if kind == "int" else float(value)
+                values[label] = value
+        for label, (_, metadata) in self._overlay.items():
+            if metadata.get(name) is not None:
+                values[label] = metadata[name]
+        return values
+
+    def items(self) -> Iterator[Tuple[int, str, Dict]]:
+        """Iterate (label, text, metadata) over every live document."""
+        for row in range(self._rows):
+            label = int(self._ids[row])
+            if label in self._overlay or label in self._removed:
+                continue
+            text, metadata = self._read_row(row)
+            yield label, text, metadata
+        for label, (text, metadata) in self._overlay.items():
+            yield label, text, metadata
+
+    # ------------------------------------------------------------------ #
+    # Writing
+    # ------------------------------------------------------------------ #
+    def put(self, label: int, text: str, metadata: Dict):
+        if label not in self:
+            self._count += 1
+        self._removed.discard(label)
+        self._overlay[label] = (text, metadata)
+
+    def remove(self, label: int):
+        if label in self:
+            self._count -= 1
+        self._overlay.pop(label, None)
+        if self._row_of(label) >= 0:
+            self._removed.add(label)
+
+    def clear(self):
+        self._overlay.clear()
+        self._removed.clear()
+        if os.path.exists(self.path):
+            shutil.rmtree(self.path)
+        self._open()
+
+    def flush(self):
+        """Merge pending writes into a new on-disk version and re-map it."""
+        if not self._overlay and not self._removed and self.exists(self.path):
+            return
+        tmp_path = self.path + ".tmp"
+        self.write(tmp_path, self.items())
+
+        old_path = self.path + ".old"
+        if os.path.exists(old_path):
+            shutil.rmtree(old_path)
+        if os.path.exists(self.path):
+            os.rename(self.path, old_path)
+        os.rename(tmp_path, self.path)
+        # Existing mappings of the old files stay valid after unlink on POSIX
+        shutil.rmtree(old_path, ignore_errors=True)
+
+        self._overlay.clear()
+        self._removed.clear()
+        self._open()
+
+    @staticmethod
+    def write(path: str, records: Iterable[Tuple[int, str, Dict]]):
+        """Write (label, text, metadata) records as a complete store at path."""
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.makedirs(path)
+
+        ids: List[int] = []
+        offsets = [0]
+        column_values: Dict[str, Dict[int, Any]] = {}
+        with open(os.path.join(path, "text.bin"), "wb") as text_file:
+            for row, (label, text, metadata) in enumerate(records):
+                encoded = text.encode("utf-8")
+                text_file.write(encoded)
+                offsets.append(offsets[-1] + len(encoded))
+                ids.append(label)
+                for key, value in metadata.items():
+                    if value is not None:
+                        column_values.setdefault(key, {})[row] = value
+        rows = len(ids)
+
+        columns = []
+        for i, (name, values) in enumerate(column_values.items()):
+            kind = _column_kind(list(values.values()))
+            column = {"name": name, "kind": kind}
+            if kind in ("str", "json"):
+                encode = (lambda v: v) if kind == "str" else (
+                    lambda v: json.dumps(v, sort_keys=True, ensure_ascii=False))
+                vocab: Dict[str, int] = {}
+                data = np.full(rows, MISSING_CODE, dtype=np.int32)
+                for row, value in values.items():
+                    data[row] = vocab.setdefault(encode(value), len(vocab))
+                column["values"] = list(vocab)
+            elif kind == "bool":
+                data = np.full(rows, MISSING_CODE, dtype=np.int8)
+                for row, value in values.items():
+                    data[row] = int(value)
+            else:
+                data = np.full(rows, np.nan, dtype=np.float64)
+                for row, value in values.items():
+                    data[row] = value
+            np.save(os.path.join(path, f"col_{i}.npy"), data)
+            cardinality = 2 if kind == "bool" else len(column.get("values", ()))
+            if kind in ("str", "json", "bool") and cardinality <= MAX_BITMAP_VALUES:
+                bitmaps = np.stack([np.packbits(data == code) for code in range(cardinality)])
+                np.save(os.path.join(path, f"bitmap_{i}.npy"), bitmaps)
+                column["bitmaps"] = True
+            columns.append(column)
+
+        ids_np = np.array(ids, dtype=np.int64)
+        order = np.argsort(ids_np, kind="stable")
+        np.save(os.path.join(path, "ids.npy"), ids_np)
+        np.save(os.path.join(path, "sorted_ids.npy"), ids_np[order])
+        np.save(os.path.join(path, "sorted_rows.npy"), order.astype(np.int64))
+        np.save(os.path.join(path, "offsets.npy"), np.array(offsets, dtype=np.int64))
+
+        # schema.json last: its presence marks a complete store
+        with open(os.path.join(path, "schema.json"), "w", encoding="utf-8") as f:
+            json.dump({"rows": rows, "columns": columns}, f, ensure_ascii=False)
@@ -0,0 +1,185 @@
+"""
+Eligibility Index - columnar table of structured eligibility for every scheme.
+
+Built at ingestion time from the eligibility_criteria produced by
+parse_eligibility_criteria, one row per scheme:
+    age_min, age_max, income_max   float64 (NaN = not specified)
+    gender                         int8 code into GENDERS (-1 = any)
+    is_student, is_disabled        bool requirement flags
+    student_title                  bool, title looks education-specific
+    categories                     bool[n, len(CATEGORIES)]
+    states                         bool[n, len(state vocabulary)]
+
+match_profile() applies the rules of SchemeMatcher.check_eligibility_match
+to all schemes at once with NumPy, so the eligible set is exact rather than
+limited to whatever vector search returned.
+"""
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from backend.rag.scheme_matcher import SchemeMatcher
+
+
+GENDERS = ("female", "male")
+CATEGORIES = ("SC", "ST", "OBC", "General")
+
+
+def _category_code(category) -> int:
+    """Position of a category in CATEGORIES, case-insensitively (-1 if not listed there)."""
+    wanted = str(category or "").strip().upper()
+    return next((i for i, c in enumerate(CATEGORIES) if c.upper() == wanted), -1)
+
+
+def _number(value) -> float:
+    return float(value) if value else np.nan
+
+
+class EligibilityIndex:
+    """Per-scheme eligibility columns with a vectorised profile matcher."""
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.scheme_ids = columns["scheme_ids"]
+        self.titles = columns["titles"]
+        self.age_min = columns["age_min"]
+        self.age_max = columns["age_max"]
+        self.income_max = columns["income_max"]
+        self.gender = columns["gender"]
+        self.is_student = columns["is_student"]
+        self.is_disabled = columns["is_disabled"]
+        self.student_title = columns["student_title"]
+        self.categories = columns["categories"]
+        self.state_names = columns["state_names"]
+        self.states = columns["states"]
+
+    def __len__(self) -> int:
+        return len(self.scheme_ids)
+
+    @staticmethod
+    def path_for(persist_dir: str, collection_name: str) -> str:
+        """Index file stored next to the collection's FAISS index."""
+        return os.path.join(persist_dir, f"{collection_name}_eligibility.npz")
+
+    @classmethod
+    def build(cls, schemes: List[Dict]) -> "EligibilityIndex":
+        """Build from (normalized) schemes carrying eligibility_criteria."""
+        from backend.ingestion.chunker import make_scheme_id
+
+        n = len(schemes)
+        criteria = [s.get("eligibility_criteria") or {} for s in schemes]
+        titles = [s.get("title", "") for s in schemes]
+        state_names = sorted({state for c in criteria for state in (c.get("states") or [])})
+        state_codes = {state: i for i, state in enumerate(state_names)}
+
+        categories = np.zeros((n, len(CATEGORIES)), dtype=bool)
+        states = np.zeros((n, len(state_names)), dtype=bool)
+        for row, c in enumerate(criteria):
+            for category in c.get("categories") or []:
+                code = _category_code(category)
+                if code >= 0:
+                    categories[row, code] = True
+            for state in c.get("states") or []:
+                states[row, state_codes[state]] = True
+
+        return cls({
+            "scheme_ids": np.array([make_scheme_id(t) for t in titles], dtype=str),
+            "titles": np.array(titles, dtype=str),
+            "age_min": np.array([_number(c.get("age_min")) for c in criteria], dtype=np.float64),
+            "age_max": np.array([_number(c.get("age_max")) for c in criteria], dtype=np.float64),
+            "income_max": np.array([_number(c.get("income_max")) for c in criteria], dtype=np.float64),
+            "gender": np.array(
+                [GENDERS.index(c["gender"]) if c.get("gender") in GENDERS else -1 for c in criteria],
+                dtype=np.int8,
+            ),
+            "is_student": np.array([bool(c.get("is_student")) for c in criteria], dtype=bool),
+            "is_disabled": np.array([bool(c.get("is_disabled")) for c in criteria], dtype=bool),
+            "student_title": np.array(
+                [any(k in t.lower() for k in SchemeMatcher.STUDENT_KEYWORDS) for t in titles], dtype=bool
+            ),
+            "categories": categories,
+            "state_names": np.array(state_names, dtype=str),
+            "states": states,
+        })
+
+    def save(self, path: str):
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, **{name: value for name, value in vars(self).items()})
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "EligibilityIndex":
+        with np.load(path) as data:
+            return cls({name: data[name] for name in data.files})
+
+    def scores(self, user_profile: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (is_eligible, confidence) arrays over all schemes, using the same
+        scoring as SchemeMatcher.check_eligibility_match. Category and state
+        lists, which that method cannot see in chunk metadata, are checked too.
+        """
+        n = len(self)
+        matches = np.zeros(n, dtype=np.int16)
+        mismatches = np.zeros(n, dtype=np.int16)
+        confidence = np.full(n, 0.5)
+
+        def apply(hit: np.ndarray, miss: np.ndarray, bonus: float, penalty: float):
+            nonlocal matches, mismatches, confidence
+            matches += hit
+            mismatches += miss
+            confidence += bonus * hit - penalty * miss
+
+        # Age (a 0 bound counts as unspecified, like the per-document check)
+        age = user_profile.get("age")
+        if age:
+            bounded = (self.age_min > 0) & (self.age_max > 0)
+            inside = (self.age_min <= age) & (age <= self.age_max)
+            apply(bounded & inside, bounded & ~inside, 0.15, 0.2)
+
+        # Income
+        income = user_profile.get("annual_income") or user_profile.get("income")
+        if income:
+            limited = self.income_max > 0
+            apply(limited & (income <= self.income_max), limited & (income > self.income_max), 0.15, 0.25)
+
+        # Gender
+        user_gender = (user_profile.get("gender") or "").lower()
+        restricted = self.gender >= 0
+        same = self.gender == (GENDERS.index(user_gender) if user_gender in GENDERS else -2)
+        apply(restricted & same, restricted & ~same, 0.1, 0.3)
+
+        # Disability and student requirements
+        disabled = bool(user_profile.get("is_disabled"))
+        apply(self.is_disabled & disabled, self.is_disabled & (not disabled), 0.15, 0.3)
+        student = bool(user_profile.get("is_student"))
+        apply(self.is_student & student, self.is_student & (not student), 0.1, 0.2)
+        if not student:
+            apply(np.zeros(n, dtype=bool), self.student_title, 0.0, 0.4)
+
+        # Social category and state lists. Schemes never list categories
+        # outside CATEGORIES (EWS, ...), so those are neither matched nor penalised
+        code = _category_code(user_profile.get("category"))
+        if code >= 0:
+            listed = self.categories.any(axis=1)
+            hit = self.categories[:, code]
+            apply(listed & hit, listed & ~hit, 0.1, 0.2)
+        state = user_profile.get("state")
+        if state and len(self.state_names):
+            listed = self.states.any(axis=1)
+            codes = np.flatnonzero(self.state_names == state)
+            hit = self.states[:, codes[0]] if len(codes) else np.zeros(n, dtype=bool)
+            apply(listed & hit, listed & ~hit, 0.1, 0.3)
+
+        confidence = np.clip(confidence, 0.0, 1.0)
+        is_eligible = (mismatches == 0) | ((matches > mismatches) & (confidence > 0.4))
+        return is_eligible, confidence
+
+    def match_profile(self, user_profile: Dict, min_confidence: float = 0.3) -> List[Tuple[str, float]]:
+        """
+        (scheme_id, confidence) of every scheme the profile may qualify for,
+        best first. Keeps the same schemes SchemeMatcher.rank_schemes would.
+        """
+        is_eligible, confidence = self.scores(user_profile)
+        keep = np.flatnonzero(is_eligible | (confidence > min_confidence))
+        order = keep[np.argsort(-confidence[keep], kind="stable")]
+        return [(str(self.scheme_ids[i]), float(confidence[i])) for i in order]
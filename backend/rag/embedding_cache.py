@@ -0,0 +1,139 @@
+"""
+Embedding Cache - persistent, content-addressed cache of chunk embeddings.
+
+Embeddings are keyed by (model name, sha256 of the text) so unchanged chunks
+are never sent to the embeddings API twice. Each model gets its own folder:
+    vectors.f32   float32[rows, dim], memory-mapped, append-only
+    keys.txt      sha256 hex digest of row i on line i
+    meta.json     model name and dimension
+"""
+import hashlib
+import json
+import os
+import re
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from backend.config.settings import settings
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Append-only embedding cache backed by a memory-mapped float32 matrix."""
+
+    def __init__(self, model: str, cache_dir: str = None):
+        self.model = model
+        slug = re.sub(r"[^A-Za-z0-9._-]+", "_", model)
+        self.path = os.path.join(cache_dir or settings.EMBEDDING_CACHE_DIR, slug)
+        self.vectors_path = os.path.join(self.path, "vectors.f32")
+        self.keys_path = os.path.join(self.path, "keys.txt")
+        self.meta_path = os.path.join(self.path, "meta.json")
+        os.makedirs(self.path, exist_ok=True)
+
+        self.dim: Optional[int] = None
+        self._rows: Dict[str, int] = {}
+        self._keys_on_disk = 0
+        self._vectors = None
+        self.hits = 0
+        self.misses = 0
+        self._open()
+
+    def _open(self):
+        if not os.path.exists(self.meta_path):
+            return
+        with open(self.meta_path, "r") as f:
+            self.dim = json.load(f)["dim"]
+
+        keys = []
+        if os.path.exists(self.keys_path):
+            with open(self.keys_path, "r") as f:
+                keys = f.read().split()
+        # Vectors are appended before keys, so a torn write leaves extra
+        # vectors; only rows that have a key are trusted.
+        stored = os.path.getsize(self.vectors_path) // (4 * self.dim) if os.path.exists(self.vectors_path) else 0
+        rows = min(len(keys), stored)
+        self._keys_on_disk = len(keys)
+        self._rows = {key: row for row, key in enumerate(keys[:rows])}
+        self._vectors = (
+            np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(stored, self.dim))
+            if stored else None
+        )
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Cached embedding for each text, or None on a miss."""
+        results: List[Optional[List[float]]] = []
+        for text in texts:
+            row = self._rows.get(text_key(text))
+            if row is None:
+                self.misses += 1
+                results.append(None)
+            else:
+                self.hits += 1
+                results.append(self._vectors[row].tolist())
+        return results
+
+    def put_many(self, texts: Sequence[str], embeddings: Sequence[Sequence[float]]):
+        """Append embeddings for texts that are not cached yet."""
+        new_keys, new_vectors = {}, []
+        for text, vector in zip(texts, embeddings):
+            key = text_key(text)
+            if key not in self._rows and key not in new_keys:
+                new_keys[key] = len(new_vectors)
+                new_vectors.append(vector)
+        if not new_keys:
+            return
+
+        matrix = np.asarray(new_vectors, dtype=np.float32)
+        if self.dim is None:
+            self.dim = matrix.shape[1]
+            with open(self.meta_path, "w") as f:
+                json.dump({"model": self.model, "dim": self.dim}, f)
+        elif matrix.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match cache ({self.dim})")
+
+        # Drop any torn tail from an interrupted write before appending
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(len(self._rows) * 4 * self.dim)
+            f.write(matrix.tobytes())
+        if self._keys_on_disk != len(self._rows):
+            with open(self.keys_path, "w") as f:
+                f.write("".join(key + "\n" for key in self._rows))
+        with open(self.keys_path, "a") as f:
+            f.write("".join(key + "\n" for key in new_keys))
+        self._open()
+
+    def embed(self, texts: Sequence[str], embed_fn: Callable[[List[str]], List[List[float]]],
+              batch_size: int = 100) -> List[List[float]]:
+        """
+        Embed texts, calling embed_fn only for cache misses (deduplicated)
+        and storing the new vectors.
+        """
+        cached = self.get_many(texts)
+        missing = list(dict.fromkeys(t for t, v in zip(texts, cached) if v is None))
+
+        fresh: Dict[str, List[float]] = {}
+        for i in range(0, len(missing), batch_size):
+            batch = missing[i:i + batch_size]
+            batch_embeddings = embed_fn(batch)
+            self.put_many(batch, batch_embeddings)
+            fresh.update(zip(batch, batch_embeddings))
+            print(f"   Embedded {min(i + batch_size, len(missing))}/{len(missing)} uncached chunks")
+
+        return [v if v is not None else fresh[t] for t, v in zip(texts, cached)]
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "model": self.model,
+            "entries": len(self._rows),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -1,5 +1,19 @@
 from langchain_openai import OpenAIEmbeddings
+from openai import AsyncOpenAI, APIConnectionError, InternalServerError, RateLimitError
+from backend.config.settings import settings
+from typing import Callable, List, Optional
+import asyncio
+import logging
 import os
+import random
+
+logger = logging.getLogger(__name__)
+
+
+def embedding_key(model: str, dimensions: Optional[int] = None) -> str:
+    """Cache/index identity of an embedding space: model name plus requested width."""
+    return f"{model}@{dimensions}" if dimensions else model
+
 
 class EmbeddingGenerator:
     def __init__(self):
@@ -7,9 +21,13 @@ class EmbeddingGenerator:
         if not api_key:
             raise RuntimeError("OPENAI_API_KEY is not set")
 
+        self.model = settings.EMBEDDING_MODEL
+        self.dimensions = settings.EMBEDDING_DIMENSIONS or None
+        self.cache_key = embedding_key(self.model, self.dimensions)
         self.embeddings = OpenAIEmbeddings(
             openai_api_key=api_key,
-            model="text-embedding-3-small"
+            model=self.model,
+            dimensions=self.dimensions
         )
 
     # ✅ Used by ingestion
@@ -23,3 +41,171 @@ class EmbeddingGenerator:
     # ✅ Convenience for Chroma
     def get_embedding_function(self):
         return self.embeddings
+
+
+def token_counter(model: str) -> Callable[[str], int]:
+    """Token counter for the model; falls back to ~4 chars/token without tiktoken."""
+    try:
+        import tiktoken
+        encoding = tiktoken.encoding_for_model(model)
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    except Exception:
+        return lambda text: len(text) // 4 + 1
+
+
+def token_batches(texts: List[str], count_tokens: Callable[[str], int],
+                  max_tokens: int, max_items: int) -> List[List[int]]:
+    """Group text indices into batches bounded by total tokens and item count."""
+    batches, current, current_tokens = [], [], 0
+    for i, text in enumerate(texts):
+        tokens = count_tokens(text)
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+class _AdaptiveLimiter:
+    """
+    Concurrency limit that halves on rate limiting and grows back by one
+    after a full window of successful requests (AIMD).
+    """
+
+    def __init__(self, max_limit: int):
+        self.max_limit = max_limit
+        self.limit = max_limit
+        self.in_flight = 0
+        self._successes = 0
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def __aexit__(self, *exc):
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self):
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.max_limit:
+            self.limit += 1
+            self._successes = 0
+
+    def on_rate_limit(self):
+        self.limit = max(1, self.limit // 2)
+        self._successes = 0
+
+
+class AsyncEmbeddingPipeline:
+    """
+    Concurrent embedding client for bulk ingestion.
+
+    - Batches are sized by tokens rather than a fixed document count
+    - Up to `concurrency` batches are in flight at once
+    - 429 responses halve the concurrency and back off (honouring
+      Retry-After); successful requests grow it back
+    - Output order always matches input order
+
+    Point `base_url` (or OPENAI_BASE_URL) at
+    backend/scripts/fake_embeddings_server.py to exercise it locally.
+    """
+
+    def __init__(
+        self,
+        model: str = None,
+        api_key: str = None,
+        base_url: str = None,
+        concurrency: int = None,
+        max_batch_tokens: int = None,
+        max_batch_size: int = 2048,
+        max_retries: int = 8,
+        dimensions: int = None,
+    ):
+        self.model = model or settings.EMBEDDING_MODEL
+        # None = settings.EMBEDDING_DIMENSIONS, 0 = the model's native width
+        self.dimensions = (settings.EMBEDDING_DIMENSIONS if dimensions is None else dimensions) or None
+        self.cache_key = embedding_key(self.model, self.dimensions)
+        self.concurrency = concurrency or settings.EMBEDDING_CONCURRENCY
+        self.max_batch_tokens = max_batch_tokens or settings.EMBEDDING_BATCH_TOKENS
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.count_tokens = token_counter(self.model)
+        self.base_url = base_url or settings.OPENAI_BASE_URL or None
+        self.api_key = api_key or settings.OPENAI_API_KEY
+        if not self.api_key:
+            # A local fake server does not check keys
+            if not self.base_url:
+                raise RuntimeError("OPENAI_API_KEY is not set")
+            self.api_key = "unused"
+        self.rate_limited = 0
+
+    @staticmethod
+    def _retry_after(error) -> Optional[float]:
+        response = getattr(error, "response", None)
+        if response is None:
+            return None
+        try:
+            return float(response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            return None
+
+    async def _embed_batch(self, client, limiter: _AdaptiveLimiter, batch: List[str]) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            async with limiter:
+                try:
+                    extra = {"dimensions": self.dimensions} if self.dimensions else {}
+                    response = await client.embeddings.create(model=self.model, input=batch, **extra)
+                except RateLimitError as e:
+                    limiter.on_rate_limit()
+                    self.rate_limited += 1
+                    error, delay = e, self._retry_after(e)
+                except (APIConnectionError, InternalServerError) as e:
+                    error, delay = e, None
+                else:
+                    limiter.on_success()
+                    return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+            if attempt == self.max_retries:
+                raise error
+            if delay is None:
+                delay = min(60.0, 0.5 * 2 ** attempt) * (0.5 + random.random())
+            logger.warning(f"Embedding batch failed ({type(error).__name__}), retrying in {delay:.1f}s "
+                           f"with concurrency {limiter.limit}")
+            await asyncio.sleep(delay)
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts with up to `concurrency` batches in flight; order preserved."""
+        if not texts:
+            return []
+        batches = token_batches(texts, self.count_tokens, self.max_batch_tokens, self.max_batch_size)
+        limiter = _AdaptiveLimiter(self.concurrency)
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        done = 0
+
+        async def run(indices: List[int]):
+            nonlocal done
+            embeddings = await self._embed_batch(client, limiter, [texts[i] for i in indices])
+            for i, embedding in zip(indices, embeddings):
+                results[i] = embedding
+            done += len(indices)
+            print(f"   Processed {done}/{len(texts)} chunks")
+
+        # One client per call: its connection pool is bound to the running loop
+        async with AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            max_retries=0,  # retries are handled here, with adaptive backoff
+        ) as client:
+            await asyncio.gather(*(run(indices) for indices in batches))
+        return results
+
+    def embed_sync(self, texts: List[str]) -> List[List[float]]:
+        """Blocking wrapper around embed() for synchronous callers."""
+        return asyncio.run(self.embed(texts))
@@ -0,0 +1,58 @@
+"""
+Local Hashing Embedder - deterministic, offline stand-in for the embeddings API.
+
+Each token (see bm25.tokenize) gets a fixed pseudo-random Gaussian vector
+seeded by its hash; a text is the IDF-weighted, sublinear-TF sum of its token
+vectors, normalised. Texts sharing rare words end up close together, so
+nearest-neighbour structure resembles a real corpus closely enough for index
+benchmarks, with no network access or API key. Not for production retrieval.
+"""
+import hashlib
+import math
+from collections import Counter
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from backend.rag.bm25 import tokenize
+
+
+class HashingEmbedder:
+    """Same interface as EmbeddingGenerator (embed_texts / embed_query / cache_key)."""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self.cache_key = f"local-hashing@{dim}"
+        self._idf: Dict[str, float] = {}
+        self._default_idf = 1.0
+        self._token_vectors: Dict[str, np.ndarray] = {}
+
+    def fit(self, texts: Sequence[str]) -> "HashingEmbedder":
+        """Learn token IDF weights from a corpus (optional; unweighted otherwise)."""
+        df = Counter(token for text in texts for token in set(tokenize(text)))
+        n = max(len(texts), 1)
+        self._idf = {token: math.log(1.0 + n / count) for token, count in df.items()}
+        self._default_idf = math.log(1.0 + n)
+        return self
+
+    def _token_vector(self, token: str) -> np.ndarray:
+        vector = self._token_vectors.get(token)
+        if vector is None:
+            seed = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            vector = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+            self._token_vectors[token] = vector
+        return vector
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token, count in Counter(tokenize(text)).items():
+            weight = (1.0 + math.log(count)) * self._idf.get(token, self._default_idf)
+            vector += weight * self._token_vector(token)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed_texts(self, texts: Sequence[str]) -> List[List[float]]:
+        return [self.embed(text).tolist() for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed(text).tolist()
@@ -0,0 +1,47 @@
+"""
+Query Embedding Cache - bounded LRU + TTL cache for query embeddings.
+
+Sits in front of EmbeddingGenerator.embed_query so repeated queries (the
+fixed profile-search templates in particular) skip the embeddings API.
+An optional SQLite tier is shared by all workers on the host and survives
+restarts (see backend/tiered_cache.py).
+"""
+import hashlib
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from backend.tiered_cache import TieredCache
+
+
+class QueryEmbeddingCache(TieredCache):
+    """Query text -> embedding, keyed by model; vectors are stored as float32 blobs on disk."""
+
+    table = "query_embeddings"
+    value_column = "vector"
+    value_type = "BLOB"
+
+    def __init__(self, model: str, maxsize: int = 2048, ttl: float = 86400, db_path: str = None):
+        self.model = model
+        super().__init__(maxsize, ttl=ttl, db_path=db_path)
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{text.strip()}".encode("utf-8")).hexdigest()
+
+    def _encode(self, vector: List[float]) -> bytes:
+        return np.asarray(vector, dtype=np.float32).tobytes()
+
+    def _decode(self, stored: bytes) -> List[float]:
+        return np.frombuffer(stored, dtype=np.float32).tolist()
+
+    def get(self, text: str) -> Optional[List[float]]:
+        return self.get_keys([self._key(text)])[0]
+
+    def put(self, text: str, vector: List[float]):
+        self.put_many([text], [vector])
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[List[float]]):
+        self.put_keys([self._key(text) for text in texts], [list(vector) for vector in vectors])
+
+    def stats(self) -> Dict:
+        return {**super().stats(), "ttl_seconds": self.ttl}
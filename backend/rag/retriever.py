@@ -2,42 +2,193 @@
 Vector Store Retriever - FAISS-based retrieval for government schemes.
 """
 from backend.rag.embeddings import EmbeddingGenerator
-from backend.rag.vector_store import VectorStore
-from typing import List, Dict, Optional
+from backend.rag.sharded_store import open_vector_store
+from backend.rag.query_cache import QueryEmbeddingCache
+from backend.rag.eligibility_index import EligibilityIndex
+from backend.rag.bm25 import tokenize
+from backend.rag.snapshots import SnapshotWatcher, current_version, snapshot_dir
+from backend.config.settings import settings, VECTOR_DB_DIR
+from typing import Any, List, Dict, NamedTuple, Optional
+import os
+import threading
+import numpy as np
 from langchain_core.documents import Document
 
 
+# Fallback query used by search_by_profile when the profile queries find too little
+GENERAL_PROFILE_QUERY = "government scheme eligibility benefits"
+
+
+class RetrieverState(NamedTuple):
+    """Everything loaded from one store version; reload() swaps it as a unit."""
+    vectorstore: Any
+    eligibility_index: Optional[EligibilityIndex]
+    snapshot: Optional[str]
+
+
 class VectorStoreRetriever:
     """
     Retriever for searching government schemes in the FAISS vector store.
     Supports both general similarity search and profile-based filtering.
+
+    Reads the published store snapshot (see backend.rag.snapshots) when one
+    exists, else the working store. reload() loads a newer snapshot next to
+    the current one and swaps the reference, so in-flight queries finish on
+    the version they started with.
     """
     
     def __init__(self):
         self.embedder = EmbeddingGenerator()
-        self.vectorstore = VectorStore()
+        self._reload_lock = threading.Lock()
+        self._state = self._load_state()
+        self.query_cache = QueryEmbeddingCache(
+            model=self.embedder.cache_key,
+            maxsize=settings.QUERY_CACHE_SIZE,
+            ttl=settings.QUERY_CACHE_TTL_SECONDS,
+            db_path=settings.QUERY_CACHE_DB,
+        )
+        self.watcher = None
+        if settings.SNAPSHOT_POLL_SECONDS > 0:
+            self.watcher = SnapshotWatcher(VECTOR_DB_DIR, self.reload, interval=settings.SNAPSHOT_POLL_SECONDS)
+            self.watcher.start()
         print(" VectorStoreRetriever initialized")
 
-    def search(self, query: str, k: int = 4) -> List[Document]:
-        """Basic similarity search."""
-        # Get query embedding
-        query_embedding = self.embedder.embed_query(query)
-        
-        # Search vector store
-        results = self.vectorstore.search(query_embedding, k=k)
-        
-        # Convert to Document objects
+    @property
+    def vectorstore(self):
+        return self._state.vectorstore
+
+    @property
+    def eligibility_index(self) -> Optional[EligibilityIndex]:
+        return self._state.eligibility_index
+
+    @property
+    def snapshot(self) -> Optional[str]:
+        return self._state.snapshot
+
+    @staticmethod
+    def _load_state() -> RetrieverState:
+        version = current_version(VECTOR_DB_DIR)
+        persist_dir = snapshot_dir(VECTOR_DB_DIR, version)
+        if persist_dir is None:
+            version = None
+        else:
+            print(f"[INFO] Opening store snapshot {version}")
+        vectorstore = open_vector_store(persist_dir=persist_dir, read_only=settings.VECTOR_INDEX_MMAP)
+        return RetrieverState(vectorstore, VectorStoreRetriever._load_eligibility_index(vectorstore), version)
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Swap in the current snapshot if it is newer than the loaded one (or
+        always, with force). The new store is fully opened before the swap;
+        queries already running keep their reference to the old one.
+        """
+        with self._reload_lock:
+            if not force and current_version(VECTOR_DB_DIR) == self.snapshot:
+                return False
+            previous = self.snapshot
+            self._state = self._load_state()
+            print(f"[INFO] Retriever reloaded: snapshot {previous} -> {self.snapshot}")
+            return True
+
+    @staticmethod
+    def _load_eligibility_index(vectorstore) -> Optional[EligibilityIndex]:
+        path = EligibilityIndex.path_for(vectorstore.persist_dir, vectorstore.collection_name)
+        if not os.path.exists(path):
+            print("[WARN] No eligibility index found; profile search will rely on vector search only")
+            return None
+        try:
+            index = EligibilityIndex.load(path)
+            print(f"[INFO] Loaded eligibility index for {len(index)} schemes")
+            return index
+        except Exception as e:
+            print(f"[WARN] Could not load eligibility index: {e}")
+            return None
+
+    def eligible_schemes(self, user_profile: Dict) -> List[tuple]:
+        """(scheme_id, confidence) of every scheme the profile may qualify for, best first."""
+        if self.eligibility_index is None:
+            return []
+        return self.eligibility_index.match_profile(user_profile)
+
+    def embed_query(self, query: str) -> List[float]:
+        """Query embedding, served from the LRU/TTL cache when possible."""
+        embedding = self.query_cache.get(query)
+        if embedding is None:
+            embedding = self.embedder.embed_query(query)
+            self.query_cache.put(query, embedding)
+        return embedding
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embeddings for several queries; cache misses go out in one request."""
+        embeddings = [self.query_cache.get(q) for q in queries]
+        missing = list(dict.fromkeys(q for q, e in zip(queries, embeddings) if e is None))
+        if missing:
+            fresh = dict(zip(missing, self.embedder.embed_texts(missing)))
+            self.query_cache.put_many(missing, [fresh[q] for q in missing])
+            embeddings = [e if e is not None else fresh[q] for q, e in zip(queries, embeddings)]
+        return embeddings
+
+    @staticmethod
+    def _to_documents(results: List[Dict]) -> List[Document]:
+        """Convert vector store results to Document objects."""
         documents = []
         for result in results:
             # Add distance to metadata so it's preserved
             metadata = result['metadata'].copy()
-            metadata['distance'] = result['distance']
+            if 'distance' in result:
+                metadata['distance'] = result['distance']
             
             doc = Document(
                 page_content=result['content'],
                 metadata=metadata
             )
             documents.append(doc)
+        return documents
+
+    @staticmethod
+    def _doc_key(doc: Document):
+        """Deduplication key: stable chunk ID, or a content hash for older stores."""
+        return doc.metadata.get("chunk_id") or hash(doc.page_content[:200])
+
+    @staticmethod
+    def _scheme_key(metadata: Dict):
+        """Grouping key of a chunk: its scheme ID, else its title (older stores, PDFs)."""
+        return metadata.get("scheme_id") or metadata.get("title") or metadata.get("chunk_id")
+
+    def warm_query_cache(self, queries: Optional[List[str]] = None) -> int:
+        """
+        Pre-embed the fixed profile-search queries in one batched request.
+        Returns the number of queries that had to be embedded.
+        """
+        from backend.rag.scheme_matcher import SchemeMatcher
+
+        if queries is None:
+            queries = SchemeMatcher.profile_query_templates() + [GENERAL_PROFILE_QUERY]
+        missing = [q for q in queries if self.query_cache.get(q) is None]
+        if missing:
+            self.query_cache.put_many(missing, self.embedder.embed_texts(missing))
+        return len(missing)
+
+    def stats(self) -> Dict:
+        """Index and cache statistics for health/monitoring endpoints."""
+        return {
+            "snapshot": self.snapshot,
+            "documents": len(self.vectorstore),
+            "index": self.vectorstore.stats(),
+            "query_cache": self.query_cache.stats(),
+            "eligibility_schemes": len(self.eligibility_index) if self.eligibility_index is not None else 0,
+        }
+
+    def search(self, query: str, k: int = 4, filter: Optional[Dict] = None) -> List[Document]:
+        """Basic similarity search, optionally restricted by a metadata filter."""
+        # Get query embedding
+        query_embedding = self.embed_query(query)
+        
+        # Search vector store
+        results = self.vectorstore.search(query_embedding, k=k, filter=filter)
+        
+        # Convert to Document objects
+        documents = self._to_documents(results)
         
         # Log retrieved documents
         print(f"\n[RETRIEVER] Retrieved {len(documents)} documents for query: '{query}'")
@@ -51,23 +202,109 @@ class VectorStoreRetriever:
     def search_with_filter(self, query: str, filter_dict: Dict, k: int = 4) -> List[Document]:
         """
         Search with metadata filtering.
-        Note: FAISS doesn't support native filtering, so we filter post-search.
-        """
-        # Get more results than needed to allow for filtering
-        docs = self.search(query, k=k * 3)
-        
-        # Filter by metadata
-        filtered = []
-        for doc in docs:
-            match = True
-            for key, value in filter_dict.items():
-                if doc.metadata.get(key) != value:
-                    match = False
-                    break
-            if match:
-                filtered.append(doc)
-        
-        return filtered[:k]
+        The filter is applied inside the index (see VectorStore.search), so
+        this returns k documents whenever k matching documents exist.
+        """
+        return self.search(query, k=k, filter=filter_dict)
+    
+    def lookup_scheme(self, scheme_name: str, k: int = 10) -> List[Document]:
+        """
+        Every chunk of the scheme named scheme_name.
+
+        A title index match (exact, token or typo-tolerant) scoring at least
+        TITLE_MATCH_MIN_SCORE is returned directly, with no query embedding.
+        Otherwise the name goes through search_hybrid, keeping the hits whose
+        title contains the name or is contained in it (all k hits if none does).
+        """
+        match = self.vectorstore.lookup_title(scheme_name)
+        if match is not None and match["score"] >= settings.TITLE_MATCH_MIN_SCORE:
+            documents = self._to_documents(match["documents"])
+            print(f"\n[RETRIEVER] {match['match'].capitalize()} title match for '{scheme_name}': "
+                  f"{match['title']} ({len(documents)} chunks)")
+            return documents
+
+        if match is None:
+            print(f"\n[RETRIEVER] No scheme title matches '{scheme_name}', using hybrid search")
+        else:
+            print(f"\n[RETRIEVER] Title match '{match['title']}' for '{scheme_name}' scores "
+                  f"{match['score']:.2f}, below {settings.TITLE_MATCH_MIN_SCORE}; using hybrid search")
+        documents = self.search_hybrid(scheme_name, k=k)
+        name = scheme_name.lower()
+        matching = [
+            doc for doc in documents
+            if doc.metadata.get("title") and (
+                name in doc.metadata["title"].lower() or doc.metadata["title"].lower() in name
+            )
+        ]
+        return matching or documents
+    
+    @staticmethod
+    def _is_title_match(query: str, doc: Document) -> bool:
+        """True when every query keyword appears in the document's title."""
+        query_tokens = set(tokenize(query))
+        return bool(query_tokens) and query_tokens <= set(tokenize(doc.metadata.get("title", "")))
+    
+    def search_hybrid(self, query: str, k: int = 4, filter: Optional[Dict] = None) -> List[Document]:
+        """
+        Hybrid BM25 + vector search.
+        
+        If the best keyword hit's title contains every query keyword (an
+        exact scheme name such as "PM-KISAN"), the keyword results are
+        returned directly and the query is never embedded. Otherwise both
+        rankers contribute HYBRID_CANDIDATES results, fused either linearly
+        (HYBRID_ALPHA * cosine + (1 - HYBRID_ALPHA) * BM25, each scaled to
+        [0, 1]) or by reciprocal rank (HYBRID_FUSION = "rrf").
+        """
+        candidates = max(k, settings.HYBRID_CANDIDATES)
+        # Both rankers read the same store version even if a reload lands in between
+        vectorstore = self.vectorstore
+        keyword_results = vectorstore.keyword_search(query, k=candidates, filter=filter)
+        keyword_docs = self._to_documents(keyword_results)
+        for doc, result in zip(keyword_docs, keyword_results):
+            doc.metadata["bm25_score"] = result["bm25_score"]
+        
+        if keyword_docs and self._is_title_match(query, keyword_docs[0]):
+            docs = keyword_docs[:k]
+            print(f"\n[RETRIEVER] Keyword match for '{query}', skipped embedding ({len(docs)} documents)")
+            return docs
+        
+        vector_results = vectorstore.search(self.embed_query(query), k=candidates, filter=filter)
+        vector_docs = self._to_documents(vector_results)
+        for doc, result in zip(vector_docs, vector_results):
+            doc.metadata["vector_score"] = result["score"]
+        
+        fused: Dict = {}
+        if settings.HYBRID_FUSION == "rrf":
+            for ranking in (vector_docs, keyword_docs):
+                for rank, doc in enumerate(ranking):
+                    entry = fused.setdefault(self._doc_key(doc), [0.0, doc])
+                    entry[0] += 1.0 / (settings.RRF_K + rank + 1)
+        else:
+            alpha = settings.HYBRID_ALPHA
+            if vector_docs:
+                scores = [d.metadata["vector_score"] for d in vector_docs]
+                low, span = min(scores), max(scores) - min(scores)
+                for doc in vector_docs:
+                    entry = fused.setdefault(self._doc_key(doc), [0.0, doc])
+                    # A single hit (or all tied) is the best vector match: 1.0, not 0
+                    entry[0] += alpha * ((doc.metadata["vector_score"] - low) / span if span else 1.0)
+            if keyword_docs:
+                top = keyword_docs[0].metadata["bm25_score"]
+                for doc in keyword_docs:
+                    entry = fused.setdefault(self._doc_key(doc), [0.0, doc])
+                    entry[0] += (1.0 - alpha) * doc.metadata["bm25_score"] / top
+        
+        ranked = sorted(fused.values(), key=lambda entry: entry[0], reverse=True)[:k]
+        docs = []
+        for hybrid_score, doc in ranked:
+            doc.metadata["hybrid_score"] = hybrid_score
+            docs.append(doc)
+        
+        print(f"\n[RETRIEVER] Hybrid search returned {len(docs)} documents for query: '{query}'")
+        for i, doc in enumerate(docs):
+            scheme_name = doc.metadata.get('scheme_name') or doc.metadata.get('title') or 'Unknown'
+            print(f"   {i+1}. {scheme_name} (Hybrid: {doc.metadata['hybrid_score']:.4f})")
+        return docs
     
     def search_eligibility(self, query: str, k: int = 6) -> List[Document]:
         """
@@ -79,44 +316,170 @@ class VectorStoreRetriever:
             k=k
         )
     
-    def search_multi_query(self, queries: List[str], k_per_query: int = 2) -> List[Document]:
+    def search_multi_query(self, queries: List[str], k_per_query: int = 2,
+                           filter: Optional[Dict] = None) -> List[Document]:
         """
-        Search using multiple queries and deduplicate results.
+        Search using multiple queries and merge the results.
         Useful for profile-based search with multiple characteristics.
+        
+        All queries are embedded in one request and searched with a single
+        batched index scan; hits are deduplicated and ordered by
+        reciprocal-rank fusion (sum of 1 / (RRF_K + rank) over the queries).
         """
-        all_docs = []
-        seen_content = set()
+        if not queries:
+            return []
+        
+        embeddings = self.embed_queries(queries)
+        result_lists = self.vectorstore.search_batch(embeddings, k=k_per_query, filter=filter)
         
-        for query in queries:
-            docs = self.search(query, k=k_per_query)
-            for doc in docs:
-                # Deduplicate by content hash
-                content_hash = hash(doc.page_content[:200])
-                if content_hash not in seen_content:
-                    seen_content.add(content_hash)
-                    all_docs.append(doc)
+        fused: Dict = {}
+        for results in result_lists:
+            for rank, doc in enumerate(self._to_documents(results)):
+                key = self._doc_key(doc)
+                entry = fused.setdefault(key, [0.0, doc])
+                entry[0] += 1.0 / (settings.RRF_K + rank + 1)
         
-        return all_docs
+        ranked = sorted(fused.values(), key=lambda entry: entry[0], reverse=True)
+        docs = []
+        for rrf_score, doc in ranked:
+            doc.metadata["rrf_score"] = rrf_score
+            docs.append(doc)
+        
+        print(f"\n[RETRIEVER] Multi-query search: {len(queries)} queries -> {len(docs)} unique documents")
+        return docs
+    
+    @staticmethod
+    def _mmr(relevance: np.ndarray, vectors: np.ndarray, n: int, lambda_: float) -> List[int]:
+        """
+        Indices of n items picked by maximal marginal relevance: each step
+        takes the item maximising lambda_ * relevance - (1 - lambda_) *
+        (highest cosine similarity to an item already picked).
+        """
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        unit = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+        similarity = unit @ unit.T
+        relevance = relevance / (relevance.max() or 1.0)
+        picked = [int(np.argmax(relevance))]
+        closest = similarity[picked[0]].copy()
+        available = np.ones(len(relevance), dtype=bool)
+        available[picked[0]] = False
+        while len(picked) < min(n, len(relevance)):
+            marginal = lambda_ * relevance - (1.0 - lambda_) * closest
+            marginal[~available] = -np.inf
+            best = int(np.argmax(marginal))
+            picked.append(best)
+            available[best] = False
+            closest = np.maximum(closest, similarity[best])
+        return picked
+    
+    def search_schemes(self, queries: List[str], n: int = 5, filter: Optional[Dict] = None,
+                       chunks_per_scheme: int = 2, mmr_lambda: Optional[float] = None) -> List[Document]:
+        """
+        Top n distinct schemes for one or more queries, one Document each.
+        
+        Every query takes SCHEME_SEARCH_CANDIDATES chunks from a single
+        batched index scan; the hits are grouped by scheme with array ops: a
+        scheme scores the sum over queries of its best chunk's cosine score,
+        so schemes that match several profile aspects rank first. Each
+        returned Document holds the scheme's best chunk of each matched
+        chunk type (up to chunks_per_scheme, best first), with metadata
+        "scheme_score" and "matched_chunk_types".
+        
+        With mmr_lambda < 1 (default SCHEME_MMR_LAMBDA) schemes are picked by
+        MMR over their best chunks' vectors, trading relevance for variety.
+        """
+        if not queries:
+            return []
+        if mmr_lambda is None:
+            mmr_lambda = settings.SCHEME_MMR_LAMBDA
+        
+        vectorstore = self.vectorstore
+        result_lists = vectorstore.search_batch(
+            self.embed_queries(queries), k=max(n, settings.SCHEME_SEARCH_CANDIDATES), filter=filter
+        )
+        hits = [(q, result) for q, results in enumerate(result_lists) for result in results]
+        if not hits:
+            return []
+        
+        codes: Dict = {}
+        scheme_idx = np.fromiter(
+            (codes.setdefault(self._scheme_key(r["metadata"]), len(codes)) for _, r in hits),
+            dtype=np.int64, count=len(hits)
+        )
+        query_idx = np.fromiter((q for q, _ in hits), dtype=np.int64, count=len(hits))
+        scores = np.fromiter((r["score"] for _, r in hits), dtype=np.float32, count=len(hits))
+        
+        # Best chunk score of every scheme per query (0 where a query missed it)
+        best = np.zeros((len(queries), len(codes)), dtype=np.float32)
+        np.maximum.at(best, (query_idx, scheme_idx), scores)
+        relevance = best.sum(axis=0)
+        
+        # Hits best first: the first hit of a scheme is its best chunk
+        order = np.argsort(-scores, kind="stable")
+        top_hit = np.full(len(codes), -1, dtype=np.int64)
+        first = np.unique(scheme_idx[order], return_index=True)[1]
+        top_hit[scheme_idx[order[first]]] = order[first]
+        
+        if mmr_lambda < 1.0 and len(codes) > 1:
+            pool = np.argsort(-relevance, kind="stable")[:max(n * 4, n)]
+            vectors, _ = vectorstore.get_vectors([hits[i][1]["id"] for i in top_hit[pool]])
+            chosen = [int(pool[i]) for i in self._mmr(relevance[pool], vectors, n, mmr_lambda)]
+        else:
+            chosen = np.argsort(-relevance, kind="stable")[:n].tolist()
+        
+        chunks_by_type: Dict[int, Dict[str, Dict]] = {s: {} for s in chosen}
+        for i in order.tolist():
+            by_type = chunks_by_type.get(int(scheme_idx[i]))
+            if by_type is not None:
+                result = hits[i][1]
+                # A chunk hit by several queries keeps its best score
+                by_type.setdefault(result["metadata"].get("chunk_type", "general"), result)
+        
+        docs = []
+        for s in chosen:
+            results = list(chunks_by_type[s].values())
+            doc = self._to_documents(results[:1])[0]
+            doc.page_content = "\n\n".join(r["content"] for r in results[:max(chunks_per_scheme, 1)])
+            doc.metadata["scheme_score"] = float(relevance[s])
+            doc.metadata["matched_chunk_types"] = list(chunks_by_type[s])
+            docs.append(doc)
+        
+        print(f"\n[RETRIEVER] Scheme search: {len(queries)} queries, {len(hits)} chunk hits "
+              f"-> {len(codes)} schemes, returning {len(docs)}")
+        return docs
     
     def search_by_profile(self, user_profile: Dict, k: int = 8) -> List[Document]:
         """
         Search for schemes based on user profile characteristics.
-        Generates multiple queries based on profile and aggregates results.
+        Generates multiple queries based on profile and returns up to k
+        distinct schemes (see search_schemes), best first.
+        
+        When the eligibility index is available, the search is restricted to
+        the schemes it finds the profile eligible for, so semantic ranking
+        only orders schemes that already pass the structured criteria.
+        Chunks without a scheme_id (PDF documents) are not scheme-specific
+        and always stay searchable; a profile eligible for no scheme only
+        gets those.
         """
         from backend.rag.scheme_matcher import SchemeMatcher
         
         # Generate search queries from profile
         queries = SchemeMatcher.extract_search_queries(user_profile)
         
-        # Run multi-query search
-        docs = self.search_multi_query(queries, k_per_query=3)
+        filter_dict = None
+        if self.eligibility_index is not None:
+            eligible = self.eligible_schemes(user_profile)
+            # None matches chunks without the field
+            filter_dict = {"scheme_id": [scheme_id for scheme_id, _ in eligible] + [None]}
+        
+        docs = self.search_schemes(queries, n=k, filter=filter_dict)
         
-        # If not enough results, add a general search
+        # If not enough schemes, add those found by a general query
         if len(docs) < k:
-            general_docs = self.search("government scheme eligibility benefits", k=4)
-            for doc in general_docs:
-                content_hash = hash(doc.page_content[:200])
-                if content_hash not in {hash(d.page_content[:200]) for d in docs}:
+            seen = {self._scheme_key(doc.metadata) for doc in docs}
+            for doc in self.search_schemes([GENERAL_PROFILE_QUERY], n=k, filter=filter_dict):
+                if self._scheme_key(doc.metadata) not in seen:
+                    seen.add(self._scheme_key(doc.metadata))
                     docs.append(doc)
         
-        return docs[:k * 2]  # Return more docs for ranking later
+        return docs[:k]
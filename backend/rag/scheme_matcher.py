@@ -9,6 +9,48 @@ class SchemeMatcher:
     Mini-agent that matches user profiles against scheme eligibility criteria.
     """
     
+    # Fixed search queries generated from profile traits (see extract_search_queries)
+    BASE_QUERY = "eligibility criteria requirements"
+    CATEGORY_QUERIES = {
+        "sc": "scheduled caste SC eligibility schemes",
+        "st": "scheduled tribe ST eligibility schemes",
+        "obc": "other backward class OBC eligibility schemes",
+        "ews": "economically weaker section EWS eligibility",
+    }
+    FEMALE_QUERY = "women girl female eligibility schemes benefits"
+    AGE_QUERIES = {
+        "child": "child minor youth schemes",
+        "youth": "youth young adult schemes",
+        "adult": "adult working age schemes",
+        "senior": "senior citizen elderly pension schemes",
+    }
+    STUDENT_QUERY = "student scholarship education study eligibility"
+    DISABILITY_QUERY = "disability disabled divyang PwD handicapped eligibility"
+    MINORITY_QUERY = "minority community eligibility schemes"
+    OCCUPATION_QUERIES = {
+        "farmer": "farmer agriculture agricultural eligibility schemes",
+        "business": "business entrepreneur startup self employed schemes",
+        "unemployed": "unemployed job employment skill training schemes",
+        "student": "student scholarship education eligibility",
+    }
+    INCOME_QUERIES = {
+        "low": "low income below poverty BPL eligibility",
+        "lower_middle": "income limit 2 lakh 3 lakh eligibility",
+        "middle": "income limit 6 lakh eligibility middle",
+    }
+    
+    # Title words marking a scheme as education-specific
+    STUDENT_KEYWORDS = ["student", "scholarship", "college", "university", "matric", "school"]
+    
+    @classmethod
+    def profile_query_templates(cls) -> List[str]:
+        """Every fixed query extract_search_queries can produce (state queries excluded)."""
+        queries = [cls.BASE_QUERY, cls.FEMALE_QUERY, cls.STUDENT_QUERY,
+                   cls.DISABILITY_QUERY, cls.MINORITY_QUERY]
+        for group in (cls.CATEGORY_QUERIES, cls.AGE_QUERIES, cls.OCCUPATION_QUERIES, cls.INCOME_QUERIES):
+            queries.extend(group.values())
+        return list(dict.fromkeys(queries))
+    
     @staticmethod
     def extract_search_queries(user_profile: Dict) -> List[str]:
         """
@@ -18,70 +60,64 @@ class SchemeMatcher:
         queries = []
         
         # Base eligibility query
-        queries.append("eligibility criteria requirements")
+        queries.append(SchemeMatcher.BASE_QUERY)
         
         # Category-specific queries
         category = (user_profile.get("category") or "").lower()
-        if category == "sc":
-            queries.append("scheduled caste SC eligibility schemes")
-        elif category == "st":
-            queries.append("scheduled tribe ST eligibility schemes")
-        elif category == "obc":
-            queries.append("other backward class OBC eligibility schemes")
-        elif category == "ews":
-            queries.append("economically weaker section EWS eligibility")
+        if category in SchemeMatcher.CATEGORY_QUERIES:
+            queries.append(SchemeMatcher.CATEGORY_QUERIES[category])
         
         # Gender-specific queries
         gender = (user_profile.get("gender") or "").lower()
         if gender == "female":
-            queries.append("women girl female eligibility schemes benefits")
+            queries.append(SchemeMatcher.FEMALE_QUERY)
         
         # Age-specific queries
         age = user_profile.get("age")
         if age:
             if age < 18:
-                queries.append("child minor youth schemes")
+                queries.append(SchemeMatcher.AGE_QUERIES["child"])
             elif age < 30:
-                queries.append("youth young adult schemes")
+                queries.append(SchemeMatcher.AGE_QUERIES["youth"])
             elif age < 60:
-                queries.append("adult working age schemes")
+                queries.append(SchemeMatcher.AGE_QUERIES["adult"])
             else:
-                queries.append("senior citizen elderly pension schemes")
+                queries.append(SchemeMatcher.AGE_QUERIES["senior"])
         
         # Student queries
         if user_profile.get("is_student"):
-            queries.append("student scholarship education study eligibility")
+            queries.append(SchemeMatcher.STUDENT_QUERY)
         
         # Disability queries
         if user_profile.get("is_disabled"):
-            queries.append("disability disabled divyang PwD handicapped eligibility")
+            queries.append(SchemeMatcher.DISABILITY_QUERY)
         
         # Minority queries
         if user_profile.get("is_minority"):
-            queries.append("minority community eligibility schemes")
+            queries.append(SchemeMatcher.MINORITY_QUERY)
         
         # Employment/Occupation queries
         employment = user_profile.get("employment_status") or user_profile.get("occupation")
         if employment:
             emp_lower = str(employment).lower()
             if "farmer" in emp_lower or "agriculture" in emp_lower:
-                queries.append("farmer agriculture agricultural eligibility schemes")
+                queries.append(SchemeMatcher.OCCUPATION_QUERIES["farmer"])
             elif "business" in emp_lower or "entrepreneur" in emp_lower:
-                queries.append("business entrepreneur startup self employed schemes")
+                queries.append(SchemeMatcher.OCCUPATION_QUERIES["business"])
             elif "unemployed" in emp_lower:
-                queries.append("unemployed job employment skill training schemes")
+                queries.append(SchemeMatcher.OCCUPATION_QUERIES["unemployed"])
             elif "student" in emp_lower:
-                queries.append("student scholarship education eligibility")
+                queries.append(SchemeMatcher.OCCUPATION_QUERIES["student"])
         
         # Income-based queries
         annual_income = user_profile.get("annual_income") or user_profile.get("income")
         if annual_income:
             if annual_income < 100000:
-                queries.append("low income below poverty BPL eligibility")
+                queries.append(SchemeMatcher.INCOME_QUERIES["low"])
             elif annual_income < 300000:
-                queries.append("income limit 2 lakh 3 lakh eligibility")
+                queries.append(SchemeMatcher.INCOME_QUERIES["lower_middle"])
             elif annual_income < 600000:
-                queries.append("income limit 6 lakh eligibility middle")
+                queries.append(SchemeMatcher.INCOME_QUERIES["middle"])
         
         # State-specific queries
         state = user_profile.get("state")
@@ -164,8 +200,7 @@ class SchemeMatcher:
         
         # Heuristic: Check title for student keywords if metadata is missing
         title = scheme_metadata.get("title", "").lower()
-        student_keywords = ["student", "scholarship", "college", "university", "matric", "school"]
-        if not user_student and any(k in title for k in student_keywords):
+        if not user_student and any(k in title for k in SchemeMatcher.STUDENT_KEYWORDS):
             mismatches.append("Scheme appears to be for students/education")
             confidence -= 0.4
         
@@ -0,0 +1,335 @@
+"""
+Sharded Vector Store - one VectorStore per category (and optionally level/state).
+
+With VECTOR_SHARD_BY set (e.g. "category" or "category,level"), chunks are
+routed by those metadata fields to named shards, each a complete VectorStore
+(FAISS index, document store, BM25 and title indexes) under
+
+    <persist_dir>/<collection>_shards/<shard>.*
+    <persist_dir>/<collection>_shards.json      shard name -> field values
+
+Searches fan out to the shards in parallel and merge by score. A filter on
+a shard field (e.g. {"category": "Health"}) only touches the matching
+shards, so restricted queries scan a fraction of the corpus, and a single
+shard can be rebuilt without touching the others.
+
+open_vector_store() returns a ShardedVectorStore or a plain VectorStore
+depending on the setting; both expose the same interface.
+"""
+import json
+import os
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from backend.config.settings import settings, VECTOR_DB_DIR
+from backend.rag.vector_store import (
+    VectorStore, chunk_id_to_int, document_id, resident_memory_bytes, shared_memory_bytes
+)
+
+
+def parse_shard_by(value: Union[str, Iterable[str], None]) -> List[str]:
+    """Metadata fields from a "category,level" style setting."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [field.strip() for field in value if field.strip()]
+
+
+def shard_name(values: Iterable[Any]) -> str:
+    """File-safe shard name for a tuple of field values, e.g. "health__state"."""
+    parts = [re.sub(r"[^a-z0-9]+", "_", str(v or "unknown").lower()).strip("_") or "unknown" for v in values]
+    return "__".join(parts)
+
+
+def open_vector_store(collection_name: str = "government_schemes", persist_dir: str = None,
+                      check_embeddings: bool = True, read_only: bool = False):
+    """The configured store: sharded when VECTOR_SHARD_BY is set, else a single VectorStore."""
+    if parse_shard_by(settings.VECTOR_SHARD_BY):
+        return ShardedVectorStore(collection_name, persist_dir=persist_dir,
+                                  check_embeddings=check_embeddings, read_only=read_only)
+    return VectorStore(collection_name, persist_dir=persist_dir,
+                       check_embeddings=check_embeddings, read_only=read_only)
+
+
+class ShardedVectorStore:
+    """
+    Named VectorStore shards keyed by metadata fields, searched in parallel.
+
+    Mirrors the VectorStore interface (upsert/delete/save/clear/search/
+    search_batch/keyword_search/lookup_title/stats), plus a shards argument
+    on the search methods and rebuild_shard() for single-shard rebuilds.
+    """
+
+    def __init__(self, collection_name="government_schemes", shard_by: Union[str, List[str]] = None,
+                 persist_dir: str = None, check_embeddings: bool = True, read_only: bool = False):
+        self.collection_name = collection_name
+        self.persist_dir = persist_dir or VECTOR_DB_DIR
+        self.shards_dir = os.path.join(self.persist_dir, f"{collection_name}_shards")
+        self.layout_path = os.path.join(self.persist_dir, f"{collection_name}_shards.json")
+        self.check_embeddings = check_embeddings
+        self.read_only = read_only
+        self.shard_by = parse_shard_by(shard_by if shard_by is not None else settings.VECTOR_SHARD_BY)
+        if not self.shard_by:
+            raise ValueError("ShardedVectorStore needs at least one shard field (VECTOR_SHARD_BY)")
+
+        os.makedirs(self.persist_dir, exist_ok=True)
+
+        # shard name -> {field: value}, and the open stores
+        self.layout: Dict[str, Dict[str, Any]] = {}
+        self.shards: Dict[str, VectorStore] = {}
+        self._dirty = set()
+        self._executor = None
+
+        if os.path.exists(self.layout_path):
+            with open(self.layout_path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            if stored.get("shard_by") != self.shard_by:
+                # Left on disk until clear(); ingestion sees an empty store and rebuilds
+                print(f"[WARN] Shards were built by {stored.get('shard_by')}, not {self.shard_by}; "
+                      "re-run ingestion to rebuild them")
+            else:
+                self.layout = stored.get("shards", {})
+                for name in self.layout:
+                    self.shards[name] = self._open_shard(name)
+                print(f"[INFO] Loaded {len(self.shards)} shards ({', '.join(self.shard_by)}) "
+                      f"with {len(self)} documents")
+
+    def _open_shard(self, name: str) -> VectorStore:
+        return VectorStore(collection_name=name, persist_dir=self.shards_dir,
+                           check_embeddings=self.check_embeddings, read_only=self.read_only)
+
+    def _shard_for(self, metadata: Dict[str, Any]) -> str:
+        values = [metadata.get(field) for field in self.shard_by]
+        name = shard_name(values)
+        if name not in self.shards:
+            self.layout[name] = dict(zip(self.shard_by, values))
+            self.shards[name] = self._open_shard(name)
+        return name
+
+    def _save_layout(self):
+        tmp_path = self.layout_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"shard_by": self.shard_by, "shards": self.layout}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.layout_path)
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def clear(self):
+        """Remove every shard and the shard layout."""
+        if self.read_only:
+            raise RuntimeError(f"Vector store '{self.collection_name}' was opened read-only")
+        self.shards = {}
+        self.layout = {}
+        self._dirty = set()
+        if os.path.exists(self.shards_dir):
+            shutil.rmtree(self.shards_dir)
+        if os.path.exists(self.layout_path):
+            os.remove(self.layout_path)
+        print("[INFO] Cleared existing vector store shards")
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self.shards.values())
+
+    def __contains__(self, chunk_id) -> bool:
+        label = chunk_id_to_int(chunk_id)
+        return any(label in shard for shard in self.shards.values())
+
+    def items(self) -> Iterator[Tuple[int, str, Dict]]:
+        """(label, text, metadata) of every chunk, shard by shard."""
+        for shard in self.shards.values():
+            yield from shard.items()
+
+    def get_vectors(self, ids: Iterable[Union[str, int]]) -> Tuple[np.ndarray, np.ndarray]:
+        """(vectors, found) for chunk IDs, read from the shards holding them (see VectorStore.get_vectors)."""
+        labels = [chunk_id_to_int(i) for i in ids]
+        vectors = None
+        found = np.zeros(len(labels), dtype=bool)
+        for shard in self.shards.values():
+            rows = np.array([i for i, label in enumerate(labels) if not found[i] and label in shard], dtype=np.int64)
+            if len(rows) == 0:
+                continue
+            shard_vectors, shard_found = shard.get_vectors([labels[i] for i in rows])
+            if vectors is None:
+                vectors = np.zeros((len(labels), shard_vectors.shape[1]), dtype=np.float32)
+            vectors[rows[shard_found]] = shard_vectors[shard_found]
+            found[rows[shard_found]] = True
+        if vectors is None:
+            vectors = np.zeros((len(labels), 0), dtype=np.float32)
+        return vectors, found
+
+    def add_documents(self, documents: List, embeddings: List, clear_existing: bool = True):
+        """Add documents with embeddings, routing each to its shard (see VectorStore.add_documents)."""
+        if clear_existing:
+            self.clear()
+        ids = [document_id(doc) for doc in documents]
+        self.upsert(ids, documents, embeddings)
+        print(f"[INFO] Added {len(documents)} documents to {len(self.shards)} shards")
+
+    def upsert(self, ids: List[Union[str, int]], docs: List, embeddings: List, save: bool = True):
+        """Insert or replace chunks by ID; a chunk whose shard fields changed moves shard."""
+        if not ids:
+            return
+        if not (len(ids) == len(docs) == len(embeddings)):
+            raise ValueError("ids, docs and embeddings must have the same length")
+
+        groups: Dict[str, List[int]] = {}
+        for i, doc in enumerate(docs):
+            groups.setdefault(self._shard_for(doc.metadata), []).append(i)
+
+        for name, positions in groups.items():
+            # Drop copies left in other shards by an earlier category/level
+            moved = [ids[i] for i in positions]
+            for other_name, other in self.shards.items():
+                if other_name != name and other.delete(moved, save=False):
+                    self._dirty.add(other_name)
+            self.shards[name].upsert(
+                [ids[i] for i in positions], [docs[i] for i in positions],
+                [embeddings[i] for i in positions], save=False
+            )
+            self._dirty.add(name)
+
+        if save:
+            self.save()
+
+    def put_documents(self, ids: List[Union[str, int]], docs: List, save: bool = True):
+        """Store chunks without a vector in their shards (see VectorStore.put_documents)."""
+        groups: Dict[str, List[int]] = {}
+        for i, doc in enumerate(docs):
+            groups.setdefault(self._shard_for(doc.metadata), []).append(i)
+        for name, positions in groups.items():
+            moved = [ids[i] for i in positions]
+            for other_name, other in self.shards.items():
+                if other_name != name and other.delete(moved, save=False):
+                    self._dirty.add(other_name)
+            self.shards[name].put_documents(moved, [docs[i] for i in positions], save=False)
+            self._dirty.add(name)
+        if save:
+            self.save()
+
+    def delete(self, ids: Iterable[Union[str, int]], save: bool = True) -> int:
+        """Delete chunks by ID from whichever shards hold them."""
+        ids = list(ids)
+        removed = 0
+        for name, shard in self.shards.items():
+            count = shard.delete(ids, save=False)
+            if count:
+                removed += count
+                self._dirty.add(name)
+        if save:
+            self.save()
+        return removed
+
+    def save(self):
+        """Persist the shards changed since the last save, then the layout."""
+        for name in sorted(self._dirty):
+            self.shards[name].save()
+        self._dirty = set()
+        self._save_layout()
+
+    def rebuild_shard(self, name: str, ids: List[Union[str, int]], docs: List, embeddings: List):
+        """Replace one shard's contents, leaving every other shard untouched."""
+        if name not in self.shards:
+            raise KeyError(f"Unknown shard '{name}'")
+        self.shards[name].clear()
+        self.upsert(ids, docs, embeddings)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def shards_for(self, filter: Optional[Dict[str, Any]] = None,
+                   shards: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Shards a search has to visit: the named ones (if given) that are not
+        excluded by the filter's values for shard fields.
+        """
+        names = [n for n in shards if n in self.shards] if shards is not None else list(self.shards)
+        for field in self.shard_by:
+            if not filter or field not in filter:
+                continue
+            wanted = filter[field] if isinstance(filter[field], (list, tuple, set)) else [filter[field]]
+            wanted = {shard_name([v]) for v in wanted}
+            position = self.shard_by.index(field)
+            names = [n for n in names if n.split("__")[position] in wanted]
+        return [n for n in names if len(self.shards[n])]
+
+    def _fan_out(self, names: List[str], call) -> List[Any]:
+        """call(shard) on every named shard, in parallel when there are several."""
+        if len(names) <= 1 or settings.VECTOR_SHARD_WORKERS <= 1:
+            return [call(self.shards[name]) for name in names]
+        if self._executor is None:
+            # FAISS releases the GIL while searching, so shards run concurrently
+            self._executor = ThreadPoolExecutor(max_workers=settings.VECTOR_SHARD_WORKERS,
+                                                thread_name_prefix="shard-search")
+        return list(self._executor.map(lambda name: call(self.shards[name]), names))
+
+    def search(self, query_embedding: List[float], k: int = 4, filter: Optional[Dict[str, Any]] = None,
+               shards: Optional[Iterable[str]] = None) -> List[Dict]:
+        """Search the relevant shards (see shards_for) and merge by score."""
+        return self.search_batch([query_embedding], k=k, filter=filter, shards=shards)[0]
+
+    def search_batch(self, query_embeddings: List[List[float]], k: int = 4,
+                     filter: Optional[Dict[str, Any]] = None,
+                     shards: Optional[Iterable[str]] = None) -> List[List[Dict]]:
+        """
+        Batched search: every shard answers all queries at once, then each
+        query keeps the k best results across shards by cosine 'score'.
+        """
+        names = self.shards_for(filter, shards)
+        per_shard = self._fan_out(names, lambda shard: shard.search_batch(query_embeddings, k=k, filter=filter))
+        merged = []
+        for i in range(len(query_embeddings)):
+            hits = [hit for results in per_shard for hit in results[i]]
+            merged.append(sorted(hits, key=lambda hit: hit["score"], reverse=True)[:k])
+        return merged
+
+    def keyword_search(self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None,
+                       shards: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        BM25 search over the relevant shards, merged by bm25_score. Each
+        shard has its own IDF statistics, so scores across shards are close
+        but not identical to those of a single index.
+        """
+        names = self.shards_for(filter, shards)
+        per_shard = self._fan_out(names, lambda shard: shard.keyword_search(query, k=k, filter=filter))
+        hits = [hit for results in per_shard for hit in results]
+        return sorted(hits, key=lambda hit: hit["bm25_score"], reverse=True)[:k]
+
+    def lookup_title(self, name: str, shards: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        """Best title match across shards; exact matches win, then the higher score."""
+        names = self.shards_for(None, shards)
+        matches = [m for m in self._fan_out(names, lambda shard: shard.lookup_title(name)) if m]
+        if not matches:
+            return None
+        return max(matches, key=lambda m: (m["match"] == "exact", m["score"]))
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-shard index descriptions plus totals."""
+        shard_stats = {}
+        for name, shard in self.shards.items():
+            stats = shard.stats()
+            for key in ("rss_bytes", "shared_bytes", "mmap"):
+                stats.pop(key, None)
+            shard_stats[name] = stats
+        index_bytes = sum(s["index_bytes"] for s in shard_stats.values())
+        documents = sum(s["documents"] for s in shard_stats.values())
+        # Chunks stored without a vector (duplicates) have no index entry
+        vectors = sum(int(shard.index.ntotal) for shard in self.shards.values() if shard.index is not None)
+        return {
+            "shard_by": self.shard_by,
+            "shards": shard_stats,
+            "documents": documents,
+            "index_bytes": index_bytes,
+            "bytes_per_vector": round(index_bytes / vectors, 1) if vectors else 0,
+            "exact_vectors_bytes": sum(s["exact_vectors_bytes"] for s in shard_stats.values()),
+            "rss_bytes": resident_memory_bytes(),
+            "shared_bytes": shared_memory_bytes(),
+            "mmap": self.read_only,
+        }
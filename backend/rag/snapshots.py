@@ -0,0 +1,149 @@
+"""
+Versioned Store Snapshots - publish a finished store, let readers swap to it.
+
+Ingestion updates the working store files in VECTOR_DB_DIR, then publishes
+them as an immutable snapshot:
+
+    <persist_dir>/snapshots/<version>/<collection>*   complete copy of the store
+    <persist_dir>/snapshots/CURRENT                   name of the live version
+
+A snapshot is assembled in a temporary directory and renamed into place, and
+CURRENT is replaced atomically afterwards, so a reader never sees a
+half-written index/document pair. Files are hard-linked from the working
+store where possible (the store replaces files rather than rewriting them);
+append-only vector files are copied.
+
+Readers (VectorStoreRetriever) open the CURRENT snapshot and reload when it
+changes, either from a SnapshotWatcher thread or an explicit reload() call.
+"""
+import glob
+import os
+import shutil
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+
+SNAPSHOTS_DIR = "snapshots"
+CURRENT_FILE = "CURRENT"
+
+# Rewritten in place by the working store, so never hard-linked
+COPIED_SUFFIXES = (".f32",)
+
+
+def snapshots_root(persist_dir: str) -> str:
+    return os.path.join(persist_dir, SNAPSHOTS_DIR)
+
+
+def current_version(persist_dir: str) -> Optional[str]:
+    """Name of the published snapshot, or None if nothing was published yet."""
+    try:
+        with open(os.path.join(snapshots_root(persist_dir), CURRENT_FILE), "r") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def snapshot_dir(persist_dir: str, version: Optional[str] = None) -> Optional[str]:
+    """Directory of a snapshot (default: the current one), None if there is none."""
+    version = version or current_version(persist_dir)
+    if version is None:
+        return None
+    path = os.path.join(snapshots_root(persist_dir), version)
+    return path if os.path.isdir(path) else None
+
+
+def is_snapshot_dir(path: str) -> bool:
+    """True for a published (or in-progress) snapshot directory, whose files must not be modified."""
+    return os.path.basename(os.path.dirname(os.path.abspath(path))) == SNAPSHOTS_DIR
+
+
+def _link_or_copy(src: str, dst: str):
+    if src.endswith(COPIED_SUFFIXES):
+        shutil.copy2(src, dst)
+        return
+    try:
+        os.link(src, dst)
+    except OSError:
+        # Different filesystem or no hard-link support
+        shutil.copy2(src, dst)
+
+
+def publish_snapshot(persist_dir: str, collection_name: str, keep: int = 3) -> str:
+    """
+    Publish the working store files of a collection as a new snapshot,
+    point CURRENT at it and prune all but the newest `keep` snapshots.
+    Returns the new version name.
+    """
+    root = snapshots_root(persist_dir)
+    os.makedirs(root, exist_ok=True)
+    version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    tmp_dir = os.path.join(root, f".tmp-{version}")
+
+    os.makedirs(tmp_dir)
+    try:
+        for src in glob.glob(os.path.join(persist_dir, f"{collection_name}*")):
+            name = os.path.basename(src)
+            # Leftovers of interrupted writes are not part of the store
+            if name.endswith((".tmp", ".old")) or ".tmp." in name:
+                continue
+            dst = os.path.join(tmp_dir, name)
+            if os.path.isdir(src):
+                shutil.copytree(src, dst, copy_function=_link_or_copy)
+            else:
+                _link_or_copy(src, dst)
+        os.rename(tmp_dir, os.path.join(root, version))
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    current_tmp = os.path.join(root, CURRENT_FILE + ".tmp")
+    with open(current_tmp, "w") as f:
+        f.write(version)
+    os.replace(current_tmp, os.path.join(root, CURRENT_FILE))
+
+    prune_snapshots(persist_dir, keep)
+    return version
+
+
+def prune_snapshots(persist_dir: str, keep: int = 3):
+    """
+    Delete old snapshots, never the current one. Processes still reading a
+    deleted snapshot keep working: its files stay valid while mapped/open.
+    """
+    root = snapshots_root(persist_dir)
+    current = current_version(persist_dir)
+    versions = sorted(
+        name for name in os.listdir(root)
+        if not name.startswith(".") and name != CURRENT_FILE and os.path.isdir(os.path.join(root, name))
+    )
+    for name in versions[:-max(keep, 1)]:
+        if name != current:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+class SnapshotWatcher(threading.Thread):
+    """Daemon thread calling on_change() whenever CURRENT points to a new version."""
+
+    def __init__(self, persist_dir: str, on_change: Callable[[], object], interval: float = 5.0):
+        super().__init__(name="snapshot-watcher", daemon=True)
+        self.persist_dir = persist_dir
+        self.on_change = on_change
+        self.interval = interval
+        self._version = current_version(persist_dir)
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            version = current_version(self.persist_dir)
+            if version is None or version == self._version:
+                continue
+            try:
+                self.on_change()
+                self._version = version
+            except Exception as e:
+                # Retried on the next tick; the old snapshot keeps serving
+                print(f"[WARN] Could not load snapshot {version}: {e}")
+
+    def stop(self):
+        self._stop_event.set()
@@ -0,0 +1,212 @@
+"""
+Scheme Title Index - maps scheme names, typed loosely, to all of a scheme's chunks.
+
+Lookup tries, in order:
+1. Exact match on the compacted name (lowercase alphanumerics only, so
+   "PM-KISAN", "pm kisan" and "PMKisan" are the same key)
+2. A token inverted index, with query tokens that are not in the
+   vocabulary corrected to vocabulary tokens within a small edit distance
+3. Bounded edit distance between the compacted query and the compacted
+   titles of the token candidates
+
+Stored as {collection}_titles.json next to the FAISS index and updated by
+VectorStore on save; the inverted index is rebuilt in memory on load.
+"""
+import json
+import math
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from backend.rag.bm25 import tokenize
+
+
+# Query tokens must cover this share (by IDF weight) of the matched title...
+MIN_QUERY_COVERAGE = 0.8
+# ...and the title this share of the query, for a token match to count
+MIN_TITLE_COVERAGE = 0.5
+
+
+def compact_name(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "", name.lower())
+
+
+def max_edits(text: str) -> int:
+    """Edit budget for a token or name of this length."""
+    if len(text) <= 3:
+        return 0
+    if len(text) <= 7:
+        return 1
+    return max(2, len(text) // 10)
+
+
+def bounded_levenshtein(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, or limit + 1 as soon as it must exceed limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if len(a) > len(b):
+        a, b = b, a
+    previous = list(range(len(a) + 1))
+    for j, cb in enumerate(b, 1):
+        current = [j] + [0] * len(a)
+        for i, ca in enumerate(a, 1):
+            current[i] = min(previous[i] + 1, current[i - 1] + 1, previous[i - 1] + (ca != cb))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1] if previous[-1] <= limit else limit + 1
+
+
+class TitleIndex:
+    """Scheme title -> chunk labels, with exact, token and fuzzy lookup."""
+
+    def __init__(self, titles: List[str], scheme_ids: List[Optional[str]], labels: List[List[int]]):
+        self.titles = titles
+        self.scheme_ids = scheme_ids
+        self.labels = labels
+        self._by_key: Dict[str, int] = {}
+        self._postings: Dict[str, List[int]] = {}
+        title_tokens = [set(tokenize(title)) for title in titles]
+        for row, title in enumerate(titles):
+            self._by_key.setdefault(compact_name(title), row)
+            for token in title_tokens[row]:
+                self._postings.setdefault(token, []).append(row)
+        self._idf = {
+            token: math.log(1.0 + len(titles) / len(rows)) for token, rows in self._postings.items()
+        }
+        self._title_weight = [sum(self._idf[t] for t in tokens) for tokens in title_tokens]
+        # Vocabulary by (length, first letter) and (length, last letter):
+        # typo correction only compares tokens whose length is within the
+        # edit budget and that share the query token's first or last letter
+        self._by_head: Dict[Tuple[int, str], List[str]] = {}
+        self._by_tail: Dict[Tuple[int, str], List[str]] = {}
+        for token in self._postings:
+            self._by_head.setdefault((len(token), token[0]), []).append(token)
+            self._by_tail.setdefault((len(token), token[-1]), []).append(token)
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    @staticmethod
+    def path_for(persist_dir: str, collection_name: str) -> str:
+        """Index file stored next to the collection's FAISS index."""
+        return os.path.join(persist_dir, f"{collection_name}_titles.json")
+
+    @classmethod
+    def build(cls, records: Iterable[Tuple[int, str, Dict]]) -> "TitleIndex":
+        """Build from (label, text, metadata) records, e.g. DocumentStore.items()."""
+        return cls._with_records([], [], [], records)
+
+    def updated(self, labels: Iterable[int], records: Iterable[Tuple[int, str, Dict]]) -> "TitleIndex":
+        """This index with the chunks of labels removed and records added."""
+        removed = set(labels)
+        titles, scheme_ids, kept = [], [], []
+        for title, scheme_id, row_labels in zip(self.titles, self.scheme_ids, self.labels):
+            row_labels = [label for label in row_labels if label not in removed]
+            if row_labels:
+                titles.append(title)
+                scheme_ids.append(scheme_id)
+                kept.append(row_labels)
+        return self._with_records(titles, scheme_ids, kept, records)
+
+    @classmethod
+    def _with_records(cls, titles: List[str], scheme_ids: List[Optional[str]], labels: List[List[int]],
+                      records: Iterable[Tuple[int, str, Dict]]) -> "TitleIndex":
+        rows: Dict[str, int] = {title: row for row, title in enumerate(titles)}
+        for label, _, metadata in records:
+            title = metadata.get("title")
+            if not title:
+                continue
+            if title not in rows:
+                rows[title] = len(titles)
+                titles.append(title)
+                scheme_ids.append(metadata.get("scheme_id"))
+                labels.append([])
+            labels[rows[title]].append(int(label))
+        return cls(titles, scheme_ids, labels)
+
+    def save(self, path: str):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"titles": self.titles, "scheme_ids": self.scheme_ids, "labels": self.labels},
+                f, ensure_ascii=False
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "TitleIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["titles"], data["scheme_ids"], data["labels"])
+
+    def _correct(self, token: str) -> Optional[str]:
+        """
+        Closest vocabulary token within the edit budget, if any. Candidates
+        must keep the first or the last letter, which every single-edit typo
+        does; typos changing both ends of a long token are not corrected.
+        """
+        if token in self._postings:
+            return token
+        limit = max_edits(token)
+        best, best_distance = None, limit + 1
+        for length in range(len(token) - limit, len(token) + limit + 1):
+            candidates = dict.fromkeys(
+                self._by_head.get((length, token[0]), []) + self._by_tail.get((length, token[-1]), [])
+            )
+            for candidate in candidates:
+                distance = bounded_levenshtein(token, candidate, best_distance - 1)
+                if distance < best_distance:
+                    best, best_distance = candidate, distance
+        return best
+
+    def _result(self, row: int, match: str, score: float) -> Dict:
+        return {
+            "title": self.titles[row],
+            "scheme_id": self.scheme_ids[row],
+            "labels": self.labels[row],
+            "match": match,
+            "score": score,
+        }
+
+    def lookup(self, name: str) -> Optional[Dict]:
+        """
+        Best matching scheme for a name, as a dict with its title, scheme_id,
+        chunk labels, match kind ("exact", "tokens" or "fuzzy") and score in
+        [0, 1]; None if nothing is close enough.
+        """
+        key = compact_name(name)
+        if not key:
+            return None
+        if key in self._by_key:
+            return self._result(self._by_key[key], "exact", 1.0)
+
+        query_tokens = {t for t in (self._correct(t) for t in tokenize(name)) if t}
+        if not query_tokens:
+            return None
+
+        # Candidate titles sharing a token, scored by IDF-weighted overlap
+        overlap: Dict[int, float] = {}
+        for token in query_tokens:
+            for row in self._postings[token]:
+                overlap[row] = overlap.get(row, 0.0) + self._idf[token]
+        query_weight = sum(self._idf[t] for t in query_tokens)
+
+        best_row, best_score = None, 0.0
+        for row, shared in overlap.items():
+            query_coverage, title_coverage = shared / query_weight, shared / self._title_weight[row]
+            if query_coverage < MIN_QUERY_COVERAGE or title_coverage < MIN_TITLE_COVERAGE:
+                continue
+            score = (query_coverage + title_coverage) / 2
+            if score > best_score:
+                best_row, best_score = row, score
+        if best_row is not None:
+            return self._result(best_row, "tokens", best_score)
+
+        # Whole-name typo tolerance among the token candidates
+        limit = max_edits(key)
+        for row in sorted(overlap, key=overlap.get, reverse=True)[:50]:
+            distance = bounded_levenshtein(key, compact_name(self.titles[row]), limit)
+            if distance <= limit:
+                return self._result(row, "fuzzy", 1.0 - distance / max(len(key), 1))
+        return None
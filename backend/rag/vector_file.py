@@ -0,0 +1,106 @@
+"""
+Exact Vector File - full-precision copies of vectors held by a compressed index.
+
+When the FAISS index stores float16/SQ8/PQ codes, VectorStore keeps the
+original (normalised) float32 vectors here so the top candidates can be
+re-ranked exactly. The file is memory-mapped, so only the rows read during
+re-ranking are paged in and worker processes share them via the OS cache.
+
+    <prefix>.f32        float32[rows, dim], append-only
+    <prefix>_ids.npy    int64[rows] FAISS label of each row
+
+A label that was upserted several times resolves to its newest row; rows of
+replaced or deleted labels are dropped by compact().
+"""
+import os
+from typing import Iterable, Tuple
+
+import numpy as np
+
+
+class VectorFile:
+    """Append-only, memory-mapped float32 vectors keyed by FAISS label."""
+
+    def __init__(self, prefix: str, dim: int):
+        self.dim = dim
+        self.vectors_path = prefix + ".f32"
+        self.ids_path = prefix + "_ids.npy"
+        self._pending_ids = []
+        self._open()
+
+    def _open(self):
+        ids = np.load(self.ids_path) if os.path.exists(self.ids_path) else np.empty(0, dtype=np.int64)
+        stored = os.path.getsize(self.vectors_path) // (4 * self.dim) if os.path.exists(self.vectors_path) else 0
+        # Vectors are written before ids, so a torn write leaves extra vectors
+        self.rows = min(len(ids), stored)
+        self._ids = ids[:self.rows]
+        self._vectors = (
+            np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(stored, self.dim))
+            if stored else None
+        )
+        # Newest row per label: unique over the reversed ids keeps the last occurrence
+        unique, first_in_reversed = np.unique(self._ids[::-1], return_index=True)
+        self._sorted_ids = unique
+        self._sorted_rows = self.rows - 1 - first_in_reversed
+
+    def __len__(self) -> int:
+        return len(self._sorted_ids)
+
+    @property
+    def nbytes(self) -> int:
+        return os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+
+    def append(self, labels: np.ndarray, vectors: np.ndarray):
+        """Add vectors for labels (replacing earlier ones); call flush() to persist the ids."""
+        if len(labels) == 0:
+            return
+        written = self.rows + sum(len(p) for p in self._pending_ids)
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(written * 4 * self.dim)
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        self._pending_ids.append(np.asarray(labels, dtype=np.int64))
+
+    def flush(self):
+        if not self._pending_ids:
+            return
+        ids = np.concatenate([self._ids] + self._pending_ids)
+        np.save(self.ids_path + ".tmp.npy", ids)
+        os.replace(self.ids_path + ".tmp.npy", self.ids_path)
+        self._pending_ids = []
+        self._open()
+
+    def get(self, labels: Iterable[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """(vectors, found) for labels; rows of labels not found are zero."""
+        labels = np.asarray(list(labels), dtype=np.int64)
+        vectors = np.zeros((len(labels), self.dim), dtype=np.float32)
+        if len(self._sorted_ids) == 0:
+            return vectors, np.zeros(len(labels), dtype=bool)
+        pos = np.minimum(np.searchsorted(self._sorted_ids, labels), len(self._sorted_ids) - 1)
+        found = self._sorted_ids[pos] == labels
+        rows = self._sorted_rows[pos[found]]
+        # Read rows in file order so the mmap is touched sequentially
+        order = np.argsort(rows)
+        vectors[np.flatnonzero(found)[order]] = self._vectors[rows[order]]
+        return vectors, found
+
+    def compact(self, live_labels: np.ndarray):
+        """Rewrite the file keeping only the newest vector of each live label."""
+        self.flush()
+        live_labels = np.intersect1d(np.asarray(live_labels, dtype=np.int64), self._sorted_ids)
+        tmp_path = self.vectors_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            for start in range(0, len(live_labels), 65536):
+                vectors, _ = self.get(live_labels[start:start + 65536])
+                f.write(vectors.tobytes())
+        self._vectors = None
+        os.replace(tmp_path, self.vectors_path)
+        np.save(self.ids_path + ".tmp.npy", live_labels)
+        os.replace(self.ids_path + ".tmp.npy", self.ids_path)
+        self._open()
+
+    def clear(self):
+        self._pending_ids = []
+        for path in (self.vectors_path, self.ids_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self._open()
@@ -2,74 +2,444 @@
 FAISS-based Vector Store - Compatible with Python 3.14
 """
 import faiss
+import hashlib
 import numpy as np
 import pickle
+import json
+import math
 import os
-from typing import List, Dict, Any
-from backend.config.settings import VECTOR_DB_DIR
+from typing import List, Dict, Any, Iterable, Optional, Tuple, Union
+from backend.config.settings import settings, VECTOR_DB_DIR
+from backend.rag.doc_store import DocumentStore
+from backend.rag.bm25 import BM25Index
+from backend.rag.title_index import TitleIndex
+from backend.rag.vector_file import VectorFile
+from backend.rag.snapshots import is_snapshot_dir
+
+
+# Supported index types (see settings.VECTOR_INDEX_TYPE)
+INDEX_TYPES = ("flat_l2", "flat_ip", "ivf_pq", "hnsw")
+
+# Vector encodings for flat/hnsw indexes (see settings.VECTOR_STORAGE)
+STORAGE_TYPES = ("float32", "float16", "sq8", "pq")
+
+# IVF/PQ k-means wants roughly this many training points per centroid
+MIN_POINTS_PER_CENTROID = 39
+
+# Metadata key of chunks stored without a vector: near-duplicates pointing at
+# the chunk whose vector stands in for them (see backend.ingestion.dedup)
+DUPLICATE_OF_KEY = "duplicate_of"
+
+# read_index flags for read-only stores: vector codes stay in the page cache
+# (shared by every process mapping the file) instead of a private heap copy.
+# IO_FLAG_MMAP_IFC maps flat/SQ/HNSW codes; older FAISS only has IO_FLAG_MMAP.
+MMAP_READ_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+
+def chunk_id_to_int(chunk_id: Union[str, int]) -> int:
+    """Map a stable string chunk ID to the positive int64 label FAISS stores."""
+    if isinstance(chunk_id, (int, np.integer)):
+        return int(chunk_id)
+    digest = hashlib.blake2b(chunk_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") & 0x7FFFFFFFFFFFFFFF
+
+
+class EmbeddingMismatchError(ValueError):
+    """The persisted index was built with a different embedding model/width."""
+
+
+def resident_memory_bytes() -> int:
+    """Resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def shared_memory_bytes() -> int:
+    """Resident file-backed pages (page cache shared with other processes); 0 without /proc."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[2]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _pq_subquantizers(dimension: int) -> int:
+    """Largest sub-quantizer count <= settings.PQ_M that divides the dimension."""
+    return max(m for m in range(1, min(settings.PQ_M, dimension) + 1) if dimension % m == 0)
+
+
+def _contains(sorted_labels: np.ndarray, label: int) -> bool:
+    pos = int(np.searchsorted(sorted_labels, label))
+    return pos < len(sorted_labels) and sorted_labels[pos] == label
+
+
+def document_id(doc) -> int:
+    """FAISS label for a Document: its chunk_id, or a hash of its content."""
+    chunk_id = doc.metadata.get("chunk_id")
+    if chunk_id is None:
+        chunk_id = hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()
+    return chunk_id_to_int(chunk_id)
 
 
 class VectorStore:
     """
     FAISS-based vector store for government schemes.
     Stores embeddings and documents separately for efficient retrieval.
+
+    Vectors live in an IndexIDMap2 keyed by stable chunk IDs, so individual
+    chunks can be upserted or deleted without rebuilding the whole index.
+
+    read_only=True memory-maps the index instead of reading it onto the
+    heap (see settings.VECTOR_INDEX_MMAP); such a store refuses writes.
     """
-    
-    def __init__(self, collection_name="government_schemes"):
+
+    def __init__(self, collection_name="government_schemes", index_type: str = None,
+                 persist_dir: str = None, storage: str = None, check_embeddings: bool = True,
+                 read_only: bool = False):
         self.collection_name = collection_name
-        self.index_path = os.path.join(VECTOR_DB_DIR, f"{collection_name}.faiss")
-        self.docs_path = os.path.join(VECTOR_DB_DIR, f"{collection_name}_docs.pkl")
-        
-        os.makedirs(VECTOR_DB_DIR, exist_ok=True)
-        
+        self.read_only = read_only
+        self.persist_dir = persist_dir or VECTOR_DB_DIR
+        self.index_path = os.path.join(self.persist_dir, f"{collection_name}.faiss")
+        self.docs_path = os.path.join(self.persist_dir, f"{collection_name}_docs")
+        # Pickled document store written by earlier versions (migrated on load)
+        self.legacy_docs_path = os.path.join(self.persist_dir, f"{collection_name}_docs.pkl")
+        self.meta_path = os.path.join(self.persist_dir, f"{collection_name}_index.json")
+        self.bm25_path = BM25Index.path_for(self.persist_dir, collection_name)
+        self.titles_path = TitleIndex.path_for(self.persist_dir, collection_name)
+        # Full-precision vectors kept for re-ranking when the index is compressed
+        self.vectors_prefix = os.path.join(self.persist_dir, f"{collection_name}_vectors")
+
+        os.makedirs(self.persist_dir, exist_ok=True)
+
+        self.index_type = index_type or settings.VECTOR_INDEX_TYPE
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type '{self.index_type}', expected one of {INDEX_TYPES}")
+        self.storage = storage or settings.VECTOR_STORAGE
+        if self.storage not in STORAGE_TYPES:
+            raise ValueError(f"Unknown vector storage '{self.storage}', expected one of {STORAGE_TYPES}")
+
         self.index = None
-        self.documents = []
-        self.metadatas = []
-        
+        self.index_meta: Dict[str, Any] = {}
+        self.docstore = DocumentStore(self.docs_path)
+        self.bm25 = None
+        self.titles = None
+        self.vector_file = None
+        # (duplicate labels, their canonical labels), built on first search
+        self._duplicates = None
+        # Labels put or removed since the keyword/title indexes were last saved
+        self._text_changes = set()
+
         # Try to load existing index
-        if os.path.exists(self.index_path) and os.path.exists(self.docs_path):
+        if os.path.exists(self.index_path) and (
+            DocumentStore.exists(self.docs_path) or os.path.exists(self.legacy_docs_path)
+        ):
             self._load()
+            if check_embeddings:
+                self._check_embeddings()
+
+    @property
+    def metric(self) -> str:
+        """Metric of the loaded/built index ("ip" or "l2")."""
+        return self.index_meta.get("metric", "l2")
 
     def _load(self):
         """Load existing index and documents."""
+        self._duplicates = None
+        self._text_changes = set()
         try:
-            self.index = faiss.read_index(self.index_path)
-            with open(self.docs_path, 'rb') as f:
-                data = pickle.load(f)
-                self.documents = data['documents']
-                self.metadatas = data['metadatas']
-            print(f"[INFO] Loaded existing index with {len(self.documents)} documents")
+            self.index = faiss.read_index(self.index_path, MMAP_READ_FLAGS if self.read_only else 0)
+            if os.path.exists(self.meta_path):
+                with open(self.meta_path, 'r') as f:
+                    self.index_meta = json.load(f)
+            else:
+                # Indexes written before index metadata existed are plain IndexFlatL2
+                self.index_meta = {"index_type": "flat_l2", "metric": "l2", "dimension": self.index.d}
+            self._apply_search_params()
+            if self.index_meta.get("exact_vectors"):
+                self.vector_file = VectorFile(self.vectors_prefix, self.index_meta["dimension"])
+            if not DocumentStore.exists(self.docs_path):
+                self._migrate_pickle()
+            if os.path.exists(self.bm25_path) and os.path.exists(self.titles_path):
+                self.bm25 = BM25Index.load(self.bm25_path)
+                self.titles = TitleIndex.load(self.titles_path)
+            else:
+                # Stores saved before the keyword/title indexes existed. Snapshot
+                # files are hard-linked and shared, so those indexes stay in memory.
+                self._build_text_indexes(persist=not (self.read_only or is_snapshot_dir(self.persist_dir)))
+            print(f"[INFO] Loaded existing {self.index_meta.get('index_type')} index with {len(self.docstore)} documents")
         except Exception as e:
             print(f"[WARN] Could not load existing index: {e}")
             self.index = None
-            self.documents = []
-            self.metadatas = []
+            self.index_meta = {}
+            self.docstore = DocumentStore(self.docs_path)
+            self.bm25 = None
+            self.titles = None
+            self.vector_file = None
+
+    def _check_embeddings(self):
+        """
+        Refuse an index built for a different embedding model or width:
+        queries embedded with the current settings would not be comparable.
+        """
+        if self.index is None:
+            return
+        expected_model = settings.EMBEDDING_MODEL
+        expected_dims = settings.EMBEDDING_DIMENSIONS
+        built_model = self.index_meta.get("embedding_model")
+        built_dims = self.index_meta.get("embedding_dimensions")
+        mismatched = (
+            (built_model is not None and built_model != expected_model)
+            or (built_dims is not None and built_dims != expected_dims)
+            or (expected_dims and self.index.d != expected_dims)
+        )
+        if mismatched:
+            built = f"{built_model or 'unknown model'} ({self.index.d} dims)"
+            wanted = f"{expected_model} ({expected_dims or 'native'} dims)"
+            raise EmbeddingMismatchError(
+                f"Index {self.index_path} was built with {built}, but settings request {wanted}; "
+                "re-run ingestion with --full"
+            )
+
+    def _migrate_pickle(self):
+        """Convert a pickled docs file from earlier versions to the mmap store."""
+        with open(self.legacy_docs_path, 'rb') as f:
+            data = pickle.load(f)
+        documents, metadatas = data['documents'], data['metadatas']
+        # Older stores kept positional lists; FAISS labels were the positions
+        if isinstance(documents, list):
+            documents, metadatas = dict(enumerate(documents)), dict(enumerate(metadatas))
+        DocumentStore.write(
+            self.docs_path,
+            ((label, documents[label], metadatas[label]) for label in documents)
+        )
+        self.docstore = DocumentStore(self.docs_path)
+        os.remove(self.legacy_docs_path)
+        print(f"[INFO] Migrated {len(documents)} documents from {self.legacy_docs_path}")
 
     def _save(self):
         """Save index and documents to disk."""
-        faiss.write_index(self.index, self.index_path)
-        with open(self.docs_path, 'wb') as f:
-            pickle.dump({
-                'documents': self.documents,
-                'metadatas': self.metadatas
-            }, f)
-        print(f"[INFO] Saved index with {len(self.documents)} documents")
+        stale = self.index_meta.get("stale", 0)
+        if stale and stale > settings.HNSW_COMPACT_STALE_FRACTION * self.index.ntotal:
+            self._compact_hnsw()
+        self.index_meta["ntotal"] = int(self.index.ntotal)
+        # Replace rather than overwrite: read-only stores may have the old file mapped
+        faiss.write_index(self.index, self.index_path + ".tmp")
+        os.replace(self.index_path + ".tmp", self.index_path)
+        with open(self.meta_path + ".tmp", 'w') as f:
+            json.dump(self.index_meta, f, indent=2)
+        os.replace(self.meta_path + ".tmp", self.meta_path)
+        self.docstore.flush()
+        if self.vector_file is not None and self.vector_file.rows > 2 * len(self.docstore):
+            self.vector_file.compact(self.docstore.labels())
+        self._update_text_indexes()
+        print(f"[INFO] Saved index with {len(self.docstore)} documents")
+
+    def _build_text_indexes(self, persist: bool = True):
+        """Rebuild the BM25 keyword and title indexes from the document store, saving them if persist."""
+        self.bm25 = BM25Index.build(self.docstore.items())
+        self.titles = TitleIndex.build(self.docstore.items())
+        if persist:
+            self.bm25.save(self.bm25_path)
+            self.titles.save(self.titles_path)
+        self._text_changes = set()
+
+    def _update_text_indexes(self):
+        """
+        Persist the BM25 keyword and title indexes with the chunks changed
+        since the last save; only those chunks are re-read and re-tokenized.
+        """
+        if self.bm25 is None or self.titles is None:
+            self._build_text_indexes()
+            return
+        if not self._text_changes:
+            return
+        changed = sorted(self._text_changes)
+        records = []
+        for label in changed:
+            entry = self.docstore.get(label)
+            if entry is not None:
+                records.append((label, *entry))
+        self.bm25 = self.bm25.updated(changed, records)
+        self.bm25.save(self.bm25_path)
+        self.titles = self.titles.updated(changed, records)
+        self.titles.save(self.titles_path)
+        self._text_changes = set()
+
+    def save(self):
+        """Persist pending changes made with save=False."""
+        if self.index is not None:
+            self._save()
+
+    def _build_index(self, embeddings_np: np.ndarray):
+        """
+        Create and train a FAISS index of the configured type.
+
+        Falls back to an exact inner-product index when the corpus is too
+        small to train IVF-PQ reliably, and to float32 storage when it is
+        too small to train PQ codebooks.
+
+        Flat and HNSW indexes store vectors as float32, float16, 8-bit
+        scalar-quantized or PQ codes (self.storage); compressed indexes keep
+        full-precision copies in a VectorFile for exact re-ranking.
+        """
+        n, dimension = embeddings_np.shape
+        index_type = self.index_type
+        storage = self.storage if index_type != "ivf_pq" else "pq"
+        params: Dict[str, Any] = {}
+        metric = faiss.METRIC_L2 if index_type == "flat_l2" else faiss.METRIC_INNER_PRODUCT
+
+        if index_type == "ivf_pq":
+            nlist = settings.IVF_NLIST or int(4 * math.sqrt(n))
+            nlist = max(1, min(nlist, n // MIN_POINTS_PER_CENTROID))
+            # 8-bit PQ codebooks need at least 256 points per sub-quantizer
+            if n < max(256, nlist * MIN_POINTS_PER_CENTROID):
+                print(f"[WARN] {n} vectors are too few to train ivf_pq, using flat_ip")
+                index_type, storage = "flat_ip", self.storage
+            else:
+                params = {"nlist": nlist, "pq_m": _pq_subquantizers(dimension)}
+        if storage == "pq" and index_type != "ivf_pq":
+            if n < 256:
+                print(f"[WARN] {n} vectors are too few to train PQ codes, storing float32")
+                storage = "float32"
+            else:
+                params["pq_m"] = _pq_subquantizers(dimension)
+
+        # Code part of the index_factory string for each storage type
+        codes = {"float16": "SQfp16", "sq8": "SQ8", "pq": f"PQ{params.get('pq_m')}"}.get(storage)
+
+        if index_type == "ivf_pq":
+            index = faiss.index_factory(dimension, f"IVF{params['nlist']},PQ{params['pq_m']}", metric)
+        elif index_type == "hnsw":
+            params.update({"M": settings.HNSW_M, "efConstruction": settings.HNSW_EF_CONSTRUCTION})
+            if codes is None:
+                index = faiss.IndexHNSWFlat(dimension, settings.HNSW_M, metric)
+            else:
+                index = faiss.index_factory(dimension, f"HNSW{settings.HNSW_M},{codes}", metric)
+            index.hnsw.efConstruction = settings.HNSW_EF_CONSTRUCTION
+        elif codes is not None:
+            index = faiss.index_factory(dimension, codes, metric)
+        elif index_type == "flat_l2":
+            index = faiss.IndexFlatL2(dimension)
+        else:
+            index = faiss.IndexFlatIP(dimension)
+
+        if not index.is_trained:
+            print(f"[INFO] Training {index_type} index on {n} vectors...")
+            index.train(self._normalize(embeddings_np, index_type != "flat_l2"))
+
+        self.index = faiss.IndexIDMap2(index)
+        self.index_meta = {
+            "index_type": index_type,
+            "metric": "l2" if index_type == "flat_l2" else "ip",
+            "dimension": dimension,
+            "embedding_model": settings.EMBEDDING_MODEL,
+            "embedding_dimensions": settings.EMBEDDING_DIMENSIONS,
+            "storage": storage,
+            "params": params,
+            "stale": 0,
+            "exact_vectors": storage != "float32",
+        }
+        self.vector_file = None
+        if self.index_meta["exact_vectors"]:
+            self.vector_file = VectorFile(self.vectors_prefix, dimension)
+            self.vector_file.clear()
+        self._apply_search_params()
+
+    def _base_index(self):
+        """The wrapped FAISS index (unwraps IndexIDMap2)."""
+        if isinstance(self.index, faiss.IndexIDMap2):
+            return faiss.downcast_index(self.index.index)
+        return self.index
+
+    def _apply_search_params(self):
+        """Set query-time parameters (nprobe / efSearch) from settings."""
+        index_type = self.index_meta.get("index_type")
+        if index_type == "ivf_pq":
+            faiss.extract_index_ivf(self._base_index()).nprobe = settings.IVF_NPROBE
+        elif index_type == "hnsw":
+            self._base_index().hnsw.efSearch = settings.HNSW_EF_SEARCH
+
+    @staticmethod
+    def _normalize(vectors_np: np.ndarray, normalize: bool) -> np.ndarray:
+        if normalize:
+            vectors_np = vectors_np.copy()
+            faiss.normalize_L2(vectors_np)
+        return vectors_np
+
+    def _prepare(self, vectors) -> np.ndarray:
+        """Convert to a float32 matrix, L2-normalised for inner-product indexes."""
+        vectors_np = np.array(vectors, dtype=np.float32)
+        if vectors_np.ndim == 1:
+            vectors_np = vectors_np.reshape(1, -1)
+        return self._normalize(vectors_np, self.metric == "ip")
+
+    def _check_writable(self):
+        if self.read_only:
+            raise RuntimeError(f"Vector store '{self.collection_name}' was opened read-only")
 
     def clear(self):
         """Clear the existing index and documents."""
+        self._check_writable()
         self.index = None
-        self.documents = []
-        self.metadatas = []
+        self.index_meta = {}
+        self._duplicates = None
+        self.docstore.clear()
+        self.bm25 = None
+        self.titles = None
+        self._text_changes = set()
+        if self.vector_file is not None:
+            self.vector_file.clear()
+            self.vector_file = None
         # Remove existing files
-        if os.path.exists(self.index_path):
-            os.remove(self.index_path)
-        if os.path.exists(self.docs_path):
-            os.remove(self.docs_path)
+        for path in (self.index_path, self.legacy_docs_path, self.meta_path, self.bm25_path,
+                     self.titles_path):
+            if os.path.exists(path):
+                os.remove(path)
         print("[INFO] Cleared existing vector store")
 
+    def __len__(self) -> int:
+        return len(self.docstore)
+
+    def __contains__(self, chunk_id) -> bool:
+        return chunk_id_to_int(chunk_id) in self.docstore
+
+    def items(self):
+        """(label, text, metadata) of every stored chunk."""
+        return self.docstore.items()
+
+    def get_vectors(self, ids: Iterable[Union[str, int]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (vectors, found) for chunk IDs: the full-precision copies when the
+        index is compressed, else the vectors stored in the index. Rows of
+        chunks without a vector (unknown, or stored as a duplicate) are zero.
+        """
+        labels = [chunk_id_to_int(i) for i in ids]
+        if self.index is None:
+            return np.zeros((len(labels), 0), dtype=np.float32), np.zeros(len(labels), dtype=bool)
+        if self.vector_file is not None:
+            return self.vector_file.get(labels)
+        vectors = np.zeros((len(labels), self.index.d), dtype=np.float32)
+        found = np.zeros(len(labels), dtype=bool)
+        for i, label in enumerate(labels):
+            if label not in self.docstore:
+                continue
+            try:
+                vectors[i] = self.index.reconstruct(label)
+                found[i] = True
+            except RuntimeError:
+                # IndexIDMap2 raises for labels it holds no vector for
+                pass
+        return vectors, found
+
     def add_documents(self, documents: List, embeddings: List, clear_existing: bool = True):
         """Add documents with embeddings to the vector store.
-        
+
         Args:
             documents: List of Document objects
             embeddings: List of embedding vectors
@@ -78,61 +448,345 @@ class VectorStore:
         # Clear existing index if requested (prevents duplicates on re-ingestion)
         if clear_existing:
             self.clear()
-        
-        # Convert embeddings to numpy array
+
+        ids = [document_id(doc) for doc in documents]
+        self.upsert(ids, documents, embeddings)
+        print(f"[INFO] Added {len(documents)} documents to vector store")
+
+    def upsert(self, ids: List[Union[str, int]], docs: List, embeddings: List, save: bool = True):
+        """
+        Insert or replace chunks by ID.
+
+        Args:
+            ids: Stable chunk IDs (strings such as chunk_id metadata, or int labels)
+            docs: Document objects, aligned with ids
+            embeddings: Embedding vectors, aligned with ids
+            save: Persist to disk afterwards (default: True)
+        """
+        if not ids:
+            return
+        self._check_writable()
+        if not (len(ids) == len(docs) == len(embeddings)):
+            raise ValueError("ids, docs and embeddings must have the same length")
+
+        labels = np.array([chunk_id_to_int(i) for i in ids], dtype=np.int64)
         embeddings_np = np.array(embeddings, dtype=np.float32)
-        
-        # Create new index (L2 distance)
-        dimension = embeddings_np.shape[1]
-        self.index = faiss.IndexFlatL2(dimension)
-        self.documents = []
-        self.metadatas = []
-        
-        # Add embeddings to index
-        self.index.add(embeddings_np)
-        
-        # Store documents and metadata
-        for doc in documents:
-            self.documents.append(doc.page_content)
+
+        if self.index is None:
+            self._build_index(embeddings_np)
+        elif not isinstance(self.index, faiss.IndexIDMap2):
+            raise RuntimeError("Index was built without stable IDs; run a full re-ingestion first")
+        elif embeddings_np.shape[1] != self.index.d:
+            raise EmbeddingMismatchError(
+                f"Embeddings have {embeddings_np.shape[1]} dims but the index has {self.index.d}"
+            )
+
+        # Replace existing vectors
+        existing = [label for label in labels.tolist() if label in self.docstore]
+        self._remove_labels(np.array(existing, dtype=np.int64))
+
+        vectors_np = self._prepare(embeddings_np)
+        self.index.add_with_ids(vectors_np, labels)
+        if self.vector_file is not None:
+            self.vector_file.append(labels, vectors_np)
+            self.vector_file.flush()
+
+        for label, doc in zip(labels.tolist(), docs):
             # Clean metadata - remove None values
             clean_meta = {k: v for k, v in doc.metadata.items() if v is not None}
-            self.metadatas.append(clean_meta)
-        
-        # Save to disk
-        self._save()
-        print(f"[INFO] Added {len(documents)} documents to vector store")
+            self.docstore.put(label, doc.page_content, clean_meta)
+        self._duplicates = None
+        self._text_changes.update(labels.tolist())
+
+        if save:
+            self._save()
+
+    def put_documents(self, ids: List[Union[str, int]], docs: List, save: bool = True):
+        """
+        Store chunks without a vector (near-duplicates of an indexed chunk,
+        named by their DUPLICATE_OF_KEY metadata). Vector search returns
+        them alongside their canonical chunk, with its score; any vector
+        previously stored under their IDs is removed.
+        """
+        if not ids:
+            return
+        self._check_writable()
+        if self.index is None:
+            raise RuntimeError("Add vectors with upsert() before storing documents without vectors")
+
+        labels = np.array([chunk_id_to_int(i) for i in ids], dtype=np.int64)
+        existing = [label for label in labels.tolist() if label in self.docstore]
+        self._remove_labels(np.array(existing, dtype=np.int64))
+        for label, doc in zip(labels.tolist(), docs):
+            clean_meta = {k: v for k, v in doc.metadata.items() if v is not None}
+            self.docstore.put(label, doc.page_content, clean_meta)
+        self._duplicates = None
+        self._text_changes.update(labels.tolist())
+
+        if save:
+            self._save()
+
+    def delete(self, ids: Iterable[Union[str, int]], save: bool = True) -> int:
+        """Delete chunks by ID. Returns the number of chunks removed."""
+        self._check_writable()
+        labels = np.array(
+            [label for label in (chunk_id_to_int(i) for i in ids) if label in self.docstore],
+            dtype=np.int64
+        )
+        if len(labels) == 0:
+            return 0
+
+        self._remove_labels(labels)
+        for label in labels.tolist():
+            self.docstore.remove(label)
+        self._duplicates = None
+        self._text_changes.update(labels.tolist())
+
+        if save:
+            self._save()
+        return len(labels)
+
+    def _remove_labels(self, labels: np.ndarray):
+        """
+        Remove vectors from the index. HNSW graphs cannot delete; their
+        vectors stay in the graph until it is compacted on save (see
+        settings.HNSW_COMPACT_STALE_FRACTION). Search skips
+        deleted chunks, and re-scores every hit against its chunk's current
+        vector, since a chunk upserted again is found through its old vector
+        as well.
+        """
+        if len(labels) == 0:
+            return
+        try:
+            self.index.remove_ids(faiss.IDSelectorBatch(labels))
+        except RuntimeError:
+            self.index_meta["stale"] = self.index_meta.get("stale", 0) + len(labels)
+
+    def _compact_hnsw(self):
+        """
+        Rebuild the HNSW graph from the current vectors of the stored chunks,
+        dropping the stale ones left by replaced and deleted chunks. The
+        trained encoding and graph parameters are kept.
+        """
+        duplicates, _ = self._duplicate_links()
+        labels = np.setdiff1d(self.docstore.labels(), duplicates)
+        vectors, found = self.get_vectors(labels.tolist())
+        labels, vectors = labels[found], vectors[found]
+
+        base = faiss.clone_index(self._base_index())
+        base.reset()
+        index = faiss.IndexIDMap2(base)
+        if len(labels):
+            index.add_with_ids(vectors, labels)
+        print(f"[INFO] Compacted hnsw index: dropped {self.index.ntotal - index.ntotal} stale vectors")
+        self.index = index
+        self.index_meta["stale"] = 0
+        self._apply_search_params()
+
+    def _duplicate_links(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(labels of chunks stored without a vector, labels of their canonical chunks), by canonical."""
+        if self._duplicates is None:
+            links = sorted(
+                (chunk_id_to_int(canonical), label)
+                for label, canonical in self.docstore.column_values(DUPLICATE_OF_KEY).items()
+            )
+            self._duplicates = (
+                np.array([label for _, label in links], dtype=np.int64),
+                np.array([canonical for canonical, _ in links], dtype=np.int64),
+            )
+        return self._duplicates
+
+    def _filter_params(self, labels: np.ndarray):
+        """
+        Search parameters restricting the index to the given labels.
 
-    def search(self, query_embedding: List[float], k: int = 4) -> List[Dict]:
-        """Search for similar documents by embedding."""
+        IVF probes every list and HNSW widens its beam in proportion to the
+        filter's selectivity, so filtered searches still fill k.
+        """
+        selector = faiss.IDSelectorBatch(labels)
+        index_type = self.index_meta.get("index_type")
+        if index_type == "ivf_pq":
+            nlist = faiss.extract_index_ivf(self._base_index()).nlist
+            return faiss.SearchParametersIVF(sel=selector, nprobe=nlist)
+        if index_type == "hnsw":
+            selectivity = len(labels) / max(self.index.ntotal, 1)
+            ef_search = min(self.index.ntotal, math.ceil(settings.HNSW_EF_SEARCH / max(selectivity, 1e-6)))
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=max(ef_search, settings.HNSW_EF_SEARCH))
+        return faiss.SearchParameters(sel=selector)
+
+    def _rerank(self, query: np.ndarray, hits: List[tuple]) -> List[tuple]:
+        """Re-score (label, approximate score) hits with the current full-precision vectors."""
+        vectors, found = self.get_vectors([idx for idx, _ in hits])
+        if self.metric == "ip":
+            exact = vectors @ query
+        else:
+            exact = ((vectors - query) ** 2).sum(axis=1)
+        rescored = [
+            (idx, float(exact[i]) if found[i] else raw) for i, (idx, raw) in enumerate(hits)
+        ]
+        return sorted(rescored, key=lambda hit: hit[1], reverse=self.metric == "ip")
+
+    def search(self, query_embedding: List[float], k: int = 4,
+               filter: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """
+        Search for similar documents by embedding.
+
+        'distance' is squared L2 (for inner-product indexes this is
+        2 - 2 * cosine, so smaller is always better); 'score' is the
+        cosine similarity.
+
+        filter restricts the search to documents whose metadata equals every
+        given value (a list value matches any of its items). Matching labels
+        come from the document store's bitmaps and are applied inside FAISS,
+        so up to k results are returned however selective the filter is.
+
+        Chunks stored without a vector (see put_documents) follow their
+        canonical chunk in the results, with its score.
+        """
+        return self.search_batch([query_embedding], k=k, filter=filter)[0]
+
+    def search_batch(self, query_embeddings: List[List[float]], k: int = 4,
+                     filter: Optional[Dict[str, Any]] = None) -> List[List[Dict]]:
+        """Search several query embeddings with a single index.search call."""
         if self.index is None or self.index.ntotal == 0:
-            return []
-        
-        # Convert to numpy
-        query_np = np.array([query_embedding], dtype=np.float32)
-        
-        # Search
-        distances, indices = self.index.search(query_np, min(k, self.index.ntotal))
-        
+            return [[] for _ in query_embeddings]
+
+        duplicates, canonicals = self._duplicate_links()
+        params = None
+        allowed = None
+        if filter:
+            allowed = np.sort(self.docstore.labels_where(filter))
+            if len(allowed) == 0:
+                return [[] for _ in query_embeddings]
+            # Duplicates that match are reached through their canonical's vector
+            searched = np.union1d(allowed, canonicals[np.isin(duplicates, allowed)])
+            params = self._filter_params(searched)
+
+        query_np = self._prepare(query_embeddings)
+        if query_np.shape[1] != self.index.d:
+            raise EmbeddingMismatchError(
+                f"Query embeddings have {query_np.shape[1]} dims but the index has {self.index.d}; "
+                "check EMBEDDING_MODEL / EMBEDDING_DIMENSIONS"
+            )
+
+        # Compressed indexes fetch extra candidates and re-rank them exactly
+        rerank = settings.VECTOR_RERANK if self.vector_file is not None else 0
+        k_keep = k * rerank if rerank else k
+
+        # Over-fetch past vectors that were replaced/deleted in an HNSW index
+        stale = self.index_meta.get("stale", 0)
+        k_search = min(k_keep + stale, self.index.ntotal)
+        distances, indices = self.index.search(query_np, k_search, params=params)
+
         # Build results
-        results = []
-        for i, idx in enumerate(indices[0]):
-            if idx < len(self.documents):
+        all_results = []
+        for query, row_distances, row_indices in zip(query_np, distances, indices):
+            hits = []
+            seen = set()
+            for raw, idx in zip(row_distances.tolist(), row_indices.tolist()):
+                # IVF/HNSW pad with -1 when fewer than k neighbours are found
+                if idx < 0 or idx in seen or idx not in self.docstore:
+                    continue
+                # A stale HNSW vector may belong to a chunk now stored without one
+                if stale and DUPLICATE_OF_KEY in self.docstore.get(idx)[1]:
+                    continue
+                seen.add(idx)
+                hits.append((idx, raw))
+                # With stale vectors, every over-fetched candidate is re-scored
+                if len(hits) == k_keep and not stale:
+                    break
+            # A hit may come from a replaced vector still in the HNSW graph;
+            # re-scoring uses the chunk's current one
+            if (rerank or stale) and hits:
+                hits = self._rerank(query, hits)[:k_keep]
+
+            # Each canonical hit stands for its near-duplicates too (same text,
+            # other schemes); a filter may match the duplicates but not the canonical
+            expanded = []
+            for idx, raw in hits:
+                start, end = np.searchsorted(canonicals, [idx, idx + 1])
+                for label in [idx] + duplicates[start:end].tolist():
+                    if allowed is None or _contains(allowed, label):
+                        expanded.append((label, raw))
+                if len(expanded) >= k:
+                    break
+
+            results = []
+            for idx, raw in expanded[:k]:
+                # Only the returned hits are read from the memory-mapped store
+                content, metadata = self.docstore.get(idx)
+                if self.metric == "ip":
+                    score, distance = raw, 2.0 - 2.0 * raw
+                else:
+                    score, distance = 1.0 - raw / 2.0, raw
                 results.append({
-                    'content': self.documents[idx],
-                    'metadata': self.metadatas[idx],
-                    'distance': float(distances[0][i])
+                    'id': idx,
+                    'content': content,
+                    'metadata': metadata,
+                    'distance': distance,
+                    'score': score
                 })
-        
+            all_results.append(results)
+
+        return all_results
+
+    def keyword_search(self, query: str, k: int = 4,
+                       filter: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """
+        BM25 search over chunk text and titles; needs no query embedding.
+
+        Results carry 'bm25_score' instead of 'distance'/'score'. Documents
+        changed since the last save are not visible until save() is called.
+        """
+        if self.bm25 is None or len(self.bm25) == 0:
+            return []
+        allowed = self.docstore.labels_where(filter) if filter else None
+        results = []
+        for label, bm25_score in self.bm25.search(query, k=k, allowed=allowed):
+            entry = self.docstore.get(label)
+            if entry is None:
+                continue
+            content, metadata = entry
+            results.append({
+                'id': label,
+                'content': content,
+                'metadata': metadata,
+                'bm25_score': bm25_score
+            })
         return results
-    
-    def clear(self):
-        """Clear the index and remove files."""
-        self.index = None
-        self.documents = []
-        self.metadatas = []
-        
-        if os.path.exists(self.index_path):
-            os.remove(self.index_path)
-        if os.path.exists(self.docs_path):
-            os.remove(self.docs_path)
-        print(f"[INFO] Cleared vector store")
+
+    def lookup_title(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        All chunks of the scheme whose title best matches name, without
+        touching the vector index. Returns the TitleIndex match with its
+        chunks as 'documents' (search-style dicts without scores), or None.
+        """
+        if self.titles is None:
+            return None
+        match = self.titles.lookup(name)
+        if match is None:
+            return None
+        documents = []
+        for label in match["labels"]:
+            entry = self.docstore.get(label)
+            if entry is not None:
+                documents.append({'id': label, 'content': entry[0], 'metadata': entry[1]})
+        return {**match, 'documents': documents}
+
+    def stats(self) -> Dict[str, Any]:
+        """Index description plus storage footprint and process memory."""
+        ntotal = int(self.index.ntotal) if self.index is not None else 0
+        # The serialized index is the same size as its in-memory codes/graph
+        index_bytes = os.path.getsize(self.index_path) if os.path.exists(self.index_path) else 0
+        return {
+            **self.index_meta,
+            "documents": len(self.docstore),
+            "index_bytes": index_bytes,
+            "bytes_per_vector": round(index_bytes / ntotal, 1) if ntotal else 0,
+            # Memory-mapped: shared page cache, only re-ranked rows are resident
+            "exact_vectors_bytes": self.vector_file.nbytes if self.vector_file is not None else 0,
+            "rerank": settings.VECTOR_RERANK if self.vector_file is not None else 0,
+            "rss_bytes": resident_memory_bytes(),
+            "shared_bytes": shared_memory_bytes(),
+            "mmap": self.read_only,
+        }
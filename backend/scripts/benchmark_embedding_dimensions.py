@@ -0,0 +1,108 @@
+"""
+Recall / latency / memory trade-off of reduced-dimension embeddings on the scheme corpus.
+
+text-embedding-3 models are trained so that a prefix of the vector,
+re-normalised, is itself a usable embedding (this is what the API's
+`dimensions` parameter returns). This script takes the full-width vectors
+of the ingested chunks from the embedding cache, truncates them to each
+candidate width and compares brute-force search against the full width:
+
+    recall@k    overlap of the top-k with the full-width top-k
+    title@k     share of title queries whose own scheme appears in the top-k
+    ms/query    exact inner-product search time
+    MB          float32 index size
+
+Queries are scheme titles (known answer) plus the fixed profile-search
+queries. Missing embeddings are fetched through the cache, so after an
+ingestion run this needs at most the query embeddings from the API.
+
+Usage:
+    python backend/scripts/benchmark_embedding_dimensions.py
+    python backend/scripts/benchmark_embedding_dimensions.py --dims 128 256 512 1024 --k 10
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add parent directory to path so we can import backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.config.settings import settings
+from backend.rag.embedding_cache import EmbeddingCache
+from backend.rag.embeddings import AsyncEmbeddingPipeline
+from backend.rag.scheme_matcher import SchemeMatcher
+from backend.rag.sharded_store import open_vector_store
+
+
+def truncate(vectors: np.ndarray, dim: int) -> np.ndarray:
+    """First dim components, re-normalised to unit length."""
+    reduced = np.ascontiguousarray(vectors[:, :dim])
+    return reduced / np.linalg.norm(reduced, axis=1, keepdims=True)
+
+
+def top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ corpus.T
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1)
+    return np.take_along_axis(part, order, axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark reduced embedding dimensions")
+    parser.add_argument("--dims", nargs="+", type=int, default=[128, 256, 512, 768, 1024])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--title-queries", type=int, default=300, help="Scheme titles used as queries")
+    args = parser.parse_args()
+
+    # Chunks of the ingested collection (metadata only needs the title)
+    store = open_vector_store(check_embeddings=False)
+    records = list(store.items())
+    if not records:
+        print("[ERROR] Vector store is empty - run ingestion first")
+        return
+    texts = [text for _, text, _ in records]
+    titles = [meta.get("title", "") for _, _, meta in records]
+
+    # Full-width vectors (dimensions=0), whatever EMBEDDING_DIMENSIONS is set to
+    pipeline = AsyncEmbeddingPipeline(dimensions=0)
+    cache = EmbeddingCache(pipeline.cache_key)
+    corpus = np.asarray(cache.embed(texts, pipeline.embed_sync, batch_size=2000), dtype=np.float32)
+
+    rng = np.random.default_rng(0)
+    unique_titles = sorted(set(t for t in titles if t))
+    picked = rng.choice(len(unique_titles), size=min(args.title_queries, len(unique_titles)), replace=False)
+    title_queries = [unique_titles[i] for i in picked]
+    query_texts = title_queries + SchemeMatcher.profile_query_templates()
+    queries = np.asarray(cache.embed(query_texts, pipeline.embed_sync), dtype=np.float32)
+
+    full_dim = corpus.shape[1]
+    dims = sorted(d for d in set(args.dims + [full_dim]) if d <= full_dim)
+    k = args.k
+    truth = top_k(truncate(corpus, full_dim), truncate(queries, full_dim), k)
+    titles_np = np.array(titles)
+
+    print(f"\nCorpus: {len(corpus)} chunks x {full_dim} dims ({settings.EMBEDDING_MODEL}), "
+          f"{len(queries)} queries, k={k}")
+    print(f"\n{'dims':>6}{'recall@' + str(k):>12}{'title@' + str(k):>12}{'ms/query':>12}{'MB':>10}")
+    print("-" * 52)
+    for dim in dims:
+        reduced_corpus, reduced_queries = truncate(corpus, dim), truncate(queries, dim)
+        start = time.perf_counter()
+        found = top_k(reduced_corpus, reduced_queries, k)
+        per_query_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+        title_hits = np.mean([
+            title in titles_np[row].tolist() for title, row in zip(title_queries, found[:len(title_queries)])
+        ])
+        print(f"{dim:>6}{recall:>12.3f}{title_hits:>12.3f}{per_query_ms:>12.3f}"
+              f"{reduced_corpus.nbytes / 1e6:>10.1f}")
+
+    print("\nSet EMBEDDING_DIMENSIONS to the chosen width and re-run ingestion with --full.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Per-worker memory of a heap-loaded vs. memory-mapped (read-only) index.
+
+Starts N worker processes that each open the store the way a uvicorn worker
+does (VectorStoreRetriever -> open_vector_store), time the open, run a few
+searches and then stay alive so their memory can be measured side by side:
+
+    open ms     time to open the store
+    RSS MB      resident set of the worker
+    shared MB   resident file-backed pages (page cache, shared between workers)
+    PSS MB      proportional set size: shared pages split between the workers
+                that map them, so the PSS sum is the real cost of N workers
+
+Run once per mode on the same store. With --synthetic a throwaway store of
+random vectors is built first, so no ingestion or API key is needed.
+
+Usage:
+    python backend/scripts/benchmark_index_memory.py --workers 4
+    python backend/scripts/benchmark_index_memory.py --synthetic 200000 --dim 1536 --index-type hnsw
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Add parent directory to path so we can import backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.rag.sharded_store import open_vector_store
+from backend.rag.vector_store import resident_memory_bytes, shared_memory_bytes
+
+
+def proportional_set_bytes(pid: int) -> int:
+    """PSS of a process from /proc/<pid>/smaps_rollup (0 where unavailable)."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def worker(args):
+    """Open the store, search, report, then wait for the parent to measure PSS."""
+    start = time.perf_counter()
+    store = open_vector_store(persist_dir=args.persist_dir, check_embeddings=False,
+                              read_only=args.mode == "mmap")
+    open_ms = (time.perf_counter() - start) * 1000
+
+    stats = store.stats()
+    # Sharded stores describe their index per shard
+    dim = stats.get("dimension") or next(iter(stats.get("shards", {}).values()), {}).get("dimension", args.dim)
+    rng = np.random.default_rng(os.getpid())
+    for _ in range(args.queries):
+        query = rng.standard_normal(dim).astype(np.float32)
+        store.search((query / np.linalg.norm(query)).tolist(), k=10)
+
+    print(json.dumps({
+        "pid": os.getpid(),
+        "open_ms": open_ms,
+        "rss_bytes": resident_memory_bytes(),
+        "shared_bytes": shared_memory_bytes(),
+        "documents": len(store),
+    }), flush=True)
+    sys.stdin.readline()
+
+
+def build_synthetic(persist_dir: str, n: int, dim: int, index_type: str):
+    from langchain_core.documents import Document
+    from backend.rag.vector_store import VectorStore
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    documents = [Document(page_content=f"chunk {i}", metadata={"chunk_id": f"c{i}"}) for i in range(n)]
+    store = VectorStore(index_type=index_type, persist_dir=persist_dir)
+    store.add_documents(documents, vectors)
+
+
+def run_mode(mode: str, args) -> list:
+    command = [sys.executable, os.path.abspath(__file__), "--worker", "--mode", mode,
+               "--queries", str(args.queries), "--dim", str(args.dim)]
+    if args.persist_dir:
+        command += ["--persist-dir", args.persist_dir]
+    workers = [
+        subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for _ in range(args.workers)
+    ]
+    reports = []
+    for process in workers:
+        # Workers print [INFO] lines while loading; the report is the JSON line
+        for line in process.stdout:
+            if line.startswith("{"):
+                reports.append(json.loads(line))
+                break
+    # All workers are alive and loaded here, so PSS splits the shared pages fairly
+    for report in reports:
+        report["pss_bytes"] = proportional_set_bytes(report["pid"])
+    for process in workers:
+        process.communicate("\n")
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-worker memory of heap vs. mmap index loading")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=20, help="Searches per worker before measuring")
+    parser.add_argument("--persist-dir", default=None, help="Store directory (default: VECTOR_DB_DIR)")
+    parser.add_argument("--synthetic", type=int, default=0, help="Build a temporary store of N random vectors")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--index-type", default="flat_ip")
+    parser.add_argument("--mode", choices=["heap", "mmap"], help=argparse.SUPPRESS)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args)
+        return
+
+    tmp = None
+    if args.synthetic:
+        tmp = tempfile.TemporaryDirectory()
+        args.persist_dir = tmp.name
+        print(f"[INFO] Building synthetic {args.index_type} store: {args.synthetic} x {args.dim}")
+        build_synthetic(tmp.name, args.synthetic, args.dim, args.index_type)
+
+    try:
+        print(f"\n{args.workers} workers, {args.queries} queries each")
+        print(f"\n{'mode':<6}{'open ms':>10}{'RSS MB':>10}{'shared MB':>11}{'PSS MB':>10}{'PSS total MB':>14}")
+        print("-" * 61)
+        for mode in ("heap", "mmap"):
+            reports = run_mode(mode, args)
+            if not reports:
+                print(f"{mode:<6}  workers failed to start")
+                continue
+            mean = lambda key: np.mean([r[key] for r in reports])
+            print(f"{mode:<6}{mean('open_ms'):>10.1f}{mean('rss_bytes') / 2**20:>10.1f}"
+                  f"{mean('shared_bytes') / 2**20:>11.1f}{mean('pss_bytes') / 2**20:>10.1f}"
+                  f"{sum(r['pss_bytes'] for r in reports) / 2**20:>14.1f}")
+        print("\nSet VECTOR_INDEX_MMAP=true to serve with the mmap mode.")
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
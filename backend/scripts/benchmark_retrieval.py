@@ -0,0 +1,306 @@
+"""
+Offline retrieval benchmark over the real scheme corpus.
+
+Chunks backend/data/schemes_json exactly as ingestion does, embeds the chunks
+without calling the API, then builds every VectorStore configuration (index
+type x storage) and measures:
+
+    build_s             time to build and save the store
+    rss_delta_mb        process RSS growth while building (allocator-dependent)
+    index_bytes         serialized FAISS index size (plus exact re-rank vectors)
+    p50/p95/p99_ms      single-query latency, unfiltered and category-filtered
+    recall@k            overlap with exact brute-force top-k on the same vectors
+    title@k             share of title queries whose own scheme is in the top-k
+
+Embeddings come from one of:
+    (default)           deterministic local HashingEmbedder (--dim wide, no network)
+    --from-cache        the ingestion EmbeddingCache of the configured model
+    --embeddings X.npy  a matrix aligned with the chunk order (same --limit)
+
+Queries are scheme titles plus the profile-search queries. Without a query
+embedder (--embeddings, or cache misses) sampled chunks are used as queries.
+
+Results are written as JSON (--output) and can be compared against an earlier
+run (--baseline); --fail-on-regression exits non-zero for CI.
+
+Usage:
+    python backend/scripts/benchmark_retrieval.py --output results.json
+    python backend/scripts/benchmark_retrieval.py --types flat_ip hnsw --storage float32 sq8 --limit 1000
+    python backend/scripts/benchmark_retrieval.py --baseline results.json --fail-on-regression
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+
+import faiss
+import numpy as np
+
+# Add parent directory to path so we can import backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.config.settings import settings
+from backend.ingestion.chunker import chunk_scheme
+from backend.ingestion.loaders.json_scheme_loader import JSONSchemeLoader
+from backend.ingestion.normalizer import normalize_scheme
+from backend.rag.local_embeddings import HashingEmbedder
+from backend.rag.scheme_matcher import SchemeMatcher
+from backend.rag.vector_store import VectorStore, INDEX_TYPES, STORAGE_TYPES, resident_memory_bytes
+
+# A recall drop or latency increase beyond these counts as a regression
+RECALL_TOLERANCE = 0.01
+LATENCY_TOLERANCE = 0.25
+
+
+def load_corpus(limit=None):
+    """Chunk Documents of the scheme corpus, as ingestion produces them."""
+    with redirect_stdout(io.StringIO()):
+        schemes = JSONSchemeLoader().load_all_schemes(limit)
+    return [doc for scheme in schemes for doc in chunk_scheme(normalize_scheme(scheme))]
+
+
+def build_queries(documents, n_titles: int, seed: int = 0):
+    """Title queries (sampled schemes) plus the fixed profile queries, as dicts."""
+    by_title = {}
+    for doc in documents:
+        by_title.setdefault(doc.metadata["title"], doc.metadata["category"])
+    titles = sorted(by_title)
+    rng = np.random.default_rng(seed)
+    picked = rng.choice(len(titles), size=min(n_titles, len(titles)), replace=False)
+    queries = [{"text": titles[i], "title": titles[i], "category": by_title[titles[i]]} for i in sorted(picked)]
+    queries += [{"text": q, "title": None, "category": None} for q in SchemeMatcher.profile_query_templates()]
+    return queries
+
+
+def embed(args, documents, queries):
+    """(corpus, query vectors, queries) as unit float32 matrices."""
+    texts = [doc.page_content for doc in documents]
+    query_vectors = None
+    if args.embeddings:
+        corpus = np.load(args.embeddings).astype(np.float32)
+        if len(corpus) != len(texts):
+            raise SystemExit(f"{args.embeddings} has {len(corpus)} rows but the corpus has {len(texts)} chunks")
+        source = args.embeddings
+    elif args.from_cache:
+        from backend.rag.embedding_cache import EmbeddingCache
+        from backend.rag.embeddings import embedding_key
+
+        source = embedding_key(settings.EMBEDDING_MODEL, settings.EMBEDDING_DIMENSIONS or None)
+        cache = EmbeddingCache(source)
+        cached = cache.get_many(texts)
+        missing = sum(v is None for v in cached)
+        if missing:
+            raise SystemExit(f"{missing} of {len(texts)} chunks are not in the {source} cache; run ingestion first")
+        corpus = np.asarray(cached, dtype=np.float32)
+        hits = [(q, v) for q, v in zip(queries, cache.get_many([q["text"] for q in queries])) if v is not None]
+        if hits:
+            queries = [q for q, _ in hits]
+            query_vectors = np.asarray([v for _, v in hits], dtype=np.float32)
+    else:
+        embedder = HashingEmbedder(args.dim).fit(texts)
+        source = embedder.cache_key
+        corpus = np.asarray(embedder.embed_texts(texts), dtype=np.float32)
+        query_vectors = np.asarray(embedder.embed_texts([q["text"] for q in queries]), dtype=np.float32)
+
+    if query_vectors is None:
+        # No query embedder: sampled chunks, lightly perturbed, stand in for queries
+        rng = np.random.default_rng(1)
+        rows = rng.choice(len(corpus), size=min(args.title_queries, len(corpus)), replace=False)
+        queries = [{"text": None, "title": documents[r].metadata["title"],
+                    "category": documents[r].metadata["category"]} for r in rows]
+        query_vectors = corpus[rows] + 0.05 * rng.standard_normal((len(rows), corpus.shape[1])).astype(np.float32)
+
+    corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+    query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    return corpus, query_vectors, queries, source
+
+
+def exact_top_k(corpus, query_vectors, k, masks=None):
+    """Exact inner-product top-k row indices; masks restrict each query's rows."""
+    scores = query_vectors @ corpus.T
+    if masks is not None:
+        scores = np.where(masks, scores, -np.inf)
+    return [row[np.isfinite(s[row])] for row, s in zip(np.argsort(-scores, axis=1)[:, :k], scores)]
+
+
+def percentiles(latencies):
+    return {f"p{p}_ms": float(np.percentile(latencies, p)) for p in (50, 95, 99)} if latencies else {}
+
+
+def run_config(index_type, storage, documents, corpus, query_vectors, queries, k):
+    ids = [doc.metadata["chunk_id"] for doc in documents]
+    row_of = {chunk_id: row for row, chunk_id in enumerate(ids)}
+    categories = np.array([doc.metadata["category"] for doc in documents])
+    with tempfile.TemporaryDirectory() as tmp:
+        rss_before = resident_memory_bytes()
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            store = VectorStore(collection_name="bench", index_type=index_type, persist_dir=tmp,
+                                storage=storage, check_embeddings=False)
+            store.upsert(ids, documents, corpus)
+        build_s = time.perf_counter() - start
+        rss_delta = resident_memory_bytes() - rss_before
+
+        result = {
+            "index_type": store.index_meta["index_type"],
+            "storage": store.index_meta["storage"],
+            "params": store.index_meta.get("params", {}),
+            "build_s": build_s,
+            "rss_delta_mb": rss_delta / 2**20,
+        }
+        stats = store.stats()
+        result.update({
+            "index_bytes": stats["index_bytes"],
+            "exact_vectors_bytes": stats["exact_vectors_bytes"],
+            "bytes_per_vector": stats["bytes_per_vector"],
+        })
+
+        truth = exact_top_k(corpus, query_vectors, k)
+        filtered = [i for i, q in enumerate(queries) if q["category"]]
+        masks = np.array([categories == queries[i]["category"] for i in filtered])
+        filtered_truth = exact_top_k(corpus, query_vectors[filtered], k, masks) if filtered else []
+
+        for name, rows, expected, use_filter in (
+            ("unfiltered", list(range(len(queries))), truth, False),
+            ("category_filter", filtered, filtered_truth, True),
+        ):
+            latencies, recall, title_hits, title_total = [], [], 0, 0
+            for i, exact in zip(rows, expected):
+                query = queries[i]
+                search_filter = {"category": query["category"]} if use_filter else None
+                start = time.perf_counter()
+                hits = store.search(query_vectors[i], k=k, filter=search_filter)
+                latencies.append((time.perf_counter() - start) * 1000)
+                found = {row_of[h["metadata"]["chunk_id"]] for h in hits}
+                if len(exact):
+                    recall.append(len(found.intersection(exact.tolist())) / len(exact))
+                if query["title"]:
+                    title_total += 1
+                    title_hits += any(h["metadata"]["title"] == query["title"] for h in hits)
+            result[name] = {
+                "queries": len(rows),
+                **percentiles(latencies),
+                f"recall@{k}": float(np.mean(recall)) if recall else None,
+                f"title@{k}": title_hits / title_total if title_total else None,
+            }
+    return result
+
+
+def compare(results, baseline, current_meta, k):
+    """Print changes against a baseline run; return the regressions found."""
+    previous = {(r["index_type"], r["storage"]): r for r in baseline["results"]}
+    regressions = []
+    print(f"\nAgainst baseline {baseline['meta']['timestamp']}:")
+    for field in ("chunks", "embeddings", "k"):
+        if baseline["meta"].get(field) != current_meta.get(field):
+            print(f"   [WARN] baseline {field} differs ({baseline['meta'].get(field)} vs {current_meta.get(field)})")
+    for result in results:
+        key = (result["index_type"], result["storage"])
+        if key not in previous:
+            continue
+        for mode in ("unfiltered", "category_filter"):
+            now, then = result[mode], previous[key].get(mode, {})
+            recall_now, recall_then = now.get(f"recall@{k}"), then.get(f"recall@{k}")
+            p95_now, p95_then = now.get("p95_ms"), then.get("p95_ms")
+            line = f"   {key[0]:<8}{key[1]:<9}{mode:<16}"
+            if recall_now is not None and recall_then is not None:
+                line += f" recall {recall_then:.3f} -> {recall_now:.3f}"
+                if recall_now < recall_then - RECALL_TOLERANCE:
+                    regressions.append(f"{key} {mode} recall")
+            if p95_now and p95_then:
+                line += f"   p95 {p95_then:.3f} -> {p95_now:.3f} ms"
+                if p95_now > p95_then * (1 + LATENCY_TOLERANCE):
+                    regressions.append(f"{key} {mode} p95 latency")
+            print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline retrieval benchmark over the scheme corpus")
+    parser.add_argument("--types", nargs="+", default=list(INDEX_TYPES), choices=INDEX_TYPES)
+    parser.add_argument("--storage", nargs="+", default=list(STORAGE_TYPES), choices=STORAGE_TYPES,
+                        help="Vector encodings for flat_ip/hnsw (flat_l2 is float32, ivf_pq is pq)")
+    parser.add_argument("--limit", type=int, default=None, help="Only the first N schemes")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--title-queries", type=int, default=300)
+    parser.add_argument("--dim", type=int, default=384, help="Local embedder width")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--from-cache", action="store_true", help="Use cached API embeddings")
+    source.add_argument("--embeddings", help=".npy matrix aligned with the chunk order")
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--baseline", help="Earlier --output file to compare against")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    documents = load_corpus(args.limit)
+    queries = build_queries(documents, args.title_queries)
+    corpus, query_vectors, queries, embedding_source = embed(args, documents, queries)
+    print(f"\nCorpus: {len(documents)} chunks x {corpus.shape[1]} dims ({embedding_source}), "
+          f"{len(queries)} queries, k={args.k}")
+
+    configs = []
+    for index_type in args.types:
+        if index_type == "flat_l2":
+            configs.append((index_type, "float32"))
+        elif index_type == "ivf_pq":
+            configs.append((index_type, "pq"))
+        else:
+            configs.extend((index_type, storage) for storage in args.storage)
+
+    k = args.k
+    print(f"\n{'index':<9}{'storage':<9}{'build s':>8}{'MB':>8}{'B/vec':>7}"
+          f"{'p50':>8}{'p95':>8}{'p99':>8}{'recall':>8}{'title':>7}{'f.p95':>8}{'f.recall':>9}")
+    print("-" * 97)
+    results = []
+    for index_type, storage in configs:
+        result = run_config(index_type, storage, documents, corpus, query_vectors, queries, k)
+        results.append(result)
+        plain, filtered = result["unfiltered"], result["category_filter"]
+        size_mb = (result["index_bytes"] + result["exact_vectors_bytes"]) / 2**20
+        fmt = lambda value, spec: format(value, spec) if value is not None else "-"
+        print(f"{result['index_type']:<9}{result['storage']:<9}{result['build_s']:>8.2f}{size_mb:>8.1f}"
+              f"{result['bytes_per_vector']:>7.0f}{plain['p50_ms']:>8.3f}{plain['p95_ms']:>8.3f}"
+              f"{plain['p99_ms']:>8.3f}{fmt(plain[f'recall@{k}'], '.3f'):>8}{fmt(plain[f'title@{k}'], '.3f'):>7}"
+              f"{fmt(filtered.get('p95_ms'), '.3f'):>8}{fmt(filtered[f'recall@{k}'], '.3f'):>9}")
+    print("(latencies in ms; f. = category-filtered queries)")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "chunks": len(documents),
+            "dimension": int(corpus.shape[1]),
+            "queries": len(queries),
+            "k": k,
+            "embeddings": embedding_source,
+            "faiss": faiss.__version__,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "settings": {name: getattr(settings, name) for name in (
+                "IVF_NLIST", "IVF_NPROBE", "PQ_M", "HNSW_M", "HNSW_EF_CONSTRUCTION",
+                "HNSW_EF_SEARCH", "VECTOR_RERANK",
+            )},
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n[INFO] Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), report["meta"], k)
+        if regressions:
+            print("\n[WARN] Regressions: " + ", ".join(regressions))
+            if args.fail_on_regression:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Recall@k vs. latency report for the FAISS index types supported by VectorStore.
+
+Every index type / storage combination is built through VectorStore (so
+training, search and re-rank parameters come from settings) and compared
+against an exact flat_ip baseline.
+
+Usage:
+    python backend/scripts/benchmark_vector_index.py
+    python backend/scripts/benchmark_vector_index.py --n 100000 --dim 1536
+    python backend/scripts/benchmark_vector_index.py --embeddings corpus.npy
+    python backend/scripts/benchmark_vector_index.py --types flat_ip hnsw --storage float32 float16 sq8 pq
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Add parent directory to path so we can import backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from langchain_core.documents import Document
+from backend.rag.vector_store import VectorStore, INDEX_TYPES, STORAGE_TYPES
+
+
+def synthetic_embeddings(n: int, dim: int, clusters: int = 64, seed: int = 0) -> np.ndarray:
+    """Clustered unit vectors; closer to real embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=n)
+    data = centers[labels] + 0.35 * rng.standard_normal((n, dim)).astype(np.float32)
+    return data / np.linalg.norm(data, axis=1, keepdims=True)
+
+
+def benchmark(corpus: np.ndarray, queries: np.ndarray, k: int, index_types, storages=("float32",)):
+    # Exact ground truth (cosine == inner product on unit vectors)
+    truth = np.argsort(-(queries @ corpus.T), axis=1)[:, :k]
+    documents = [Document(page_content=str(i), metadata={"row": i}) for i in range(len(corpus))]
+
+    rows = []
+    combos = [(t, s) for t in index_types for s in (storages if t != "ivf_pq" else ("pq",))]
+    for index_type, storage in combos:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = VectorStore(collection_name="bench", index_type=index_type, persist_dir=tmp,
+                                storage=storage)
+            start = time.perf_counter()
+            store.add_documents(documents, corpus)
+            build_s = time.perf_counter() - start
+
+            latencies = []
+            hits = 0
+            for q, expected in zip(queries, truth):
+                start = time.perf_counter()
+                results = store.search(q, k=k)
+                latencies.append((time.perf_counter() - start) * 1000)
+                found = {r["metadata"]["row"] for r in results}
+                hits += len(found.intersection(expected.tolist()))
+
+            stats = store.stats()
+            rows.append({
+                "index_type": store.index_meta["index_type"],
+                "storage": store.index_meta["storage"],
+                "bytes_per_vector": stats["bytes_per_vector"],
+                "build_s": build_s,
+                "p50_ms": float(np.percentile(latencies, 50)),
+                "p95_ms": float(np.percentile(latencies, 95)),
+                "recall": hits / (len(queries) * k),
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare VectorStore index types")
+    parser.add_argument("--n", type=int, default=20000, help="Synthetic corpus size")
+    parser.add_argument("--dim", type=int, default=1536, help="Synthetic embedding dimension")
+    parser.add_argument("--embeddings", type=str, help="Optional .npy matrix of real embeddings")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--types", nargs="+", default=list(INDEX_TYPES[1:]), choices=INDEX_TYPES)
+    parser.add_argument("--storage", nargs="+", default=["float32"], choices=STORAGE_TYPES,
+                        help="Vector encodings to try for flat/hnsw indexes")
+    args = parser.parse_args()
+
+    if args.embeddings:
+        corpus = np.load(args.embeddings).astype(np.float32)
+        corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+    else:
+        corpus = synthetic_embeddings(args.n, args.dim)
+
+    # Queries are perturbed corpus vectors so they have true near neighbours
+    rng = np.random.default_rng(1)
+    picks = rng.choice(len(corpus), size=min(args.queries, len(corpus)), replace=False)
+    queries = corpus[picks] + 0.05 * rng.standard_normal((len(picks), corpus.shape[1])).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    print(f"\nCorpus: {corpus.shape[0]} x {corpus.shape[1]}, {len(queries)} queries, k={args.k}")
+    rows = benchmark(corpus, queries, args.k, args.types, args.storage)
+
+    print(f"\n{'index':<10}{'storage':<10}{'B/vector':>10}{'build (s)':>12}{'p50 (ms)':>12}"
+          f"{'p95 (ms)':>12}{'recall@' + str(args.k):>12}")
+    print("-" * 78)
+    for row in rows:
+        print(f"{row['index_type']:<10}{row['storage']:<10}{row['bytes_per_vector']:>10.0f}"
+              f"{row['build_s']:>12.2f}{row['p50_ms']:>12.3f}{row['p95_ms']:>12.3f}{row['recall']:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
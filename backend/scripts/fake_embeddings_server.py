@@ -0,0 +1,89 @@
+"""
+Fake OpenAI embeddings server for exercising the ingestion pipeline offline.
+
+Returns deterministic vectors (seeded by the input text) from
+POST /v1/embeddings and can simulate latency and rate limiting.
+
+Usage:
+    python backend/scripts/fake_embeddings_server.py --port 8001 --max-concurrent 2
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 python backend/ingestion/ingestion_runner.py
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def fake_embedding(text: str, dim: int) -> list:
+    """Deterministic unit vector for a text."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def create_app(dim: int = 1536, latency_ms: float = 50.0, max_concurrent: int = 0,
+               error_rate: float = 0.0) -> FastAPI:
+    app = FastAPI(title="Fake Embeddings Server")
+    state = {"in_flight": 0, "requests": 0, "rate_limited": 0}
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        state["requests"] += 1
+
+        # Simulated rate limit: too many concurrent requests, or random 429s
+        if (max_concurrent and state["in_flight"] >= max_concurrent) or random.random() < error_rate:
+            state["rate_limited"] += 1
+            return JSONResponse(
+                status_code=429,
+                headers={"retry-after": "0.2"},
+                content={"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+            )
+
+        state["in_flight"] += 1
+        try:
+            inputs = body["input"]
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            await asyncio.sleep(latency_ms / 1000.0)
+            width = body.get("dimensions") or dim
+            data = [
+                {"object": "embedding", "index": i, "embedding": fake_embedding(str(text), width)}
+                for i, text in enumerate(inputs)
+            ]
+        finally:
+            state["in_flight"] -= 1
+
+        tokens = sum(len(str(t)) // 4 + 1 for t in inputs)
+        return {
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "fake"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    @app.get("/stats")
+    async def stats():
+        return state
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI embeddings server")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--max-concurrent", type=int, default=0, help="429 above this many in-flight requests (0 = off)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    args = parser.parse_args()
+
+    uvicorn.run(
+        create_app(args.dim, args.latency_ms, args.max_concurrent, args.error_rate),
+        host="127.0.0.1", port=args.port
+    )
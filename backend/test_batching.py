@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+from backend.nlp.batching import TranslationBatcher
+from backend.nlp.executor import TranslationQueueFull
+
+
+class FakeTranslator:
+    """Tags each text with its target language; records the pair of every batch."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.batches = []
+
+    def batch_translate(self, texts, source_lang, target_lang, batch_size=None):
+        time.sleep(self.delay)
+        self.batches.append(((source_lang, target_lang), len(texts)))
+        return [f"{target_lang}:{text}" for text in texts]
+
+    def detect_language_code(self, text):
+        return "en_XX"
+
+
+def test_concurrent_texts_share_a_batch():
+    translator = FakeTranslator()
+
+    async def run():
+        batcher = TranslationBatcher(translator, max_batch_size=8, max_wait_ms=20, queue_limit=0)
+        return await asyncio.gather(*(batcher.from_english(f"t{i}", "hi_IN") for i in range(8)))
+
+    assert asyncio.run(run()) == [f"hi_IN:t{i}" for i in range(8)]
+    assert translator.batches == [(("en_XX", "hi_IN"), 8)]
+
+
+def test_busy_pair_does_not_starve_others():
+    translator = FakeTranslator(delay=0.01)
+
+    async def run():
+        batcher = TranslationBatcher(translator, max_batch_size=2, max_wait_ms=0, queue_limit=0)
+        busy = [asyncio.ensure_future(batcher.from_english(f"a{i}", "hi_IN")) for i in range(4)]
+        await asyncio.sleep(0)
+        other = asyncio.ensure_future(batcher.from_english("b", "ta_IN"))
+        # Sustained load on the first pair: it never runs out of queued texts
+        for i in range(4, 40):
+            busy.append(asyncio.ensure_future(batcher.from_english(f"a{i}", "hi_IN")))
+            await asyncio.sleep(0.004)
+        assert other.done(), "ta_IN waited behind the whole hi_IN backlog"
+        await asyncio.gather(other, *busy)
+
+    asyncio.run(run())
+    pairs = [pair for pair, _ in translator.batches]
+    assert pairs.index(("en_XX", "ta_IN")) <= 3
+
+
+def test_queue_limit_rejects_beyond_limit():
+    translator = FakeTranslator(delay=0.01)
+
+    async def run():
+        batcher = TranslationBatcher(translator, max_batch_size=2, max_wait_ms=0, queue_limit=4)
+        results = await asyncio.gather(
+            *(batcher.from_english(f"t{i}", "hi_IN") for i in range(10)), return_exceptions=True
+        )
+        return results, batcher.stats()
+
+    results, stats = asyncio.run(run())
+    rejected = [r for r in results if isinstance(r, TranslationQueueFull)]
+    assert len(rejected) == 6 and stats["rejected"] == 6 and stats["queued"] == 0
@@ -0,0 +1,68 @@
+from langchain_core.documents import Document
+
+from backend.ingestion.dedup import find_duplicates, lsh_bands, mark_duplicates
+from backend.rag.vector_store import DUPLICATE_OF_KEY
+
+
+BOILERPLATE = (
+    "Applicant must be a resident of the state. Annual family income should not exceed "
+    "two lakh rupees. Documents required: Aadhaar card, income certificate, caste "
+    "certificate, bank passbook and a recent passport size photograph. Apply online "
+    "through the state portal and submit the printed form at the district office."
+)
+
+
+def _chunk(scheme: str, body: str) -> str:
+    return f"SCHEME: {scheme}\nCATEGORY: Education\nLEVEL: State\n{body}"
+
+
+def test_chunks_differing_only_in_header_are_duplicates():
+    texts = [_chunk("Scheme A", BOILERPLATE), _chunk("Scheme B", BOILERPLATE), _chunk("Scheme C", BOILERPLATE)]
+    # Later duplicates point at the first text directly, never at another duplicate
+    assert find_duplicates(texts) == [None, 0, 0]
+
+
+def test_distinct_chunks_are_kept():
+    texts = [
+        _chunk("Scheme A", BOILERPLATE),
+        _chunk("Scheme B", "Free bicycles for girl students of class nine in government schools."),
+        _chunk("Scheme C", "Monthly pension of one thousand rupees for widows above sixty years of age."),
+    ]
+    assert find_duplicates(texts) == [None, None, None]
+    assert find_duplicates([]) == []
+
+
+def test_small_edit_is_still_a_duplicate_at_a_lower_threshold():
+    edited = BOILERPLATE.replace("district office", "block office")
+    assert find_duplicates([BOILERPLATE, edited], threshold=0.7) == [None, 0]
+
+
+def test_lsh_bands_stay_within_the_signature():
+    for num_perm in (64, 128):
+        for threshold in (0.7, 0.9):
+            bands, rows = lsh_bands(num_perm, threshold)
+            assert bands * rows <= num_perm
+            assert (1.0 / bands) ** (1.0 / rows) <= threshold
+
+
+def test_mark_duplicates_tags_by_chunk_id_order():
+    docs = [
+        Document(page_content=_chunk(f"Scheme {s}", BOILERPLATE),
+                 metadata={"chunk_id": f"{s}_0", "scheme_id": s})
+        for s in ("c", "a", "b")
+    ]
+    docs.append(Document(page_content=_chunk("Scheme d", "Unrelated text about crop insurance claims."),
+                         metadata={"chunk_id": "d_0", "scheme_id": "d"}))
+    assert mark_duplicates(docs) == 2
+    by_id = {doc.metadata["chunk_id"]: doc.metadata for doc in docs}
+    assert DUPLICATE_OF_KEY not in by_id["a_0"]
+    assert by_id["a_0"]["shared_schemes"] == ["b", "c"]
+    assert by_id["b_0"][DUPLICATE_OF_KEY] == by_id["c_0"][DUPLICATE_OF_KEY] == "a_0"
+    assert DUPLICATE_OF_KEY not in by_id["d_0"] and "shared_schemes" not in by_id["d_0"]
+
+    # Re-marking after the canonical changes resets the old tags
+    docs = [doc for doc in docs if doc.metadata["chunk_id"] != "a_0"]
+    assert mark_duplicates(docs) == 1
+    by_id = {doc.metadata["chunk_id"]: doc.metadata for doc in docs}
+    assert DUPLICATE_OF_KEY not in by_id["b_0"] and by_id["b_0"]["shared_schemes"] == ["c"]
+    assert by_id["c_0"][DUPLICATE_OF_KEY] == "b_0"
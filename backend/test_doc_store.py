@@ -0,0 +1,70 @@
+from backend.rag.doc_store import DocumentStore
+
+
+def _store(tmp_path):
+    return DocumentStore(str(tmp_path / "docs"))
+
+
+def test_put_is_readable_before_and_after_flush(tmp_path):
+    store = _store(tmp_path)
+    store.put(1, "first", {"scheme_id": "a", "level": "state"})
+    store.put(2, "second", {"scheme_id": "b"})
+    assert store.get(1) == ("first", {"scheme_id": "a", "level": "state"})
+    assert len(store) == 2
+
+    store.flush()
+    reopened = _store(tmp_path)
+    assert len(reopened) == 2
+    assert reopened.get(2) == ("second", {"scheme_id": "b"})
+    assert sorted(reopened.labels().tolist()) == [1, 2]
+
+
+def test_put_replaces_a_flushed_document(tmp_path):
+    store = _store(tmp_path)
+    store.put(1, "old", {"scheme_id": "a"})
+    store.flush()
+    store.put(1, "new", {"scheme_id": "b"})
+    assert len(store) == 1
+    assert store.get(1) == ("new", {"scheme_id": "b"})
+    assert store.labels_where({"scheme_id": "a"}).tolist() == []
+    assert store.labels_where({"scheme_id": "b"}).tolist() == [1]
+
+    store.flush()
+    assert [(label, text) for label, text, _ in _store(tmp_path).items()] == [(1, "new")]
+
+
+def test_remove_before_and_after_flush(tmp_path):
+    store = _store(tmp_path)
+    for label in range(4):
+        store.put(label, f"text {label}", {"scheme_id": str(label)})
+    store.remove(0)
+    store.flush()
+    store.remove(1)
+    store.remove(1)
+    store.remove(99)
+    assert len(store) == 2
+    assert 1 not in store and store.get(1) is None
+    assert sorted(store.labels().tolist()) == [2, 3]
+
+    store.flush()
+    assert sorted(label for label, _, _ in _store(tmp_path).items()) == [2, 3]
+
+
+def test_labels_where_none_matches_missing_field(tmp_path):
+    store = _store(tmp_path)
+    store.put(1, "scheme chunk", {"scheme_id": "a"})
+    store.put(2, "pdf chunk", {"source": "pdf"})
+    store.flush()
+    store.put(3, "new pdf chunk", {"source": "pdf"})
+    assert sorted(store.labels_where({"scheme_id": ["a", None]}).tolist()) == [1, 2, 3]
+    assert store.labels_where({"scheme_id": "a"}).tolist() == [1]
+
+
+def test_clear_empties_the_store(tmp_path):
+    store = _store(tmp_path)
+    store.put(1, "text", {})
+    store.flush()
+    store.put(2, "text", {})
+    store.clear()
+    assert len(store) == 0
+    assert not DocumentStore.exists(str(tmp_path / "docs"))
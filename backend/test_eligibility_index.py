@@ -0,0 +1,75 @@
+import random
+
+import numpy as np
+
+from backend.rag.eligibility_index import CATEGORIES, EligibilityIndex
+from backend.rag.scheme_matcher import SchemeMatcher
+
+
+def _index(*category_lists):
+    return EligibilityIndex.build([
+        {"title": f"Scheme {i}", "eligibility_criteria": {"categories": list(categories)}}
+        for i, categories in enumerate(category_lists)
+    ])
+
+
+def test_each_category_matches_a_scheme_listing_it():
+    index = _index(["General", "OBC"], ["SC", "ST"], [])
+    for category in CATEGORIES:
+        for spelling in (category, category.upper(), category.lower()):
+            is_eligible, confidence = index.scores({"category": spelling})
+            listed = category in ("General", "OBC")
+            assert bool(is_eligible[0]) == listed, spelling
+            assert np.isclose(confidence[0], 0.6 if listed else 0.3), spelling
+            # A scheme without a category list is neutral
+            assert is_eligible[2] and np.isclose(confidence[2], 0.5)
+
+
+def test_general_user_keeps_general_schemes():
+    index = _index(["General", "OBC"])
+    assert [scheme_id for scheme_id, _ in index.match_profile({"category": "General"})] == [index.scheme_ids[0]]
+
+
+def test_unknown_category_is_not_penalised():
+    index = _index(["General", "OBC"], ["SC"])
+    is_eligible, confidence = index.scores({"category": "EWS"})
+    assert is_eligible.all()
+    assert np.allclose(confidence, 0.5)
+
+
+def test_listed_categories_are_case_insensitive():
+    index = _index(["general", "obc"])
+    is_eligible, _ = index.scores({"category": "General"})
+    assert is_eligible[0]
+
+
+def test_matches_per_document_check():
+    rng = random.Random(7)
+    titles = ["Farmer Support", "Post Matric Scholarship", "Widow Pension", "Student Laptop Yojana", "Housing Aid"]
+    schemes = []
+    for i in range(200):
+        criteria = {
+            "age_min": rng.choice([None, 0, 18, 60]),
+            "age_max": rng.choice([None, 0, 40, 100]),
+            "income_max": rng.choice([None, 0, 100000, 250000]),
+            "gender": rng.choice([None, "female", "male"]),
+            "is_student": rng.random() < 0.2,
+            "is_disabled": rng.random() < 0.2,
+        }
+        schemes.append({"title": f"{rng.choice(titles)} {i}", "eligibility_criteria": criteria})
+    index = EligibilityIndex.build(schemes)
+
+    for _ in range(50):
+        profile = {
+            "age": rng.choice([None, 16, 30, 70]),
+            "annual_income": rng.choice([None, 50000, 200000, 500000]),
+            "gender": rng.choice([None, "Female", "male"]),
+            "is_student": rng.random() < 0.5,
+            "is_disabled": rng.random() < 0.3,
+        }
+        is_eligible, confidence = index.scores(profile)
+        for row, scheme in enumerate(schemes):
+            metadata = {**scheme["eligibility_criteria"], "title": scheme["title"]}
+            expected_eligible, expected_confidence, _ = SchemeMatcher.check_eligibility_match(profile, metadata)
+            assert bool(is_eligible[row]) == expected_eligible, (profile, metadata)
+            assert np.isclose(confidence[row], expected_confidence), (profile, metadata)
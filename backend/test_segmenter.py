@@ -0,0 +1,60 @@
+from backend.nlp.segmenter import MAX_SEGMENT_CHARS, join_markdown, split_markdown, split_sentences
+
+
+ANSWER = """## PM-KISAN
+
+**Benefit:** Rs. 6000 per year in three instalments. It is paid directly to the bank account.
+
+- Small and marginal farmers are eligible.
+- https://pmkisan.gov.in
+
+| Scheme | Benefit |
+|--------|---------|
+| PM-KISAN | Income support |
+
+```
+not translated. Keep this.
+```
+
+1. Visit the nearest CSC.  
+> Dr. Ambedkar scheme details follow."""
+
+
+def test_identity_translation_round_trips():
+    template, segments = split_markdown(ANSWER)
+    assert join_markdown(template, segments) == ANSWER
+
+
+def test_only_prose_becomes_segments():
+    _, segments = split_markdown(ANSWER)
+    assert "**Benefit:** Rs. 6000 per year in three instalments." in segments
+    assert "It is paid directly to the bank account." in segments
+    assert "Income support" in segments
+    assert not any("https://" in s or "Keep this" in s or s.startswith(("#", "- ", "|")) for s in segments)
+    # Abbreviations do not end a sentence
+    assert "Dr. Ambedkar scheme details follow." in segments
+
+
+def test_translations_keep_the_markdown_structure():
+    template, segments = split_markdown(ANSWER)
+    translated = join_markdown(template, [s.upper() for s in segments])
+    lines, original = translated.split("\n"), ANSWER.split("\n")
+    assert len(lines) == len(original)
+    assert lines[0] == "## PM-KISAN"
+    assert lines[5] == "- https://pmkisan.gov.in"
+    assert lines[8] == original[8]
+    assert lines[11:14] == original[11:14]
+    assert lines[9] == "| PM-KISAN | INCOME SUPPORT |"
+
+
+def test_newlines_in_a_translation_are_flattened():
+    template, segments = split_markdown("- First point.\n- Second point.")
+    assert join_markdown(template, ["एक\nदो", "तीन"]) == "- एक दो\n- तीन"
+
+
+def test_long_sentences_are_split_at_clauses():
+    sentence = ", ".join(["a clause of a long sentence"] * 40) + "."
+    parts = split_sentences(sentence)
+    assert len(parts) > 1
+    assert all(len(part) <= MAX_SEGMENT_CHARS for part in parts)
+    assert " ".join(parts) == sentence
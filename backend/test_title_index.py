@@ -0,0 +1,72 @@
+from backend.rag.title_index import TitleIndex
+
+
+TITLES = [
+    "Pradhan Mantri Kisan Samman Nidhi",
+    "Atal Pension Yojana",
+    "Indira Gandhi National Old Age Pension Scheme",
+    "Post Matric Scholarship For Scheduled Caste Students",
+]
+
+
+def _records(titles=TITLES):
+    # Two chunks per scheme
+    return [
+        (2 * row + part, "chunk text", {"title": title, "scheme_id": f"s{row}"})
+        for row, title in enumerate(titles) for part in range(2)
+    ]
+
+
+def test_exact_lookup_ignores_case_and_punctuation():
+    index = TitleIndex.build(_records())
+    match = index.lookup("ATAL-PENSION yojana")
+    assert match["match"] == "exact" and match["score"] == 1.0
+    assert match["title"] == "Atal Pension Yojana"
+    assert match["scheme_id"] == "s1"
+    assert sorted(match["labels"]) == [2, 3]
+
+
+def test_token_lookup_with_typo():
+    index = TitleIndex.build(_records())
+    match = index.lookup("indira gandhi national old age pensoin scheme")
+    assert match["title"] == "Indira Gandhi National Old Age Pension Scheme"
+    assert match["match"] in ("tokens", "fuzzy")
+
+
+def test_short_token_typo_is_corrected():
+    match = TitleIndex.build(_records()).lookup("Atal Pension Yojna")
+    assert match["title"] == "Atal Pension Yojana"
+    assert match["match"] != "exact"
+
+
+def test_partial_name_scores_below_a_full_one():
+    index = TitleIndex.build(_records())
+    partial = index.lookup("Post Matric Scholarship Scheduled Caste")
+    assert partial["title"] == TITLES[3]
+    assert partial["score"] < index.lookup(TITLES[3])["score"]
+
+
+def test_unrelated_name_has_no_match():
+    index = TitleIndex.build(_records())
+    assert index.lookup("qwerty zzz") is None
+    assert index.lookup("") is None
+
+
+def test_updated_matches_a_full_build():
+    index = TitleIndex.build(_records())
+    # Drop one chunk of scheme 0, all of scheme 1, and add a scheme
+    added = [(100, "chunk text", {"title": "Stand Up India", "scheme_id": "s9"})]
+    updated = index.updated([0, 2, 3], added)
+    rebuilt = TitleIndex.build([r for r in _records() if r[0] not in (0, 2, 3)] + added)
+    assert sorted(zip(updated.titles, updated.labels)) == sorted(zip(rebuilt.titles, rebuilt.labels))
+    assert updated.lookup("Atal Pension Yojana") is None
+    assert updated.lookup("stand up india")["labels"] == [100]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = TitleIndex.build(_records())
+    path = str(tmp_path / "titles.json")
+    index.save(path)
+    loaded = TitleIndex.load(path)
+    assert loaded.lookup("pm kisan samman nidhi") == index.lookup("pm kisan samman nidhi")
+    assert loaded.lookup("Atal Pension Yojana")["labels"] == [2, 3]
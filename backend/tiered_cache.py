@@ -0,0 +1,145 @@
+"""
+Tiered Cache - bounded LRU with optional TTL and an optional SQLite tier.
+
+Base of QueryEmbeddingCache (backend/rag/query_cache.py) and TranslationCache
+(backend/nlp/translation_cache.py). Subclasses build the keys and define how
+a value is stored in SQLite (_encode/_decode); this class holds the LRU, the
+expiry rule, the disk tier and the hit counters. The SQLite tier is shared by
+all workers on the host, survives restarts and is best-effort.
+"""
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Sequence
+
+
+class TieredCache:
+    """Thread-safe in-process LRU (entries expire after ttl seconds unless ttl is None) over SQLite."""
+
+    # SQLite table and value column; kept per subclass so existing cache files stay readable
+    table = "cache"
+    value_column = "value"
+    value_type = "BLOB"
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None, db_path: str = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.db_path = db_path or None
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.db_path:
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                    f"key TEXT PRIMARY KEY, {self.value_column} {self.value_type} NOT NULL, created REAL NOT NULL)"
+                )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        try:
+            with conn:  # commits on success
+                yield conn
+        finally:
+            conn.close()
+
+    def _encode(self, value: Any) -> Any:
+        """Value as stored in the SQLite tier."""
+        return value
+
+    def _decode(self, stored: Any) -> Any:
+        return stored
+
+    def _fresh(self, created: float, now: float) -> bool:
+        return self.ttl is None or now - created < self.ttl
+
+    def _remember(self, key: str, value: Any, created: float):
+        self._entries[key] = (value, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get_keys(self, keys: Sequence[str]) -> List[Optional[Any]]:
+        """Cached values for keys (None where missing or expired)."""
+        now = time.time()
+        results: List[Optional[Any]] = [None] * len(keys)
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if self._fresh(entry[1], now):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    results[i] = entry[0]
+                else:
+                    del self._entries[key]
+
+        missing = [i for i, value in enumerate(results) if value is None]
+        if self.db_path and missing:
+            wanted = list({keys[i] for i in missing})
+            found = {}
+            try:
+                with self._connect() as conn:
+                    # Stay below SQLite's bound-parameter limit
+                    for start in range(0, len(wanted), 500):
+                        part = wanted[start:start + 500]
+                        rows = conn.execute(
+                            f"SELECT key, {self.value_column}, created FROM {self.table} "
+                            f"WHERE key IN ({','.join('?' * len(part))})",
+                            part
+                        ).fetchall()
+                        for key, stored, created in rows:
+                            if self._fresh(created, now):
+                                found[key] = (self._decode(stored), created)
+            except sqlite3.Error:
+                pass
+            with self._lock:
+                for i in missing:
+                    entry = found.get(keys[i])
+                    if entry is not None:
+                        self._remember(keys[i], *entry)
+                        self.disk_hits += 1
+                        results[i] = entry[0]
+
+        with self._lock:
+            self.misses += sum(1 for value in results if value is None)
+        return results
+
+    def put_keys(self, keys: Sequence[str], values: Sequence[Any]):
+        now = time.time()
+        rows = []
+        with self._lock:
+            for key, value in zip(keys, values):
+                self._remember(key, value, now)
+                rows.append((key, self._encode(value), now))
+
+        if self.db_path and rows:
+            try:
+                with self._connect() as conn:
+                    conn.executemany(
+                        f"INSERT OR REPLACE INTO {self.table} (key, {self.value_column}, created) VALUES (?, ?, ?)",
+                        rows
+                    )
+            except sqlite3.Error:
+                pass  # the disk tier is best-effort
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "disk_tier": bool(self.db_path),
+            }